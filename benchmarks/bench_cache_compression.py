@@ -0,0 +1,92 @@
+"""
+So sánh kích thước DB và độ trễ đọc của cache giữa payload JSON thường và JSON nén zlib.
+
+Chạy từ thư mục gốc của dự án:
+    python benchmarks/bench_cache_compression.py [số_video]
+
+Dữ liệu là các phản hồi videos().list giả lập (snippet + statistics + contentDetails + tags),
+ghi vào một file SQLite tạm nên không đụng tới data/cache.db.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_cache
+
+WORDS = ("review unboxing tutorial how to best top cheap vlog gaming minecraft recipe "
+         "music live news highlights reaction challenge tips guide 2026 vietnam travel").split()
+
+
+def fake_video(video_id):
+    title = " ".join(random.choices(WORDS, k=8))
+    return {
+        'kind': 'youtube#video',
+        'etag': f'etag-{video_id}',
+        'id': video_id,
+        'snippet': {
+            'publishedAt': '2026-01-01T00:00:00Z',
+            'channelId': f'UC{random.randint(0, 500):022d}',
+            'title': title,
+            'description': " ".join(random.choices(WORDS, k=120)),
+            'thumbnails': {
+                size: {'url': f'https://i.ytimg.com/vi/{video_id}/{size}.jpg', 'width': 480, 'height': 360}
+                for size in ('default', 'medium', 'high', 'standard', 'maxres')
+            },
+            'channelTitle': 'Channel ' + random.choice(WORDS),
+            'tags': random.sample(WORDS, 12),
+            'categoryId': str(random.randint(1, 30)),
+            'liveBroadcastContent': 'none',
+            'localized': {'title': title, 'description': 'localized description'},
+        },
+        'contentDetails': {'duration': 'PT12M3S', 'dimension': '2d', 'definition': 'hd',
+                           'caption': 'false', 'licensedContent': True, 'projection': 'rectangular'},
+        'statistics': {'viewCount': str(random.randint(0, 10 ** 7)), 'likeCount': '1000',
+                       'favoriteCount': '0', 'commentCount': str(random.randint(0, 5000))},
+    }
+
+
+def run(codec, videos, db_path):
+    db_cache.DB_PATH = db_path
+    db_cache.PAYLOAD_CODEC = codec
+    db_cache.init_db()
+
+    started = time.perf_counter()
+    with db_cache.transaction():
+        for video in videos:
+            db_cache.set_cache(f"videos.list:{video['id']}", {'items': [video]}, ttl_seconds=3600)
+    write_seconds = time.perf_counter() - started
+
+    # Đo đọc từ SQLite, không phải từ cache L1 trong bộ nhớ
+    db_cache.memory_cache.clear()
+    started = time.perf_counter()
+    for video in videos:
+        db_cache.get_cache(f"videos.list:{video['id']}")
+    read_seconds = time.perf_counter() - started
+
+    db_cache.get_connection().execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    db_cache.get_connection().execute('VACUUM')
+    db_cache.close_connection()
+    size_mb = os.path.getsize(db_path) / (1024 * 1024)
+    return size_mb, write_seconds, read_seconds
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    random.seed(42)
+    videos = [fake_video(f'vid{i:08d}') for i in range(count)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{count} video, mỗi video một dòng cache")
+        print(f"{'codec':<6} {'DB (MB)':>9} {'ghi (s)':>9} {'đọc (s)':>9} {'µs/lần đọc':>11}")
+        for codec in ('json', 'zlib'):
+            size_mb, write_seconds, read_seconds = run(codec, videos, os.path.join(tmp_dir, f'{codec}.db'))
+            print(f"{codec:<6} {size_mb:>9.1f} {write_seconds:>9.2f} {read_seconds:>9.2f} "
+                  f"{read_seconds / count * 1e6:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -124,4 +124,107 @@ VIDEO_DEFINITION_OPTIONS_MAP = {
     "Bất kỳ": None,
     "Chuẩn (SD)": "standard",
     "Cao (HD)": "high"
-}
\ No newline at end of file
+}
+# Thời gian cache (giây) cho phản hồi API theo từng endpoint.
+# Giá trị 0 nghĩa là không cache endpoint đó.
+API_CACHE_DEFAULT_TTL_SECONDS = 3600
+API_CACHE_TTL_SECONDS = {
+    "search.list": 30 * 60,                  # Kết quả tìm kiếm thay đổi nhanh
+    "videos.list": 6 * 3600,                 # Thống kê video
+    "channels.list": 24 * 3600,              # Snippet/thống kê kênh
+    "playlistItems.list": 3600,              # Danh sách video tải lên
+    "commentThreads.list": 30 * 60,
+    "videoCategories.list": 30 * 24 * 3600,  # Danh mục gần như không đổi
+}
+
+# Thời gian (giây) giữ một video/kênh trong cache theo thực thể (entity_cache)
+ENTITY_CACHE_TTL_SECONDS = {
+    "video": 6 * 3600,
+    "channel": 24 * 3600,
+}
+
+# Giới hạn dung lượng cache SQLite và chu kỳ dọn dẹp nền
+CACHE_MAX_SIZE_MB = 256
+CACHE_SWEEP_INTERVAL_SECONDS = 10 * 60
+CACHE_SWEEP_BATCH_SIZE = 500
+
+# Định dạng lưu payload trong cache: "zlib" (JSON gọn + nén) hoặc "json" (không nén)
+CACHE_PAYLOAD_CODEC = "zlib"
+
+# Cache L1 trong bộ nhớ đặt trước SQLite
+CACHE_MEMORY_MAX_ENTRIES = 5000
+CACHE_MEMORY_MAX_MB = 64
+# Chu kỳ tối thiểu (giây) ghi last_access của các lần trúng L1 xuống SQLite (gộp thành một giao dịch)
+CACHE_ACCESS_FLUSH_SECONDS = 30
+
+# Hạn ngạch YouTube Data API mỗi ngày cho một key (reset lúc 0h giờ Thái Bình Dương)
+API_DAILY_QUOTA_PER_KEY = 10000
+# Chi phí (unit) của từng endpoint theo tài liệu YouTube Data API v3
+API_QUOTA_COSTS = {
+    "search.list": 100,
+    "videos.list": 1,
+    "channels.list": 1,
+    "playlistItems.list": 1,
+    "commentThreads.list": 1,
+    "videoCategories.list": 1,
+}
+
+# Số request API chạy song song tối đa và số request đồng thời tối đa trên một key
+API_FETCH_MAX_WORKERS = 6
+API_MAX_INFLIGHT_PER_KEY = 4
+
+# Số request videos/channels.list (mỗi request 50 ID) được gộp vào một HTTP batch
+API_BATCH_MAX_PARTS = 10
+
+# Số luồng làm giàu (lấy kênh + chi tiết video) chạy song song với việc phân trang tìm kiếm
+SEARCH_ENRICH_MAX_WORKERS = 4
+
+# Tìm sâu: chia truy vấn theo khung thời gian để vượt giới hạn ~500 kết quả của search.list
+DEEP_SEARCH_MAX_RESULTS = 20000
+DEEP_SEARCH_QUOTA_BUDGET = 50000      # unit quota tối đa cho một lần tìm sâu (search.list = 100)
+DEEP_SEARCH_MAX_WORKERS = 4
+DEEP_SEARCH_WINDOW_SATURATION = 450   # totalResults vượt ngưỡng này thì chia khung
+DEEP_SEARCH_MIN_WINDOW_SECONDS = 3600
+# Mốc publishedAfter/publishedBefore tính từ "bây giờ" được làm tròn theo bước này (giây),
+# để chạy lại cùng tìm kiếm ra cùng khóa cache thay vì mỗi giây một khóa mới
+SEARCH_TIME_GRANULARITY_SECONDS = 3600
+
+# Tìm nhiều từ khóa cùng lúc: số từ khóa chạy song song, trần quota search.list chung, số video mỗi từ khóa
+BATCH_SEARCH_MAX_WORKERS = 3
+BATCH_SEARCH_QUOTA_CEILING = 20000
+BATCH_SEARCH_RESULTS_PER_KEYWORD = 200
+
+# Ước tính quota trước khi chạy: số video mặc định của kênh chưa có thống kê trong cache
+PLANNER_DEFAULT_UPLOADS_PER_CHANNEL = 300
+
+# Xuất dữ liệu: số dòng đầu dùng để ước lượng độ rộng cột Excel, số dòng giữa hai lần báo tiến độ
+EXPORT_WIDTH_SAMPLE_ROWS = 200
+EXPORT_PROGRESS_EVERY_ROWS = 2000
+EXPORT_PARQUET_BATCH_ROWS = 10000
+
+# Kho cục bộ (SQLite FTS5): lưu mọi video/kênh đã lấy chi tiết để tìm lại offline không tốn quota
+LOCAL_CORPUS_ENABLED = True
+LOCAL_CORPUS_BACKFILL_BATCH_SIZE = 500
+
+# Phân tích n-gram tiêu đề/thẻ: độ dài n-gram tối đa, số video tối thiểu chứa cụm từ, số cụm từ hiển thị
+NGRAM_MAX_N = 3
+NGRAM_MIN_VIDEOS = 3
+NGRAM_TOP_TERMS = 300
+NGRAM_MIN_SUBSCRIBERS = 100   # mẫu số tối thiểu khi tính lượt xem / người đăng ký
+
+# Điểm đột phá: tuổi video tối thiểu (ngày) khi chia lượt xem/ngày, số video tối thiểu của một kênh
+# trong tập kết quả để dùng trung vị của kênh (ít hơn thì dùng lượt xem trung bình trọn đời của kênh)
+SCORE_MIN_AGE_DAYS = 1
+SCORE_MIN_CHANNEL_VIDEOS = 3
+
+# Nghiên cứu kênh: số kênh được phân giải URL và lấy video song song
+CHANNEL_FETCH_MAX_WORKERS = 4
+
+# Đồng bộ tăng dần video kênh: số video mới nhất đã lưu được lấy lại số liệu ở mỗi lần đồng bộ
+CHANNEL_SYNC_REFRESH_RECENT = 50
+# Số video của một kênh được gửi lên bảng mỗi lần khi đọc kết quả từ kho (kênh lớn được hiển thị dần)
+CHANNEL_RESULT_BATCH_ROWS = 1000
+
+# Phân giải URL/handle kênh -> channel ID: thời gian nhớ kết quả và số lệnh yt-dlp chạy song song
+CHANNEL_RESOLVE_TTL_SECONDS = 90 * 24 * 3600
+CHANNEL_RESOLVE_MAX_WORKERS = 8
@@ -4,8 +4,14 @@ import json
 import time
 import os
 import logging
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
+from config import CACHE_PAYLOAD_CODEC, CACHE_MEMORY_MAX_ENTRIES, CACHE_MEMORY_MAX_MB, CACHE_ACCESS_FLUSH_SECONDS
+
 logger = logging.getLogger(__name__)
 
 # Create 'data' directory if not exists
@@ -14,9 +20,167 @@ if not os.path.exists('data'):
 
 DB_PATH = os.path.join('data', 'cache.db')
 
+# Codec dùng cho các bản ghi mới ("zlib" hoặc "json"); bản ghi cũ vẫn đọc được với mọi codec
+PAYLOAD_CODEC = CACHE_PAYLOAD_CODEC
+
+class MemoryLRUCache:
+    """
+    Bounded in-process LRU (by entry count and approximate bytes) used as the L1 in front of SQLite.
+    Values are shared between callers and must be treated as read-only.
+    Hits are remembered until take_touched() so their access time can be written back to SQLite,
+    and the SQLite hit/miss counters share the same lock.
+    """
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self._entries = OrderedDict()  # key -> (value, expiry, size_bytes)
+        self._bytes = 0
+        self._touched = {}  # key -> thời điểm trúng L1 gần nhất, chưa ghi xuống SQLite
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expiry, size_bytes = entry
+            now = time.time()
+            if now >= expiry:
+                del self._entries[key]
+                self._bytes -= size_bytes
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self._touched[key] = now
+            return value
+
+    def take_touched(self, min_interval=0):
+        """
+        Returns {key: last hit time} for the hits not written back yet and forgets them;
+        returns {} when the previous take was less than min_interval seconds ago.
+        """
+        with self._lock:
+            now = time.time()
+            if not self._touched or now - self._last_flush < min_interval:
+                return {}
+            touched, self._touched = self._touched, {}
+            self._last_flush = now
+            return touched
+
+    def count_disk_lookup(self, hit):
+        with self._lock:
+            if hit:
+                self.disk_hits += 1
+            else:
+                self.disk_misses += 1
+
+    def put(self, key, value, expiry, size_bytes):
+        if size_bytes > self.max_bytes:
+            return
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self._bytes -= old_entry[2]
+            self._entries[key] = (value, expiry, size_bytes)
+            self._bytes += size_bytes
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def invalidate(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+    def disk_stats(self):
+        with self._lock:
+            return {'hits': self.disk_hits, 'misses': self.disk_misses}
+
+memory_cache = MemoryLRUCache(CACHE_MEMORY_MAX_ENTRIES, CACHE_MEMORY_MAX_MB * 1024 * 1024)
+
+# Mỗi thread giữ một kết nối mở lâu dài (sqlite3 không cho dùng chung kết nối giữa các thread).
+_local = threading.local()
+
+def get_connection():
+    """Return the persistent connection of the calling thread (opened on first use)."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.path != DB_PATH:
+        close_connection()
+        conn = None
+    if conn is None:
+        # isolation_level=None: mỗi lệnh tự commit, giao dịch gộp dùng transaction()
+        conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')      # Đọc và ghi đồng thời giữa các thread
+        conn.execute('PRAGMA synchronous=NORMAL')    # Đủ an toàn với WAL, ít fsync hơn
+        conn.execute('PRAGMA cache_size=-16000')     # ~16 MB page cache cho mỗi kết nối
+        conn.execute('PRAGMA temp_store=MEMORY')
+        _local.conn = conn
+        _local.path = DB_PATH
+        _local.depth = 0
+    return conn
+
+def close_connection():
+    """Close the connection of the calling thread, if any."""
+    conn = getattr(_local, 'conn', None)
+    _local.conn = None
+    if conn is not None:
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            logger.debug(f"Error closing cache connection: {e}")
+
+@contextmanager
+def transaction():
+    """
+    Group several writes into one transaction (one commit instead of one per statement).
+    Nested calls join the outer transaction.
+    """
+    conn = get_connection()
+    if _local.depth > 0:
+        _local.depth += 1
+        try:
+            yield conn
+        finally:
+            _local.depth -= 1
+        return
+
+    conn.execute('BEGIN IMMEDIATE')
+    _local.depth = 1
+    try:
+        yield conn
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    finally:
+        _local.depth = 0
+
 def init_db():
     """Initialize the SQLite database for caching."""
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection()
     cursor = conn.cursor()
     
     # Table for general API responses (search, video details)
@@ -25,11 +189,39 @@ def init_db():
         key TEXT PRIMARY KEY,
         response_json TEXT,
         timestamp REAL,
-        expiry REAL
+        expiry REAL,
+        last_access REAL,
+        size_bytes INTEGER DEFAULT 0,
+        payload BLOB,
+        codec TEXT
+    )
+    ''')
+    # Database cũ chưa có các cột phục vụ việc dọn dẹp và lưu payload nén
+    _ensure_column(conn, 'api_cache', 'last_access', 'REAL')
+    _ensure_column(conn, 'api_cache', 'size_bytes', 'INTEGER DEFAULT 0')
+    _ensure_column(conn, 'api_cache', 'payload', 'BLOB')
+    _ensure_column(conn, 'api_cache', 'codec', 'TEXT')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_api_cache_expiry ON api_cache (expiry)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_api_cache_last_access ON api_cache (last_access)')
+    
+    # Table for single videos/channels (one row per entity, with the parts it was fetched with)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS entity_cache (
+        entity_type TEXT,
+        entity_id TEXT,
+        parts TEXT,
+        data_json TEXT,
+        fetched_at REAL,
+        payload BLOB,
+        codec TEXT,
+        PRIMARY KEY (entity_type, entity_id)
     )
     ''')
+    _ensure_column(conn, 'entity_cache', 'payload', 'BLOB')
+    _ensure_column(conn, 'entity_cache', 'codec', 'TEXT')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_entity_cache_fetched_at ON entity_cache (fetched_at)')
     
-    # Table for tracking quota usage per key (optional future expansion)
+    # Table for tracking quota usage per key (api_key holds a fingerprint, not the key itself)
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS key_usage (
         api_key TEXT PRIMARY KEY,
@@ -37,27 +229,84 @@ def init_db():
         last_reset REAL
     )
     ''')
-    
-    conn.commit()
-    conn.close()
+
+def _ensure_column(conn, table, column, declaration):
+    columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+    if column not in columns:
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {declaration}')
+
+def _to_json_bytes(data):
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def _compress(raw, codec=None):
+    codec = codec or PAYLOAD_CODEC
+    if codec == 'zlib':
+        return zlib.compress(raw, 6), 'zlib'
+    return raw, 'json'
+
+def _decompress(payload, codec, legacy_json=None):
+    if payload is None:
+        return legacy_json.encode('utf-8')
+    if codec == 'zlib':
+        return zlib.decompress(payload)
+    return payload
+
+def encode_payload(data, codec=None):
+    """Serialize data as compact JSON, compressed with zlib unless codec is 'json'. Returns (blob, codec)."""
+    return _compress(_to_json_bytes(data), codec)
+
+def decode_payload(payload, codec, legacy_json=None):
+    """Inverse of encode_payload; rows written before compression only have the legacy JSON text."""
+    return json.loads(_decompress(payload, codec, legacy_json))
+
+def get_cache_stats():
+    """Hit/miss counters of the in-memory L1 and of the SQLite layer behind it."""
+    stats = {f'memory_{name}': value for name, value in memory_cache.stats().items()}
+    stats.update({f'disk_{name}': value for name, value in memory_cache.disk_stats().items()})
+    return stats
+
+def flush_access_times(min_interval=0):
+    """
+    Write the access time of L1 hits back to api_cache.last_access in one transaction,
+    so size-based eviction does not treat the hottest entries as the least recently used.
+    """
+    touched = memory_cache.take_touched(min_interval)
+    if not touched:
+        return
+    try:
+        with transaction() as conn:
+            conn.executemany(
+                'UPDATE api_cache SET last_access = MAX(COALESCE(last_access, 0), ?) WHERE key = ?',
+                [(accessed_at, key) for key, accessed_at in touched.items()]
+            )
+    except sqlite3.Error as e:
+        logger.error(f"Failed to record cache access times: {e}")
 
 def get_cache(key):
-    """Retrieve data from cache if it exists and hasn't expired."""
+    """Retrieve data from cache if it exists and hasn't expired (memory first, then SQLite)."""
+    data = memory_cache.get(key)
+    if data is not None:
+        flush_access_times(CACHE_ACCESS_FLUSH_SECONDS)
+        return data
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('SELECT response_json, expiry FROM api_cache WHERE key = ?', (key,))
+        conn = get_connection()
+        cursor = conn.execute('SELECT response_json, payload, codec, expiry FROM api_cache WHERE key = ?', (key,))
         result = cursor.fetchone()
-        conn.close()
         
         if result:
-            response_json, expiry = result
-            if time.time() < expiry:
-                return json.loads(response_json)
+            response_json, payload, codec, expiry = result
+            now = time.time()
+            if now < expiry:
+                conn.execute('UPDATE api_cache SET last_access = ? WHERE key = ?', (now, key))
+                raw = _decompress(payload, codec, response_json)
+                data = json.loads(raw)
+                memory_cache.put(key, data, expiry, len(raw))
+                memory_cache.count_disk_lookup(True)
+                return data
             else:
                 # Clean up expired entry
-                clear_cache_key(key)
-                return None
+                conn.execute('DELETE FROM api_cache WHERE key = ?', (key,))
+        memory_cache.count_disk_lookup(False)
         return None
     except Exception as e:
         logging.error(f"Cache read error: {e}")
@@ -66,39 +315,298 @@ def get_cache(key):
 def set_cache(key, data, ttl_seconds=3600):
     """Save data to cache with a Time-To-Live (TTL). Default 1 hour."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        expiry = time.time() + ttl_seconds
-        cursor.execute('''
-        INSERT OR REPLACE INTO api_cache (key, response_json, timestamp, expiry)
-        VALUES (?, ?, ?, ?)
-        ''', (key, json.dumps(data), time.time(), expiry))
-        conn.commit()
-        conn.close()
+        conn = get_connection()
+        now = time.time()
+        raw = _to_json_bytes(data)
+        payload, codec = _compress(raw)
+        conn.execute('''
+        INSERT OR REPLACE INTO api_cache (key, payload, codec, timestamp, expiry, last_access, size_bytes)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (key, payload, codec, now, now + ttl_seconds, now, len(payload)))
+        memory_cache.put(key, data, now + ttl_seconds, len(raw))
     except Exception as e:
         logging.error(f"Cache write error: {e}")
 
 def clear_cache_key(key):
     """Clear a specific cache entry by key."""
+    memory_cache.invalidate(key)
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM api_cache WHERE key = ?', (key,))
-        conn.commit()
-        conn.close()
+        get_connection().execute('DELETE FROM api_cache WHERE key = ?', (key,))
     except sqlite3.Error as e:
         logger.error(f"Failed to clear cache key '{key}': {e}")
     except Exception as e:
         logger.error(f"Unexpected error clearing cache key '{key}': {e}")
 
+def get_entities(entity_type, entity_ids, max_age_seconds):
+    """
+    Retrieve cached entities that are younger than max_age_seconds.
+    Returns {entity_id: (parts_set, item_dict, fetched_at)}.
+    """
+    entities = {}
+    if not entity_ids:
+        return entities
+    min_fetched_at = time.time() - max_age_seconds
+    ids = []
+    for entity_id in entity_ids:
+        cached_entity = memory_cache.get(('entity', entity_type, entity_id))
+        if cached_entity is not None and cached_entity[2] >= min_fetched_at:
+            entities[entity_id] = cached_entity
+        else:
+            ids.append(entity_id)
+    if not ids:
+        return entities
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        # SQLite giới hạn số tham số trong một câu lệnh, nên truy vấn theo từng nhóm
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(
+                f'SELECT entity_id, parts, data_json, payload, codec, fetched_at FROM entity_cache '
+                f'WHERE entity_type = ? AND fetched_at >= ? AND entity_id IN ({placeholders})',
+                (entity_type, min_fetched_at, *chunk)
+            )
+            for entity_id, parts, data_json, payload, codec, fetched_at in cursor.fetchall():
+                raw = _decompress(payload, codec, data_json)
+                entities[entity_id] = (set(parts.split(',')), json.loads(raw), fetched_at)
+                memory_cache.put(('entity', entity_type, entity_id), entities[entity_id],
+                                 fetched_at + max_age_seconds, len(raw))
+    except Exception as e:
+        logger.error(f"Entity cache read error: {e}")
+    return entities
+
+def set_entities(entity_type, items, parts, max_age_seconds):
+    """
+    Save API items (each with an 'id') for the given parts.
+    A still-fresh row keeps the parts not re-fetched here; fetched_at then stays the
+    oldest time among the merged parts.
+    """
+    if not items:
+        return
+    try:
+        parts = set(parts)
+        existing = get_entities(entity_type, [item['id'] for item in items], max_age_seconds)
+        now = time.time()
+        rows = []
+        for item in items:
+            row_parts, data, fetched_at = set(parts), item, now
+            if item['id'] in existing:
+                old_parts, old_data, old_fetched_at = existing[item['id']]
+                if not old_parts <= parts:
+                    row_parts |= old_parts
+                    data = {**old_data, **item}
+                    fetched_at = old_fetched_at
+            raw = _to_json_bytes(data)
+            payload, codec = _compress(raw)
+            rows.append((entity_type, item['id'], ','.join(sorted(row_parts)), payload, codec, fetched_at))
+            memory_cache.put(('entity', entity_type, item['id']), (row_parts, data, fetched_at),
+                             fetched_at + max_age_seconds, len(raw))
+
+        with transaction() as conn:
+            conn.executemany('''
+            INSERT OR REPLACE INTO entity_cache (entity_type, entity_id, parts, payload, codec, fetched_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+    except Exception as e:
+        logger.error(f"Entity cache write error: {e}")
+
+def load_key_usage(key_ids):
+    """Return {key_id: (used_quota, last_reset)} for the given key fingerprints."""
+    usage = {}
+    if not key_ids:
+        return usage
+    try:
+        key_ids = list(key_ids)
+        placeholders = ','.join('?' * len(key_ids))
+        cursor = get_connection().execute(
+            f'SELECT api_key, used_quota, last_reset FROM key_usage WHERE api_key IN ({placeholders})',
+            key_ids
+        )
+        for key_id, used_quota, last_reset in cursor.fetchall():
+            usage[key_id] = (used_quota or 0, last_reset or 0)
+    except sqlite3.Error as e:
+        logger.error(f"Failed to load key usage: {e}")
+    return usage
+
+def save_key_usage(key_id, used_quota, last_reset):
+    try:
+        get_connection().execute('''
+        INSERT OR REPLACE INTO key_usage (api_key, used_quota, last_reset)
+        VALUES (?, ?, ?)
+        ''', (key_id, used_quota, last_reset))
+    except sqlite3.Error as e:
+        logger.error(f"Failed to save key usage: {e}")
+
+def _forget_in_memory(table, key_parts):
+    """Drops rows deleted from SQLite out of the L1 too; key_parts are (key,) or (entity_type, entity_id)."""
+    for parts in key_parts:
+        memory_cache.invalidate(parts[0] if table == 'api_cache' else ('entity', *parts))
+
+def purge_expired(batch_size=500, entity_max_age_seconds=None):
+    """
+    Delete expired rows in small transactions so readers are never blocked for long.
+    Entities older than entity_max_age_seconds are removed as well. Returns the number of rows deleted.
+    """
+    deleted = 0
+    now = time.time()
+    statements = [('api_cache', 'SELECT rowid, key FROM api_cache WHERE expiry < ? LIMIT ?', now)]
+    if entity_max_age_seconds:
+        statements.append(('entity_cache', 'SELECT rowid, entity_type, entity_id FROM entity_cache '
+                                           'WHERE fetched_at < ? LIMIT ?', now - entity_max_age_seconds))
+    try:
+        for table, select_statement, threshold in statements:
+            while True:
+                with transaction() as conn:
+                    rows = conn.execute(select_statement, (threshold, batch_size)).fetchall()
+                    conn.executemany(f'DELETE FROM {table} WHERE rowid = ?', [(row[0],) for row in rows])
+                _forget_in_memory(table, [row[1:] for row in rows])
+                deleted += len(rows)
+                if len(rows) < batch_size:
+                    break
+    except sqlite3.Error as e:
+        logger.error(f"Failed to purge expired cache entries: {e}")
+    return deleted
+
+def get_cache_size_bytes():
+    """Approximate size of the cached payloads (API responses + entities)."""
+    try:
+        conn = get_connection()
+        api_bytes = conn.execute('SELECT COALESCE(SUM(size_bytes), 0) FROM api_cache').fetchone()[0]
+        entity_bytes = conn.execute(
+            'SELECT COALESCE(SUM(COALESCE(LENGTH(payload), LENGTH(data_json))), 0) FROM entity_cache'
+        ).fetchone()[0]
+        return api_bytes + entity_bytes
+    except sqlite3.Error as e:
+        logger.error(f"Failed to compute cache size: {e}")
+        return 0
+
+def enforce_max_size(max_bytes, batch_size=500):
+    """
+    Evict entries until the cache fits in max_bytes: least recently used API responses
+    first, then the oldest entities. Returns the number of rows deleted.
+    """
+    deleted = 0
+    # Các lần trúng L1 chưa ghi xuống vẫn phải được tính là vừa dùng
+    flush_access_times()
+    excess_bytes = get_cache_size_bytes() - max_bytes
+    candidates = [
+        ('api_cache', 'SELECT rowid, size_bytes, key FROM api_cache ORDER BY last_access LIMIT ?'),
+        ('entity_cache', 'SELECT rowid, COALESCE(LENGTH(payload), LENGTH(data_json)), entity_type, entity_id '
+                         'FROM entity_cache ORDER BY fetched_at LIMIT ?'),
+    ]
+    try:
+        for table, select_statement in candidates:
+            while excess_bytes > 0:
+                with transaction() as conn:
+                    rows = conn.execute(select_statement, (batch_size,)).fetchall()
+                    # Chỉ xóa đủ số dòng bù phần vượt, không xóa cả lô
+                    victims = []
+                    for row in rows:
+                        if excess_bytes <= 0:
+                            break
+                        victims.append(row)
+                        excess_bytes -= row[1] or 0
+                    conn.executemany(f'DELETE FROM {table} WHERE rowid = ?', [(row[0],) for row in victims])
+                _forget_in_memory(table, [row[2:] for row in victims])
+                deleted += len(victims)
+                if len(rows) < batch_size:
+                    break
+    except sqlite3.Error as e:
+        logger.error(f"Failed to evict cache entries: {e}")
+    if deleted:
+        logger.info(f"Cache eviction removed {deleted} entries")
+    return deleted
+
+def migrate_legacy_payloads(batch_size=500):
+    """
+    Re-encode rows stored as plain JSON text into the compressed payload column,
+    a small transaction at a time. Returns the number of rows migrated.
+    """
+    migrated = 0
+    tables = [
+        ('api_cache', 'response_json', 'key'),
+        ('entity_cache', 'data_json', 'rowid'),
+    ]
+    try:
+        for table, legacy_column, key_column in tables:
+            while True:
+                with transaction() as conn:
+                    rows = conn.execute(
+                        f'SELECT {key_column}, {legacy_column} FROM {table} '
+                        f'WHERE payload IS NULL AND {legacy_column} IS NOT NULL LIMIT ?',
+                        (batch_size,)
+                    ).fetchall()
+                    updates = []
+                    for row_key, legacy_json in rows:
+                        payload, codec = encode_payload(json.loads(legacy_json))
+                        updates.append((payload, codec, row_key))
+                    size_update = ', size_bytes = LENGTH(?1)' if table == 'api_cache' else ''
+                    conn.executemany(
+                        f'UPDATE {table} SET payload = ?1, codec = ?2, {legacy_column} = NULL{size_update} '
+                        f'WHERE {key_column} = ?3',
+                        updates
+                    )
+                migrated += len(rows)
+                if len(rows) < batch_size:
+                    break
+    except (sqlite3.Error, ValueError) as e:
+        logger.error(f"Failed to migrate cache payloads: {e}")
+    if migrated:
+        logger.info(f"Migrated {migrated} cache entries to the compressed payload format")
+    return migrated
+
+class CacheSweeper(threading.Thread):
+    """Background thread that periodically purges expired rows and enforces the size limit."""
+
+    def __init__(self, interval_seconds, max_bytes, batch_size=500, entity_max_age_seconds=None):
+        super().__init__(name="CacheSweeper", daemon=True)
+        self.interval_seconds = interval_seconds
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.entity_max_age_seconds = entity_max_age_seconds
+        self._stop_event = threading.Event()
+
+    def run(self):
+        migrate_legacy_payloads(self.batch_size)
+        while not self._stop_event.wait(self.interval_seconds):
+            purged = purge_expired(self.batch_size, self.entity_max_age_seconds)
+            if purged:
+                logger.info(f"Cache sweeper purged {purged} expired entries")
+            if self.max_bytes:
+                enforce_max_size(self.max_bytes, self.batch_size)
+        close_connection()
+
+    def stop(self):
+        self._stop_event.set()
+
+_sweeper = None
+
+def start_cache_sweeper(interval_seconds, max_bytes, batch_size=500, entity_max_age_seconds=None):
+    """Start the background sweeper once per process."""
+    global _sweeper
+    if _sweeper is None or not _sweeper.is_alive():
+        _sweeper = CacheSweeper(interval_seconds, max_bytes, batch_size, entity_max_age_seconds)
+        _sweeper.start()
+    return _sweeper
+
+def stop_cache_sweeper():
+    global _sweeper
+    if _sweeper is not None:
+        _sweeper.stop()
+        _sweeper = None
+
 def clear_all_cache():
-    """Clear all cache entries by removing the database file."""
+    """Clear all cache entries while the database stays online (quota tracking is kept)."""
+    memory_cache.clear()
     try:
-        if os.path.exists(DB_PATH):
-            os.remove(DB_PATH)
-            init_db()
-            logger.info("All cache cleared successfully")
-    except OSError as e:
+        with transaction() as conn:
+            conn.execute('DELETE FROM api_cache')
+            conn.execute('DELETE FROM entity_cache')
+        # Thu gọn file WAL sau khi xóa hàng loạt
+        get_connection().execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        logger.info("All cache cleared successfully")
+    except sqlite3.Error as e:
         logger.error(f"Failed to clear cache database: {e}")
     except Exception as e:
         logger.error(f"Unexpected error clearing all cache: {e}")
@@ -17,9 +17,15 @@ logger = logging.getLogger(__name__)
 
 from config import (
     APP_NAME, ORGANIZATION_NAME, CONFIG_API_KEY,
-    YOUTUBE_REGION_LANGUAGE_MAP, UPLOAD_DATE_OPTIONS_DESC
+    YOUTUBE_REGION_LANGUAGE_MAP, UPLOAD_DATE_OPTIONS_DESC,
+    CACHE_MAX_SIZE_MB, CACHE_SWEEP_INTERVAL_SECONDS, CACHE_SWEEP_BATCH_SIZE,
+    ENTITY_CACHE_TTL_SECONDS
 )
 from utils import extract_video_id_from_url
+from db_cache import init_db, start_cache_sweeper
+from services.local_corpus import init_corpus, start_corpus_backfill
+from services.channel_sync import init_channel_sync
+from services.channel_resolver import init_channel_resolver
 
 from ui_tabs.tab_api_key import ApiKeyTab
 from ui_tabs.tab_keyword_research import KeywordResearchTab
@@ -153,15 +159,15 @@ class YouTubeToolApp(QMainWindow):
 
         try:
 
-            from services.api_manager import APIKeyManager
+            from services.api_manager import APIKeyManager, YouTubeService
             APIKeyManager.set_api_keys(self.api_key) # Update keys in manager
             try:
-                youtube_service = APIKeyManager.get_service()
+                APIKeyManager.get_service()
             except ValueError:
                  self.statusBar().showMessage("Không thể khởi tạo dịch vụ YouTube (Key lỗi).", 3000)
                  return
-            if not youtube_service:
-                 raise Exception("Không thể khởi tạo dịch vụ YouTube.")
+            # Danh mục gần như không đổi nên được phục vụ từ cache (TTL dài)
+            youtube_service = YouTubeService()
             region_codes_to_try = ['US', 'VN', 'GB'] 
             response = None
             last_error = None
@@ -171,9 +177,9 @@ class YouTubeToolApp(QMainWindow):
                     self.statusBar().showMessage("Hủy tải danh mục.", 2000)
                     return
                 try:
-                    response = youtube_service.videoCategories().list(
+                    response = youtube_service.get_video_categories(
                         part='snippet', regionCode=region_code
-                    ).execute()
+                    )
                     if response and response.get('items'):
                         break
                 except HttpError as e:
@@ -423,6 +429,17 @@ if __name__ == '__main__':
     # Initialize logging system first
     log_file = setup_logging()
     logger.info("Application starting...")
+    init_db()
+    init_channel_sync()
+    init_channel_resolver()
+    if init_corpus():
+        start_corpus_backfill()
+    start_cache_sweeper(
+        CACHE_SWEEP_INTERVAL_SECONDS,
+        CACHE_MAX_SIZE_MB * 1024 * 1024,
+        CACHE_SWEEP_BATCH_SIZE,
+        entity_max_age_seconds=max(ENTITY_CACHE_TTL_SECONDS.values())
+    )
     
     app = QApplication(sys.argv)
     app.setOrganizationName(ORGANIZATION_NAME)
@@ -1,7 +1,17 @@
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
 from googleapiclient.errors import HttpError
 import threading
 import logging
+import hashlib
+import json
+
+from config import (
+    API_CACHE_TTL_SECONDS, API_CACHE_DEFAULT_TTL_SECONDS, API_MAX_INFLIGHT_PER_KEY, API_BATCH_MAX_PARTS
+)
+from db_cache import get_cache, set_cache
+from services.entity_cache import EntityCache, MAX_IDS_PER_REQUEST
+from services.quota_scheduler import QuotaScheduler, quota_cost
+from services.fetch_executor import get_fetch_executor
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +20,16 @@ class APIKeyManager:
     _lock = threading.Lock()
     _api_keys = []
     _current_key_index = 0
+    # Pool service theo từng thread (httplib2 không thread-safe) và theo từng key.
+    # _pool_generation tăng mỗi khi danh sách key thay đổi để các thread tự bỏ pool cũ.
+    _thread_local = threading.local()
+    _pool_generation = 0
+    _discovery_document = None
+    # Quota đã dùng của từng key trong ngày (lưu ở bảng key_usage)
+    _quota = QuotaScheduler()
+    # Số request đang chạy trên từng key (giới hạn API_MAX_INFLIGHT_PER_KEY)
+    _inflight = {}
+    _inflight_condition = threading.Condition()
 
     def __new__(cls):
         with cls._lock:
@@ -26,6 +46,9 @@ class APIKeyManager:
             else:
                 cls._api_keys = [key.strip() for key in api_key_string.splitlines() if key.strip()]
             cls._current_key_index = 0
+            cls._pool_generation += 1
+            api_keys = list(cls._api_keys)
+        cls._quota.load_keys(api_keys)
 
     @classmethod
     def get_current_key(cls):
@@ -48,77 +71,354 @@ class APIKeyManager:
             # Logic "hết keys" nên được xử lý bởi người gọi nếu cần đếm số lần rotate.
             return True
 
+    @classmethod
+    def acquire_key(cls, cost, exclude=()):
+        """
+        Reserves a request slot on the key with the most remaining daily quota that is below
+        its in-flight limit (waits while every usable key is busy). Returns None when no key
+        can be used. Every acquired key must be given back with release_key().
+        """
+        ranked_keys = cls._quota.rank_keys(cost, exclude)
+        if not ranked_keys:
+            return None
+        with cls._inflight_condition:
+            while True:
+                for key in ranked_keys:
+                    if cls._inflight.get(key, 0) < API_MAX_INFLIGHT_PER_KEY:
+                        cls._inflight[key] = cls._inflight.get(key, 0) + 1
+                        return key
+                cls._inflight_condition.wait()
+
+    @classmethod
+    def release_key(cls, key):
+        with cls._inflight_condition:
+            cls._inflight[key] = max(0, cls._inflight.get(key, 0) - 1)
+            cls._inflight_condition.notify_all()
+
+    @classmethod
+    def charge_key(cls, key, cost):
+        """Records `cost` quota units spent by `key`."""
+        cls._quota.charge(key, cost)
+
+    @classmethod
+    def mark_key_exhausted(cls, key):
+        cls._quota.mark_exhausted(key)
+
+    @classmethod
+    def get_remaining_quota(cls):
+        """Returns {key: remaining units today} (local estimate)."""
+        return cls._quota.remaining_by_key()
+
     @classmethod
     def get_service(cls):
-        """Builds and returns a YouTube service using the current key. Rotates if necessary (manual retry needed)."""
+        """Returns a pooled YouTube service for the current key. Rotates if necessary (manual retry needed)."""
         key = cls.get_current_key()
         if not key:
             raise ValueError("No API keys configured.")
-        return build('youtube', 'v3', developerKey=key)
+        return cls.get_service_for_key(key)
+
+    @classmethod
+    def get_service_for_key(cls, key):
+        """
+        Returns the YouTube service of the calling thread for the given key.
+        The service is built once per (thread, key) and reused for every later call.
+        """
+        pool = getattr(cls._thread_local, 'services', None)
+        if pool is None or getattr(cls._thread_local, 'generation', None) != cls._pool_generation:
+            pool = {}
+            cls._thread_local.services = pool
+            cls._thread_local.generation = cls._pool_generation
+
+        service = pool.get(key)
+        if service is None:
+            service = cls._build_service(key)
+            pool[key] = service
+        return service
+
+    @classmethod
+    def _get_discovery_document(cls):
+        """Loads the static discovery document bundled with google-api-python-client (once per process)."""
+        if cls._discovery_document is None:
+            with cls._lock:
+                if cls._discovery_document is None:
+                    try:
+                        from googleapiclient.discovery_cache import get_static_doc
+                        cls._discovery_document = get_static_doc('youtube', 'v3') or ''
+                    except ImportError:
+                        cls._discovery_document = ''
+        return cls._discovery_document
+
+    @classmethod
+    def _build_service(cls, key):
+        document = cls._get_discovery_document()
+        if document:
+            return build_from_document(document, developerKey=key)
+        # Phiên bản thư viện cũ không có tài liệu tĩnh: dùng discovery thông thường
+        return build('youtube', 'v3', developerKey=key, cache_discovery=False)
 
 class YouTubeService:
-    """Wrapper class to handle API calls with automatic key rotation."""
+    """
+    Wrapper class to handle API calls with automatic key rotation.
+    Responses are served read-through from db_cache using the TTL configured per endpoint
+    (config.API_CACHE_TTL_SECONDS). use_cache=False bypasses the cache entirely,
+    refresh_cache=True skips cached reads but still stores the fresh responses.
+    """
     
-    def __init__(self):
+    def __init__(self, use_cache=True, refresh_cache=False):
         self.manager = APIKeyManager()
+        self.use_cache = use_cache
+        self.refresh_cache = refresh_cache
+        self.video_cache = EntityCache('video')
+        self.channel_cache = EntityCache('channel')
 
     def search_videos(self, **kwargs):
         """Executes a search().list() call with automatic error handling and key rotation."""
-        return self._execute_with_rotation(
+        return self._execute_cached(
+            'search.list', kwargs,
             lambda service: service.search().list(**kwargs)
         )
     
     def get_video_details(self, **kwargs):
         """Executes a videos().list() call."""
-        return self._execute_with_rotation(
+        return self._execute_cached(
+            'videos.list', kwargs,
             lambda service: service.videos().list(**kwargs)
         )
         
     def get_channel_details(self, **kwargs):
         """Executes a channels().list() call."""
-        return self._execute_with_rotation(
+        return self._execute_cached(
+            'channels.list', kwargs,
             lambda service: service.channels().list(**kwargs)
         )
 
     def get_playlist_items(self, **kwargs):
         """Executes a playlistItems().list() call."""
-        return self._execute_with_rotation(
+        return self._execute_cached(
+            'playlistItems.list', kwargs,
             lambda service: service.playlistItems().list(**kwargs)
         )
     
     def get_comment_threads(self, **kwargs):
         """Executes a commentThreads().list() call."""
-        return self._execute_with_rotation(
+        return self._execute_cached(
+            'commentThreads.list', kwargs,
             lambda service: service.commentThreads().list(**kwargs)
         )
 
-    def _execute_with_rotation(self, api_call_lambda):
+    def get_video_categories(self, **kwargs):
+        """Executes a videoCategories().list() call."""
+        return self._execute_cached(
+            'videoCategories.list', kwargs,
+            lambda service: service.videoCategories().list(**kwargs)
+        )
+
+    def get_videos_by_ids(self, video_ids, part, progress_callback=None, is_cancelled=None):
+        """
+        Returns videos().list items for video_ids (deduplicated, in order).
+        Only the ids missing from the entity cache are requested, 50 per call.
+        """
+        return self._get_entities_by_ids(
+            self.video_cache, 'videos.list', video_ids, part,
+            lambda service, chunk_ids: service.videos().list(part=part, id=','.join(chunk_ids), maxResults=50),
+            progress_callback, is_cancelled
+        )
+
+    def get_channels_by_ids(self, channel_ids, part, progress_callback=None, is_cancelled=None):
+        """Same as get_videos_by_ids for channels().list."""
+        return self._get_entities_by_ids(
+            self.channel_cache, 'channels.list', channel_ids, part,
+            lambda service, chunk_ids: service.channels().list(part=part, id=','.join(chunk_ids), maxResults=50),
+            progress_callback, is_cancelled
+        )
+
+    def get_video_details_batch(self, video_ids, part, progress_callback=None, is_cancelled=None):
+        """
+        Same as get_videos_by_ids, but up to API_BATCH_MAX_PARTS requests of 50 ids are sent
+        together in one HTTP batch (one connection for 500 videos instead of 10).
+        """
+        return self._get_entities_by_ids(
+            self.video_cache, 'videos.list', video_ids, part,
+            lambda service, chunk_ids: service.videos().list(part=part, id=','.join(chunk_ids), maxResults=50),
+            progress_callback, is_cancelled, use_batch=True
+        )
+
+    def get_channel_details_batch(self, channel_ids, part, progress_callback=None, is_cancelled=None):
+        """Same as get_video_details_batch for channels().list."""
+        return self._get_entities_by_ids(
+            self.channel_cache, 'channels.list', channel_ids, part,
+            lambda service, chunk_ids: service.channels().list(part=part, id=','.join(chunk_ids), maxResults=50),
+            progress_callback, is_cancelled, use_batch=True
+        )
+
+    def _get_entities_by_ids(self, entity_cache, endpoint, entity_ids, part, build_request,
+                             progress_callback=None, is_cancelled=None, use_batch=False):
+        def fetch_chunk(chunk_ids):
+            response = self._execute_with_rotation(lambda service: build_request(service, chunk_ids), endpoint)
+            return response.get('items', [])
+
+        def fetch_batch(batch_ids):
+            chunks = [batch_ids[i:i + MAX_IDS_PER_REQUEST] for i in range(0, len(batch_ids), MAX_IDS_PER_REQUEST)]
+            if len(chunks) == 1:
+                return fetch_chunk(chunks[0])
+            responses = self._execute_batch_with_rotation(
+                [lambda service, chunk_ids=chunk_ids: build_request(service, chunk_ids) for chunk_ids in chunks],
+                endpoint
+            )
+            return [item for response in responses for item in response.get('items', [])]
+
+        return entity_cache.fetch_missing(
+            entity_ids, part, fetch_batch if use_batch else fetch_chunk,
+            use_cached=self.use_cache and not self.refresh_cache,
+            store_results=self.use_cache,
+            progress_callback=progress_callback,
+            is_cancelled=is_cancelled,
+            executor=get_fetch_executor(),
+            ids_per_call=MAX_IDS_PER_REQUEST * API_BATCH_MAX_PARTS if use_batch else MAX_IDS_PER_REQUEST
+        )
+
+    @staticmethod
+    def make_cache_key(endpoint, params):
+        """Builds a stable cache key from the endpoint name and its normalized parameters."""
+        normalized = {name: str(value) for name, value in params.items() if value is not None}
+        raw = json.dumps([endpoint, normalized], sort_keys=True, ensure_ascii=False)
+        return f"{endpoint}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+    def cached_response(self, endpoint, params):
+        """
+        The cached response of this call, or None when it would reach the API (and cost quota).
+        Lets callers with their own spend cap charge it only for real calls.
+        """
+        if not self.use_cache or self.refresh_cache or API_CACHE_TTL_SECONDS.get(endpoint, API_CACHE_DEFAULT_TTL_SECONDS) <= 0:
+            return None
+        return get_cache(self.make_cache_key(endpoint, params))
+
+    def _execute_cached(self, endpoint, params, api_call_lambda):
+        ttl_seconds = API_CACHE_TTL_SECONDS.get(endpoint, API_CACHE_DEFAULT_TTL_SECONDS)
+        if not self.use_cache or ttl_seconds <= 0:
+            return self._execute_with_rotation(api_call_lambda, endpoint)
+
+        cached_response = self.cached_response(endpoint, params)
+        if cached_response is not None:
+            logger.debug(f"Cache hit: {endpoint}")
+            return cached_response
+
+        response = self._execute_with_rotation(api_call_lambda, endpoint)
+        set_cache(self.make_cache_key(endpoint, params), response, ttl_seconds)
+        return response
+
+    def _execute_with_rotation(self, api_call_lambda, endpoint=None):
         """
         Helper method to execute an API call.
-        If a quota error (403) occurs, it rotates the key and retries.
+        Each attempt uses the key with the most remaining quota and charges it the
+        endpoint's unit cost. If a quota error (403) occurs, that key is skipped
+        until the next quota reset and the call is retried with another key.
         """
+        cost = quota_cost(endpoint)
+        tried_keys = set()
+        last_quota_error = None
+
         # Thử tối đa số lần bằng số lượng keys
         max_retries = len(self.manager._api_keys) if self.manager._api_keys else 1
-        
         for attempt in range(max_retries):
+            key = self.manager.acquire_key(cost, exclude=tried_keys)
+            if key is None:
+                if not self.manager._api_keys:
+                    raise ValueError("No API keys configured.")
+                break
+            tried_keys.add(key)
             try:
-                service = self.manager.get_service()
-                request = api_call_lambda(service)
-                response = request.execute()
+                service = self.manager.get_service_for_key(key)
+                response = api_call_lambda(service).execute()
+                self.manager.charge_key(key, cost)
                 return response
             except HttpError as e:
-                if e.resp.status == 403:
-                    error_content = e.content.decode('utf-8')
-                    if "quotaExceeded" in error_content or "dailyLimitExceeded" in error_content:
-                        logger.info(f"Key {self.manager.get_current_key()[:10]}... hết hạn mức. Đang đổi key...")
-                        if not self.manager.rotate_key():
-                            # Nếu chỉ có 1 key hoặc rotate thất bại
-                            raise e 
-                    else:
-                        raise e # Lỗi 403 khác (vd: cấm truy cập)
-                else:
-                    raise e # Lỗi khác (400, 404, 500...)
-            except Exception as e:
+                if self._is_quota_error(e):
+                    logger.info(f"Key {key[:10]}... hết hạn mức. Đang đổi key...")
+                    self.manager.mark_key_exhausted(key)
+                    last_quota_error = e
+                    continue
+                # Lỗi khác (400, 404, 500, 403 cấm truy cập...) vẫn bị tính quota
+                self.manager.charge_key(key, cost)
                 raise e
+            finally:
+                self.manager.release_key(key)
         
+        if last_quota_error is not None:
+            raise last_quota_error
         raise Exception("Đã thử tất cả API Keys nhưng đều thất bại (Hết quota).")
+
+    def _execute_batch_with_rotation(self, api_call_lambdas, endpoint=None):
+        """
+        Sends several API calls in one HTTP batch and returns their responses in order.
+        Every part is charged the endpoint's unit cost. Parts that fail with a quota error
+        are sent again in a new batch on another key; any other part error is raised
+        once the batch has been processed.
+        """
+        cost = quota_cost(endpoint)
+        responses = [None] * len(api_call_lambdas)
+        pending = list(range(len(api_call_lambdas)))
+        tried_keys = set()
+        last_quota_error = None
+
+        max_retries = len(self.manager._api_keys) if self.manager._api_keys else 1
+        for attempt in range(max_retries):
+            key = self.manager.acquire_key(cost * len(pending), exclude=tried_keys)
+            if key is None:
+                if not self.manager._api_keys:
+                    raise ValueError("No API keys configured.")
+                break
+            tried_keys.add(key)
+            quota_failed = []
+            part_errors = []
+
+            def on_part_done(request_id, response, exception):
+                nonlocal last_quota_error
+                index = int(request_id)
+                if exception is None:
+                    responses[index] = response
+                elif isinstance(exception, HttpError) and self._is_quota_error(exception):
+                    quota_failed.append(index)
+                    last_quota_error = exception
+                else:
+                    part_errors.append(exception)
+
+            try:
+                service = self.manager.get_service_for_key(key)
+                batch = service.new_batch_http_request(callback=on_part_done)
+                for index in pending:
+                    batch.add(api_call_lambdas[index](service), request_id=str(index))
+                batch.execute()
+            except HttpError as e:
+                # Cả batch bị từ chối (không có phản hồi riêng cho từng phần)
+                if self._is_quota_error(e):
+                    logger.info(f"Key {key[:10]}... hết hạn mức. Đang đổi key...")
+                    self.manager.mark_key_exhausted(key)
+                    last_quota_error = e
+                    continue
+                self.manager.charge_key(key, cost * len(pending))
+                raise e
+            finally:
+                self.manager.release_key(key)
+
+            charged_parts = len(pending) - len(quota_failed)
+            if charged_parts:
+                self.manager.charge_key(key, cost * charged_parts)
+            if part_errors:
+                raise part_errors[0]
+            if not quota_failed:
+                return responses
+            logger.info(f"Key {key[:10]}... hết hạn mức giữa batch, gửi lại {len(quota_failed)} phần bằng key khác...")
+            self.manager.mark_key_exhausted(key)
+            pending = sorted(quota_failed)
+
+        if last_quota_error is not None:
+            raise last_quota_error
+        raise Exception("Đã thử tất cả API Keys nhưng đều thất bại (Hết quota).")
+
+    @staticmethod
+    def _is_quota_error(error):
+        if error.resp.status != 403:
+            return False
+        error_content = error.content.decode('utf-8')
+        return "quotaExceeded" in error_content or "dailyLimitExceeded" in error_content
@@ -0,0 +1,156 @@
+"""
+Bộ nhớ lâu dài cho việc phân giải URL/handle kênh -> channel ID (UC...).
+yt-dlp mất vài giây cho mỗi @handle, /c/ hoặc /user/, trong khi danh sách kênh gần như giống nhau
+mỗi ngày, nên kết quả được lưu theo dạng chuẩn hóa của input (bảng channel_url_map) với TTL dài.
+Một danh sách dán vào được tra cache bằng một truy vấn; chỉ phần còn thiếu mới gọi yt-dlp, song song.
+"""
+import logging
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import unquote
+
+from config import CHANNEL_RESOLVE_TTL_SECONDS, CHANNEL_RESOLVE_MAX_WORKERS
+from db_cache import get_connection, transaction
+from utils import extract_channel_id_yt_dlp
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_ID_PATTERN = re.compile(r'(?:^|/channel/)(UC[\w-]{22})(?:$|[/?#])')
+_NAMED_CHANNEL_PATTERN = re.compile(r'^(@[^/?#\s]+|c/[^/?#\s]+|user/[^/?#\s]+)', re.IGNORECASE)
+_URL_PREFIX_PATTERN = re.compile(r'^(?:https?://)?(?:www\.|m\.)?youtube\.com/', re.IGNORECASE)
+
+
+def init_channel_resolver():
+    """Creates the input -> channel id table."""
+    get_connection().execute('''
+    CREATE TABLE IF NOT EXISTS channel_url_map (
+        input_key TEXT PRIMARY KEY,
+        channel_id TEXT,
+        resolved_at REAL
+    )
+    ''')
+
+
+def channel_id_from_input(text):
+    """The channel id written in the input itself (UC... id or /channel/ URL), or None."""
+    match = CHANNEL_ID_PATTERN.search(text.strip())
+    return match.group(1) if match else None
+
+
+def normalize_channel_input(text):
+    """
+    Cache key of a channel URL/handle: '@handle', 'c/name' or 'user/name' (lower-cased, without
+    scheme, host, tab path like /videos or query), so different spellings of one channel share a key.
+    """
+    text = text.strip()
+    path = _URL_PREFIX_PATTERN.sub('', text)
+    match = _NAMED_CHANNEL_PATTERN.match(path)
+    if match:
+        return unquote(match.group(1)).lower()
+    return re.sub(r'^(?:https?://)?(?:www\.|m\.)?', '', text, flags=re.IGNORECASE).split('?')[0].split('#')[0].rstrip('/').lower()
+
+
+def lookup_channel_ids(inputs, max_age_seconds=CHANNEL_RESOLVE_TTL_SECONDS):
+    """{input: channel_id} for the inputs known without any network call (direct ids or cached)."""
+    found = {}
+    keys_by_input = {}
+    for text in inputs:
+        channel_id = channel_id_from_input(text)
+        if channel_id:
+            found[text] = channel_id
+        else:
+            keys_by_input[text] = normalize_channel_input(text)
+    if not keys_by_input:
+        return found
+
+    keys = list(set(keys_by_input.values()))
+    cached = {}
+    try:
+        conn = get_connection()
+        min_resolved_at = time.time() - max_age_seconds
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            cached.update(conn.execute(
+                f'SELECT input_key, channel_id FROM channel_url_map '
+                f'WHERE input_key IN ({placeholders}) AND resolved_at >= ?', chunk + [min_resolved_at]
+            ))
+    except sqlite3.Error as e:
+        logger.error(f"Channel resolver read error: {e}")
+    for text, key in keys_by_input.items():
+        if key in cached:
+            found[text] = cached[key]
+    return found
+
+
+def remember_channel_ids(resolved):
+    """Stores {input: channel_id} pairs under their normalized keys."""
+    now = time.time()
+    rows = [
+        (normalize_channel_input(text), channel_id, now)
+        for text, channel_id in resolved.items()
+        if channel_id and not channel_id_from_input(text)
+    ]
+    if not rows:
+        return
+    try:
+        with transaction() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO channel_url_map (input_key, channel_id, resolved_at) VALUES (?, ?, ?)', rows
+            )
+    except sqlite3.Error as e:
+        logger.error(f"Channel resolver write error: {e}")
+
+
+def resolve_channel_ids(inputs, max_workers=CHANNEL_RESOLVE_MAX_WORKERS, progress_callback=None, is_cancelled=None):
+    """
+    Resolves a list of channel URLs/handles/ids. Cached and direct ids are answered from one
+    lookup; the rest go through yt-dlp on max_workers threads and are remembered as they succeed.
+    Returns {input: (channel_id, error_message)} like extract_channel_id_yt_dlp (failures are not
+    cached); inputs left unresolved when is_cancelled() turns true are missing from the result.
+    progress_callback(done, total) counts every input.
+    """
+    inputs = list(dict.fromkeys(text.strip() for text in inputs if text and text.strip()))
+    results = {text: (channel_id, None) for text, channel_id in lookup_channel_ids(inputs).items()}
+    total = len(inputs)
+    if progress_callback:
+        progress_callback(len(results), total)
+
+    # Các input cùng khóa chuẩn hóa chỉ cần phân giải một lần
+    pending = {}
+    for text in inputs:
+        if text not in results:
+            pending.setdefault(normalize_channel_input(text), []).append(text)
+    if not pending:
+        return results
+    logger.info(f"Phân giải kênh: {len(results)}/{total} có sẵn, {len(pending)} cần gọi yt-dlp")
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending))), thread_name_prefix="channel-resolve")
+    try:
+        futures = {pool.submit(extract_channel_id_yt_dlp, texts[0]): texts for texts in pending.values()}
+        for future in as_completed(futures):
+            if is_cancelled and is_cancelled():
+                break
+            texts = futures[future]
+            try:
+                channel_id, error = future.result()
+            except Exception as e:
+                channel_id, error = None, str(e)
+            for text in texts:
+                results[text] = (channel_id, error)
+            if channel_id:
+                remember_channel_ids({texts[0]: channel_id})
+            if progress_callback:
+                progress_callback(len(results), total)
+    finally:
+        pool.shutdown(wait=not (is_cancelled and is_cancelled()), cancel_futures=True)
+    return results
+
+
+def resolve_channel_id(text):
+    """Single-input resolve_channel_ids; returns (channel_id, error_message)."""
+    if not text or not text.strip():
+        return None, "Url trống"
+    return resolve_channel_ids([text]).get(text.strip(), (None, "Đã hủy"))
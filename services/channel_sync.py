@@ -0,0 +1,453 @@
+"""
+Đồng bộ tăng dần video tải lên của kênh.
+Mỗi kênh có một con trỏ đồng bộ (video mới nhất đã thấy và thời điểm đăng) và một kho video cục bộ.
+Playlist uploads xếp video mới nhất trước, nên các lần đồng bộ sau chỉ phân trang tới khi gặp video
+đã biết, lấy chi tiết cho video mới và làm mới số liệu của một cửa sổ video gần đây;
+video cũ hơn dùng bản đã lưu. Giới hạn "N ngày gần đây" / "N video mới nhất" cũng dừng phân trang sớm.
+Con trỏ là video mới nhất của đoạn liên tục trong kho (history_complete = đoạn đó đã tới video cũ nhất).
+Một lần đồng bộ bị giới hạn dừng trước khi nối được vào đoạn đó thì vẫn lưu video đã lấy nhưng giữ nguyên
+con trỏ, nên lần sau phân trang tiếp qua các video này tới con trỏ và lấp khoảng trống ở giữa.
+
+Dữ liệu chảy qua các generator: mỗi trang playlist chỉ giữ lại videoId, ID được lấy chi tiết theo lô
+ngay khi đủ một lô và ghi xuống kho thành các cột gọn (không lưu JSON thô); kết quả được đọc lại
+từng dòng thành ChannelVideo (__slots__), nên bộ nhớ không tăng theo số video của kênh.
+"""
+import logging
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+from config import CHANNEL_SYNC_REFRESH_RECENT, API_BATCH_MAX_PARTS
+from db_cache import get_connection, transaction
+from services.api_manager import YouTubeService
+from services.deep_search import parse_rfc3339
+from services.entity_cache import MAX_IDS_PER_REQUEST
+
+logger = logging.getLogger(__name__)
+
+PLAYLIST_PAGE_SIZE = 50
+# Số ID lấy chi tiết mỗi lần: đúng một HTTP batch của get_video_details_batch
+ENRICH_CHUNK_SIZE = MAX_IDS_PER_REQUEST * API_BATCH_MAX_PARTS
+
+_VIDEO_COLUMNS = 'video_id, title, published_at, view_count, comment_count, duration, category_id'
+
+
+class ChannelVideo:
+    """One stored upload with only the fields the channel table needs (unknown counts are None)."""
+    __slots__ = ('video_id', 'title', 'published_at', 'view_count', 'comment_count', 'duration', 'category_id')
+
+    def __init__(self, video_id, title, published_at, view_count, comment_count, duration, category_id):
+        self.video_id = video_id
+        self.title = title
+        self.published_at = published_at  # epoch giây
+        self.view_count = view_count
+        self.comment_count = comment_count
+        self.duration = duration  # ISO 8601, ví dụ PT4M13S
+        self.category_id = category_id
+
+    @classmethod
+    def from_item(cls, item):
+        """Compact record of a videos.list item (snippet, statistics, contentDetails)."""
+        snippet = item.get('snippet', {})
+        statistics = item.get('statistics', {})
+        return cls(
+            item['id'],
+            snippet.get('title'),
+            _epoch_or_none(snippet.get('publishedAt')),
+            _int_or_none(statistics.get('viewCount')),
+            _int_or_none(statistics.get('commentCount')),
+            item.get('contentDetails', {}).get('duration'),
+            snippet.get('categoryId'),
+        )
+
+    def published_iso(self):
+        """publishedAt in the API's RFC 3339 form, or '' when unknown."""
+        if self.published_at is None:
+            return ''
+        return datetime.fromtimestamp(self.published_at, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def init_channel_sync():
+    """Creates the sync cursor and per-channel video tables."""
+    get_connection().executescript('''
+    CREATE TABLE IF NOT EXISTS channel_sync_state (
+        channel_id TEXT PRIMARY KEY,
+        uploads_playlist_id TEXT,
+        last_video_id TEXT,
+        last_published_at INTEGER,
+        video_count INTEGER,
+        history_complete INTEGER DEFAULT 0,
+        synced_at REAL
+    );
+    CREATE TABLE IF NOT EXISTS channel_videos (
+        channel_id TEXT,
+        video_id TEXT,
+        title TEXT,
+        published_at INTEGER,
+        view_count INTEGER,
+        comment_count INTEGER,
+        duration TEXT,
+        category_id TEXT,
+        fetched_at REAL,
+        PRIMARY KEY (channel_id, video_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_channel_videos_published ON channel_videos (channel_id, published_at);
+    ''')
+
+
+def _int_or_none(value):
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _epoch_or_none(value):
+    if not value:
+        return None
+    try:
+        return int(parse_rfc3339(value).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def get_cursor(channel_id):
+    """The sync cursor of a channel as a dict, or None if it was never synced."""
+    try:
+        row = get_connection().execute(
+            'SELECT uploads_playlist_id, last_video_id, last_published_at, video_count, history_complete, synced_at, '
+            '(SELECT MIN(published_at) FROM channel_videos WHERE channel_id = ?) '
+            'FROM channel_sync_state WHERE channel_id = ?', (channel_id, channel_id)
+        ).fetchone()
+    except sqlite3.Error as e:
+        logger.error(f"Channel sync read error: {e}")
+        return None
+    if row is None:
+        return None
+    return {
+        'uploads_playlist_id': row[0],
+        'last_video_id': row[1],
+        'last_published_at': row[2],
+        'video_count': row[3],
+        'history_complete': bool(row[4]),
+        'synced_at': row[5],
+        'oldest_published_at': row[6],
+    }
+
+
+def synced_channel_ids(channel_ids):
+    """The subset of channel_ids that already have a sync cursor."""
+    channel_ids = list(set(channel_ids))
+    synced = set()
+    try:
+        conn = get_connection()
+        for i in range(0, len(channel_ids), 500):
+            chunk = channel_ids[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            synced.update(row[0] for row in conn.execute(
+                f'SELECT channel_id FROM channel_sync_state WHERE channel_id IN ({placeholders})', chunk
+            ))
+    except sqlite3.Error as e:
+        logger.error(f"Channel sync read error: {e}")
+    return synced
+
+
+def _stored_video_ids(channel_id, limit=None, published_after=None):
+    """Stored video ids of a channel, newest first, optionally only those published_after (epoch)."""
+    query = 'SELECT video_id FROM channel_videos WHERE channel_id = ?'
+    params = (channel_id,)
+    if published_after is not None:
+        query += ' AND published_at >= ?'
+        params += (published_after,)
+    query += ' ORDER BY published_at DESC'
+    if limit is not None:
+        query += ' LIMIT ?'
+        params += (limit,)
+    return [row[0] for row in get_connection().execute(query, params)]
+
+
+def iter_channel_videos(channel_id, published_after=None, limit=None):
+    """
+    Yields the stored ChannelVideo records of a channel, newest first, optionally
+    published_after (epoch) / at most limit. Rows are read from the cursor one at a time.
+    """
+    query = f'SELECT {_VIDEO_COLUMNS} FROM channel_videos WHERE channel_id = ?'
+    params = (channel_id,)
+    if published_after is not None:
+        query += ' AND published_at >= ?'
+        params += (published_after,)
+    query += ' ORDER BY published_at DESC'
+    if limit is not None:
+        query += ' LIMIT ?'
+        params += (limit,)
+    for row in get_connection().execute(query, params):
+        yield ChannelVideo(*row)
+
+
+def store_channel_videos(channel_id, videos):
+    """Upserts ChannelVideo records into the channel's store."""
+    now = time.time()
+    with transaction() as conn:
+        conn.executemany(f'''
+        INSERT OR REPLACE INTO channel_videos (channel_id, {_VIDEO_COLUMNS}, fetched_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (channel_id, video.video_id, video.title, video.published_at, video.view_count,
+             video.comment_count, video.duration, video.category_id, now)
+            for video in videos
+        ])
+
+
+def finish_sync(channel_id, uploads_playlist_id, keep_only_ids=None, history_complete=False, advance_cursor=True):
+    """
+    Moves the cursor to the newest stored video, or keeps it where it was when advance_cursor is
+    False (the videos stored this time are not contiguous with it yet). keep_only_ids (a full sync)
+    also drops videos no longer in the playlist; history_complete marks that the store now reaches
+    the channel's oldest upload.
+    """
+    with transaction() as conn:
+        if keep_only_ids is not None:
+            stale_ids = set(_stored_video_ids(channel_id)) - set(keep_only_ids)
+            conn.executemany(
+                'DELETE FROM channel_videos WHERE channel_id = ? AND video_id = ?',
+                [(channel_id, video_id) for video_id in stale_ids]
+            )
+        newest = conn.execute(
+            'SELECT video_id, published_at FROM channel_videos WHERE channel_id = ? '
+            'ORDER BY published_at DESC LIMIT 1', (channel_id,)
+        ).fetchone()
+        video_count = conn.execute(
+            'SELECT COUNT(*) FROM channel_videos WHERE channel_id = ?', (channel_id,)
+        ).fetchone()[0]
+        previous = conn.execute(
+            'SELECT history_complete, last_video_id, last_published_at FROM channel_sync_state WHERE channel_id = ?',
+            (channel_id,)
+        ).fetchone()
+        history_complete = history_complete or bool(previous and previous[0])
+        if not advance_cursor and previous:
+            newest = previous[1:]
+        conn.execute('''
+        INSERT OR REPLACE INTO channel_sync_state
+            (channel_id, uploads_playlist_id, last_video_id, last_published_at, video_count, history_complete, synced_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (channel_id, uploads_playlist_id, newest[0] if newest else None,
+              newest[1] if newest else None, video_count, int(history_complete), time.time()))
+
+
+def _playlist_video(item):
+    """(video_id, published epoch) of a playlistItems item, or None when it is not a video."""
+    snippet = item.get('snippet', {})
+    resource = snippet.get('resourceId', {})
+    if resource.get('kind') != 'youtube#video' or not resource.get('videoId'):
+        return None
+    published = item.get('contentDetails', {}).get('videoPublishedAt') or snippet.get('publishedAt')
+    return resource['videoId'], _epoch_or_none(published)
+
+
+def _store_covers(cursor, published_after, max_videos):
+    """Whether the stored prefix of the playlist already reaches back as far as the request needs."""
+    if cursor['history_complete']:
+        return True
+    if published_after is not None and cursor['oldest_published_at'] is not None \
+            and cursor['oldest_published_at'] <= published_after:
+        return True
+    return max_videos is not None and (cursor['video_count'] or 0) >= max_videos
+
+
+def _chunked(values, size):
+    chunk = []
+    for value in values:
+        chunk.append(value)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ChannelUploadSync:
+    """
+    One sync run of a channel (see sync_channel_uploads), split into generator stages:
+    playlist pages -> video ids -> detail chunks stored as they arrive.
+    """
+
+    def __init__(self, youtube_service_wrapper, channel_id, uploads_playlist_id, full=False,
+                 published_after=None, max_videos=None, expected_count=None,
+                 progress_callback=None, is_cancelled=None):
+        self.youtube_service_wrapper = youtube_service_wrapper
+        self.channel_id = channel_id
+        self.uploads_playlist_id = uploads_playlist_id
+        self.full = full
+        self.published_after = published_after
+        self.max_videos = max_videos
+        self.expected_count = expected_count
+        self.progress_callback = progress_callback
+        self.is_cancelled = is_cancelled
+
+        cursor = None if full else get_cursor(channel_id)
+        if cursor and cursor['uploads_playlist_id'] not in (None, uploads_playlist_id):
+            cursor = None
+        self.cursor = cursor
+        self.known_ids = set(_stored_video_ids(channel_id)) if cursor else set()
+        # Cửa sổ làm mới được chốt trước khi ghi video mới, để nó vẫn là các video đã lưu gần nhất;
+        # chỉ lấy video nằm trong cửa sổ yêu cầu (published_after / max_videos)
+        refresh_limit = min(CHANNEL_SYNC_REFRESH_RECENT, max_videos) if max_videos is not None else CHANNEL_SYNC_REFRESH_RECENT
+        self.refresh_ids = _stored_video_ids(
+            channel_id, limit=refresh_limit, published_after=published_after
+        ) if cursor else []
+        # Kho chưa đủ xa về quá khứ cho yêu cầu này: đi tiếp qua video đã biết thay vì dừng lại
+        self.stop_at_known = bool(cursor) and _store_covers(cursor, published_after, max_videos)
+        # Đồng bộ toàn bộ cần biết playlist còn những video nào để xóa phần còn lại; chỉ giữ ID
+        self.playlist_ids = [] if full else None
+        self.pages = 0
+        self.scanned = 0
+        self.new_count = 0
+        self.fetched = 0
+        self.stopped_early = False
+        # Lần duyệt đã tới con trỏ (đoạn đã lưu liên tục) chưa; chưa tới thì không được dời con trỏ
+        self.connected = False
+
+    def cancelled(self):
+        return bool(self.is_cancelled and self.is_cancelled())
+
+    def report(self):
+        if not self.progress_callback:
+            return
+        expected = min(filter(None, (self.max_videos, self.expected_count)), default=0)
+        if expected:
+            fraction = min(0.95, (self.scanned + self.fetched) / (2 * expected))
+        else:
+            fraction = 0.5
+        self.progress_callback(
+            fraction, f"Đã duyệt {self.scanned} video trong playlist, đã lấy chi tiết {self.fetched} video..."
+        )
+
+    def playlist_ids_to_fetch(self):
+        """Yields new video ids page by page, newest first, until a window limit or a known video."""
+        cursor = self.cursor
+        # Đồng bộ tăng dần cần trang đầu mới nhất, không lấy từ cache phản hồi
+        playlist_service = YouTubeService(refresh_cache=True) if cursor else self.youtube_service_wrapper
+        seen_ids = set()
+        next_page_token = None
+        while not self.stopped_early:
+            if self.cancelled(): return
+            playlist_response = playlist_service.get_playlist_items(
+                part='snippet,contentDetails',
+                playlistId=self.uploads_playlist_id,
+                maxResults=PLAYLIST_PAGE_SIZE,
+                pageToken=next_page_token
+            )
+            self.pages += 1
+            next_page_token = playlist_response.get("nextPageToken")
+            # Từ mỗi trang chỉ giữ (videoId, ngày đăng); phần còn lại của item không đi tiếp
+            page_videos = [video for video in map(_playlist_video, playlist_response.get("items", [])) if video]
+            page_empty = not playlist_response.get("items")
+            del playlist_response
+
+            for video_id, published_at in page_videos:
+                if self.published_after is not None and published_at is not None and published_at < self.published_after:
+                    # Từ đây trở đi đều cũ hơn mốc thời gian cần lấy
+                    self.stopped_early = True
+                    break
+                # Chỉ dừng ở con trỏ, không ở video đã biết bất kỳ: video phía trên con trỏ có thể là
+                # phần của một lần đồng bộ bị giới hạn trước đó, bên dưới chúng còn khoảng trống
+                if cursor and (video_id == cursor['last_video_id'] or (
+                        published_at is not None and cursor['last_published_at'] is not None
+                        and published_at <= cursor['last_published_at'])):
+                    self.connected = True
+                    if self.stop_at_known:
+                        # Playlist xếp mới nhất trước: từ đây trở đi đều là video đã có trong kho
+                        self.stopped_early = True
+                        break
+                if video_id in seen_ids:
+                    continue
+                seen_ids.add(video_id)
+                self.scanned += 1
+                if self.playlist_ids is not None:
+                    self.playlist_ids.append(video_id)
+                if video_id not in self.known_ids:
+                    self.new_count += 1
+                    yield video_id
+                if self.max_videos is not None and self.scanned >= self.max_videos:
+                    self.stopped_early = True
+                    break
+            self.report()
+            if not next_page_token or page_empty:
+                break
+
+    def ids_to_fetch(self):
+        """New ids from the playlist, then the refresh window of already stored videos."""
+        yield from self.playlist_ids_to_fetch()
+        if not self.cancelled():
+            refresh_ids = self.refresh_ids
+            if self.max_videos is not None:
+                # Video mới đã chiếm một phần của max_videos video mới nhất
+                refresh_ids = refresh_ids[:max(0, self.max_videos - self.new_count)]
+            yield from refresh_ids
+
+    def stored_chunks(self):
+        """Fetches details chunk by chunk as ids stream in, storing each chunk before the next."""
+        for chunk_ids in _chunked(self.ids_to_fetch(), ENRICH_CHUNK_SIZE):
+            if self.cancelled(): return
+            # Video đã có trong cache (còn hạn) không cần gọi lại videos().list
+            items = self.youtube_service_wrapper.get_video_details_batch(
+                chunk_ids,
+                part='snippet,statistics,contentDetails',
+                is_cancelled=self.is_cancelled
+            )
+            if self.cancelled(): return
+            videos = [ChannelVideo.from_item(item) for item in items]
+            del items
+            store_channel_videos(self.channel_id, videos)
+            self.fetched += len(chunk_ids)
+            self.report()
+            yield videos
+
+    def run(self):
+        """Drains the pipeline into the store and moves the cursor; False when cancelled."""
+        for _ in self.stored_chunks():
+            pass
+        if self.cancelled():
+            return False
+        reached_oldest = not self.stopped_early
+        # Chỉ khi đã duyệt hết playlist mới biết chắc video nào đã bị xóa khỏi kênh
+        finish_sync(
+            self.channel_id, self.uploads_playlist_id,
+            keep_only_ids=self.playlist_ids if self.full and reached_oldest else None,
+            history_complete=reached_oldest and not self.stop_at_known,
+            advance_cursor=self.cursor is None or self.connected or reached_oldest
+        )
+        logger.info(
+            f"Đồng bộ kênh {self.channel_id}: {self.pages} trang playlist, {self.new_count} video mới, "
+            f"{len(self.refresh_ids)} video gần đây được làm mới"
+            f"{' (đồng bộ toàn bộ)' if self.full else ''}"
+        )
+        return True
+
+
+def sync_channel_uploads(youtube_service_wrapper, channel_id, uploads_playlist_id, full=False,
+                         published_after=None, max_videos=None, expected_count=None,
+                         progress_callback=None, is_cancelled=None):
+    """
+    Brings the channel's local video store up to date and returns an iterator over the stored
+    ChannelVideo records (newest first) within the requested window, or None when cancelled.
+    published_after (epoch seconds) / max_videos limit the scan: the uploads playlist is
+    newest-first, so pagination stops at the first older video or after max_videos videos,
+    and ids outside the window never reach videos.list.
+    Without a cursor (or with full=True) the playlist is walked as far as the window allows.
+    With a cursor, pages are read only until the cursor video (or one published at or before it)
+    shows up, unless the store does not reach back far enough yet; in that case the walk
+    continues but stored videos are not fetched again. A limited walk that stops before reaching
+    the cursor leaves the cursor in place, so the next sync pages on into the gap. New videos plus the
+    CHANNEL_SYNC_REFRESH_RECENT newest stored ones inside the window are (re)fetched with videos.list,
+    ENRICH_CHUNK_SIZE ids at a time while the playlist is still being paged.
+    expected_count (e.g. the channel's videoCount) scales progress_callback(fraction, message).
+    """
+    sync = ChannelUploadSync(
+        youtube_service_wrapper, channel_id, uploads_playlist_id, full=full,
+        published_after=published_after, max_videos=max_videos, expected_count=expected_count,
+        progress_callback=progress_callback, is_cancelled=is_cancelled
+    )
+    if not sync.run():
+        return None
+    return iter_channel_videos(channel_id, published_after=published_after, limit=max_videos)
@@ -0,0 +1,214 @@
+"""
+Tìm kiếm sâu: chia một truy vấn search.list thành các khung thời gian publishedAfter/publishedBefore
+để vượt giới hạn ~500 kết quả mà YouTube trả về cho mỗi truy vấn.
+Khung nào bão hòa (totalResults vượt ngưỡng) được chia ngay thành đủ số khung con theo totalResults,
+thay vì chia đôi nhiều tầng (mỗi tầng tốn lại trang đầu của khung cha). Khi sắp xếp theo ngày đăng,
+khung bão hòa không bị chia: nó được phân trang tiếp rồi chỉ phần cũ hơn video cũ nhất đã thấy
+được tìm tiếp, nên không trang nào bị tìm lại. Các khung chạy song song,
+cùng trừ vào một ngân sách quota chung và videoId được loại trùng giữa các khung.
+"""
+import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta, timezone
+
+from config import (
+    DEEP_SEARCH_MAX_RESULTS,
+    DEEP_SEARCH_QUOTA_BUDGET,
+    DEEP_SEARCH_MAX_WORKERS,
+    DEEP_SEARCH_WINDOW_SATURATION,
+    DEEP_SEARCH_MIN_WINDOW_SECONDS,
+    SEARCH_TIME_GRANULARITY_SECONDS
+)
+from services.quota_scheduler import quota_cost
+
+logger = logging.getLogger(__name__)
+
+# Không có video nào được đăng trước ngày YouTube ra mắt
+YOUTUBE_LAUNCH_DATE = datetime(2005, 4, 23, tzinfo=timezone.utc)
+
+
+def to_rfc3339(dt):
+    return dt.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def parse_rfc3339(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def round_search_time(dt, up=False):
+    """
+    Rounds a search boundary to SEARCH_TIME_GRANULARITY_SECONDS (down, or up with up=True) so that
+    boundaries derived from "now" give the same search.list cache key when a search is re-run.
+    """
+    step = SEARCH_TIME_GRANULARITY_SECONDS
+    epoch = int(dt.timestamp())
+    epoch = -(-epoch // step) * step if up else epoch // step * step
+    return datetime.fromtimestamp(epoch, timezone.utc)
+
+
+class QuotaBudget:
+    """Thread-safe quota allowance shared by every window of one deep search."""
+
+    def __init__(self, units):
+        self.units = units
+        self.spent = 0
+        self._lock = threading.Lock()
+
+    def try_spend(self, cost):
+        with self._lock:
+            if self.spent + cost > self.units:
+                return False
+            self.spent += cost
+            return True
+
+    @property
+    def remaining(self):
+        with self._lock:
+            return self.units - self.spent
+
+
+class DeepSearch:
+    """
+    Harvests the video ids of one search query window by window.
+    search_params are the search.list arguments shared by every window (q, type, order, ...);
+    publishedAfter/publishedBefore, maxResults and pageToken are set per request.
+    """
+
+    def __init__(self, youtube_service, search_params, published_after=None, published_before=None,
+                 max_results=DEEP_SEARCH_MAX_RESULTS, quota_budget=DEEP_SEARCH_QUOTA_BUDGET,
+                 max_workers=DEEP_SEARCH_MAX_WORKERS, saturation=DEEP_SEARCH_WINDOW_SATURATION,
+                 min_window_seconds=DEEP_SEARCH_MIN_WINDOW_SECONDS):
+        self.youtube_service = youtube_service
+        self.search_params = {
+            name: value for name, value in search_params.items()
+            if name not in ('publishedAfter', 'publishedBefore', 'maxResults', 'pageToken')
+        }
+        self.published_after = published_after or YOUTUBE_LAUNCH_DATE
+        # Khung cuối kết thúc ở mốc tròn phía sau "bây giờ" để khóa cache không đổi mỗi giây
+        self.published_before = published_before or round_search_time(datetime.now(timezone.utc), up=True)
+        self.max_results = max_results
+        self.budget = quota_budget if isinstance(quota_budget, QuotaBudget) else QuotaBudget(quota_budget)
+        self.max_workers = max(1, max_workers)
+        self.saturation = saturation
+        self.min_window_seconds = min_window_seconds
+        self.budget_exhausted = False
+        self.windows_searched = 0
+        self._seen_ids = set()
+        self._video_ids = []
+        self._lock = threading.Lock()
+
+    def run(self, on_page=None, is_cancelled=None):
+        """
+        Searches every window and returns the unique video ids in discovery order.
+        on_page(video_ids, channel_ids) is called from the worker threads with the ids
+        each page adds, so callers can start enriching them before the search ends.
+        """
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="deep-search")
+        pending = {pool.submit(self._search_window, self.published_after, self.published_before, on_page, is_cancelled)}
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for start, end in future.result():
+                        pending.add(pool.submit(self._search_window, start, end, on_page, is_cancelled))
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        logger.info(f"Tìm sâu: {len(self._video_ids)} video từ {self.windows_searched} khung, "
+                    f"dùng {self.budget.spent}/{self.budget.units} quota")
+        return list(self._video_ids)
+
+    @property
+    def found_count(self):
+        with self._lock:
+            return len(self._video_ids)
+
+    def _is_full(self):
+        with self._lock:
+            return len(self._video_ids) >= self.max_results
+
+    def _split(self, start, end, total_results):
+        """Sub-windows (newest first) sized so each should hold about `saturation` results."""
+        span = (end - start).total_seconds()
+        parts = max(2, min(math.ceil(total_results / self.saturation), int(span // self.min_window_seconds)))
+        step = (end - start) / parts
+        bounds = [start + step * i for i in range(parts)] + [end]
+        return [(bounds[i], bounds[i + 1]) for i in range(parts - 1, -1, -1)]
+
+    def _search_window(self, start, end, on_page, is_cancelled):
+        """
+        Pages through one window. Returns the windows still to search: the sub-windows of a
+        saturated window, or (when ordered by date) the older part that paging did not reach.
+        """
+        cost = quota_cost('search.list')
+        page_token = None
+        first_page = True
+        total_results = 0
+        # Sắp xếp theo ngày: các trang đi từ mới tới cũ, nên phần đã phủ là [video cũ nhất đã thấy, end]
+        date_ordered = self.search_params.get('order') == 'date'
+        oldest_seen = None
+        with self._lock:
+            self.windows_searched += 1
+
+        while True:
+            if (is_cancelled and is_cancelled()) or self._is_full():
+                return []
+            params = dict(
+                self.search_params,
+                publishedAfter=to_rfc3339(start),
+                publishedBefore=to_rfc3339(end),
+                maxResults=50,
+                pageToken=page_token
+            )
+            # Trang lấy từ cache không tốn quota nên không trừ vào ngân sách
+            response = self.youtube_service.cached_response('search.list', params)
+            if response is None:
+                if not self.budget.try_spend(cost):
+                    self.budget_exhausted = True
+                    return []
+                response = self.youtube_service.search_videos(**params)
+            self._collect(response, on_page)
+            if date_ordered:
+                for item in response.get('items', []):
+                    published = item.get('snippet', {}).get('publishedAt')
+                    if published:
+                        published = parse_rfc3339(published)
+                        oldest_seen = published if oldest_seen is None else min(oldest_seen, published)
+
+            if first_page:
+                first_page = False
+                total_results = response.get('pageInfo', {}).get('totalResults', 0)
+                if (not date_ordered and total_results > self.saturation
+                        and (end - start).total_seconds() >= 2 * self.min_window_seconds):
+                    # Chia một lần đủ số khung con theo totalResults, không chia đôi nhiều tầng
+                    return self._split(start, end, total_results)
+
+            page_token = response.get('nextPageToken')
+            if not page_token or not response.get('items'):
+                break
+
+        if date_ordered and total_results > self.saturation and oldest_seen is not None:
+            # YouTube ngừng phân trang ở ~500 kết quả: tìm tiếp phần cũ hơn (+1 giây để không sót video cùng giây)
+            remaining_end = min(end, oldest_seen + timedelta(seconds=1))
+            if start < remaining_end < end:
+                return [(start, remaining_end)]
+        return []
+
+    def _collect(self, response, on_page):
+        new_video_ids = []
+        new_channel_ids = []
+        with self._lock:
+            for item in response.get('items', []):
+                if item.get('id', {}).get('kind') != 'youtube#video':
+                    continue
+                video_id = item['id']['videoId']
+                if video_id in self._seen_ids or len(self._video_ids) >= self.max_results:
+                    continue
+                self._seen_ids.add(video_id)
+                self._video_ids.append(video_id)
+                new_video_ids.append(video_id)
+                new_channel_ids.append(item['snippet']['channelId'])
+        if new_video_ids and on_page:
+            on_page(new_video_ids, new_channel_ids)
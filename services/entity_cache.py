@@ -0,0 +1,92 @@
+"""
+Cache theo thực thể (video / kênh) nằm trên bảng entity_cache của db_cache.
+Mỗi video/kênh được lưu một dòng kèm các 'part' đã lấy và thời điểm lấy, nên một
+lô 50 ID chỉ cần gọi API cho những ID chưa có trong cache.
+"""
+import logging
+
+from config import ENTITY_CACHE_TTL_SECONDS
+from db_cache import get_entities, set_entities
+from services import local_corpus
+
+logger = logging.getLogger(__name__)
+
+MAX_IDS_PER_REQUEST = 50
+
+
+def normalize_parts(part):
+    """'snippet, statistics' -> {'snippet', 'statistics'}"""
+    if isinstance(part, str):
+        part = part.split(',')
+    return {p.strip() for p in part if p and p.strip()}
+
+
+class EntityCache:
+    def __init__(self, entity_type, ttl_seconds=None):
+        self.entity_type = entity_type
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else ENTITY_CACHE_TTL_SECONDS.get(entity_type, 3600)
+
+    def get_many(self, entity_ids, part):
+        """Returns {entity_id: item} for the ids cached with (at least) the requested parts."""
+        parts = normalize_parts(part)
+        cached = get_entities(self.entity_type, set(entity_ids), self.ttl_seconds)
+        return {
+            entity_id: item
+            for entity_id, (cached_parts, item, _fetched_at) in cached.items()
+            if parts <= cached_parts
+        }
+
+    def put_many(self, items, part):
+        set_entities(self.entity_type, items, normalize_parts(part), self.ttl_seconds)
+        # Mọi video/kênh lấy từ API cũng được đưa vào kho cục bộ (không hết hạn như cache)
+        local_corpus.index_items(self.entity_type, items)
+
+    def fetch_missing(self, entity_ids, part, fetch_chunk, use_cached=True, store_results=True,
+                      progress_callback=None, is_cancelled=None, executor=None,
+                      ids_per_call=MAX_IDS_PER_REQUEST):
+        """
+        Returns the items for entity_ids (deduplicated, in input order).
+        Cached ids are answered locally; the missing ones are packed into dense
+        chunks of ids_per_call ids via fetch_chunk(chunk_ids) -> list of items
+        (50 per request, or a multiple of 50 when fetch_chunk sends an HTTP batch).
+        With an executor (ChunkFetchExecutor) the chunks are requested concurrently.
+        Ids that the API does not return (deleted/private) are simply absent.
+        """
+        unique_ids = list(dict.fromkeys(entity_ids))
+        found = self.get_many(unique_ids, part) if use_cached else {}
+        missing_ids = [entity_id for entity_id in unique_ids if entity_id not in found]
+        total = len(unique_ids)
+
+        if found:
+            logger.debug(f"{self.entity_type}: {len(found)}/{total} lấy từ cache, {len(missing_ids)} cần gọi API")
+        if progress_callback:
+            progress_callback(len(found), total)
+
+        chunks = [missing_ids[i:i + ids_per_call] for i in range(0, len(missing_ids), ids_per_call)]
+
+        def fetch_and_store(chunk_ids):
+            items = fetch_chunk(chunk_ids)
+            if store_results:
+                self.put_many(items, part)
+            return items
+
+        def report_chunk_progress(done_chunks, _total_chunks):
+            if progress_callback:
+                done_ids = sum(len(chunk) for chunk in chunks[:done_chunks])
+                progress_callback(len(found) + done_ids, total)
+
+        if executor is not None:
+            chunk_results = executor.map(fetch_and_store, chunks, report_chunk_progress, is_cancelled)
+        else:
+            chunk_results = []
+            for index, chunk_ids in enumerate(chunks):
+                if is_cancelled and is_cancelled():
+                    break
+                chunk_results.append(fetch_and_store(chunk_ids))
+                report_chunk_progress(index + 1, len(chunks))
+
+        for items in chunk_results:
+            for item in items or []:
+                found[item['id']] = item
+
+        return [found[entity_id] for entity_id in unique_ids if entity_id in found]
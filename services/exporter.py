@@ -0,0 +1,192 @@
+"""
+Xuất kết quả ra file theo kiểu streaming: các dòng được đọc từ dữ liệu gốc (không qua widget)
+và ghi ra ngay, nên bộ nhớ không tăng theo số dòng.
+Hỗ trợ .xlsx (openpyxl chế độ write-only), .csv, .jsonl và .parquet (cần pyarrow).
+"""
+import csv
+import itertools
+import json
+import logging
+import os
+
+from config import EXPORT_WIDTH_SAMPLE_ROWS, EXPORT_PROGRESS_EVERY_ROWS, EXPORT_PARQUET_BATCH_ROWS
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FILE_FILTERS = {
+    '.xlsx': "Excel Files (*.xlsx)",
+    '.csv': "CSV (*.csv)",
+    '.jsonl': "JSON Lines (*.jsonl)",
+    '.parquet': "Parquet (*.parquet)",
+}
+
+MAX_COLUMN_WIDTH = 70
+
+
+class ExportCancelled(Exception):
+    """Raised inside a writer when the export is cancelled; the partial file is removed."""
+    pass
+
+
+def export_file_filter(first_extension='.xlsx'):
+    """QFileDialog filter string listing every supported format, first_extension first."""
+    extensions = [first_extension] + [ext for ext in EXPORT_FILE_FILTERS if ext != first_extension]
+    return ";;".join(EXPORT_FILE_FILTERS[ext] for ext in extensions)
+
+
+def export_path_with_extension(file_path, selected_filter):
+    """Adds the extension of the selected dialog filter when the user typed a bare file name."""
+    if os.path.splitext(file_path)[1].lower() in EXPORT_FILE_FILTERS:
+        return file_path
+    for extension, name in EXPORT_FILE_FILTERS.items():
+        if name == selected_filter:
+            return file_path + extension
+    return file_path + '.xlsx'
+
+
+def export_rows(file_path, headers, rows, total_rows=None, int_columns=(), link_columns=(),
+                sheet_title="Kết quả", progress_callback=None, is_cancelled=None, float_columns=()):
+    """
+    Writes rows (an iterable of value lists matching headers) to file_path; the format follows
+    the extension. int_columns / float_columns / link_columns are column indexes: numbers stay
+    numeric (None for missing values) and links become hyperlinks in Excel.
+    progress_callback(done, total) is called every EXPORT_PROGRESS_EVERY_ROWS rows.
+    Returns the number of rows written.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    writers = {
+        '.xlsx': _write_xlsx,
+        '.csv': _write_csv,
+        '.jsonl': _write_jsonl,
+        '.parquet': _write_parquet,
+    }
+    if extension not in writers:
+        raise ValueError(f"Định dạng xuất không được hỗ trợ: {extension or file_path}")
+
+    tracked_rows = _track_progress(rows, total_rows, progress_callback, is_cancelled)
+    try:
+        written = writers[extension](file_path, list(headers), tracked_rows, set(int_columns),
+                                     set(float_columns), set(link_columns), sheet_title)
+    except ExportCancelled:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    if progress_callback:
+        progress_callback(written, total_rows if total_rows is not None else written)
+    logger.info(f"Đã xuất {written} dòng ra {file_path}")
+    return written
+
+
+def _track_progress(rows, total_rows, progress_callback, is_cancelled):
+    for count, row in enumerate(rows, start=1):
+        if count % EXPORT_PROGRESS_EVERY_ROWS == 0:
+            if is_cancelled and is_cancelled():
+                raise ExportCancelled()
+            if progress_callback:
+                progress_callback(count, total_rows)
+        yield row
+
+
+def _column_widths(headers, sample_rows):
+    widths = [len(str(header)) for header in headers]
+    for row in sample_rows:
+        for i, value in enumerate(row):
+            if value is not None:
+                widths[i] = max(widths[i], len(str(value)))
+    return [min(width + 2, MAX_COLUMN_WIDTH) for width in widths]
+
+
+def _write_xlsx(file_path, headers, rows, int_columns, float_columns, link_columns, sheet_title):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title)
+
+    # Chế độ write-only phải đặt độ rộng cột trước khi ghi dòng: ước lượng từ các dòng đầu
+    sample_rows = list(itertools.islice(rows, EXPORT_WIDTH_SAMPLE_ROWS))
+    for i, width in enumerate(_column_widths(headers, sample_rows), start=1):
+        sheet.column_dimensions[get_column_letter(i)].width = width
+
+    header_font = Font(bold=True)
+    link_font = Font(color="0000FF", underline="single")
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(sheet, value=header)
+        cell.font = header_font
+        header_cells.append(cell)
+    sheet.append(header_cells)
+
+    written = 0
+    for row in itertools.chain(sample_rows, rows):
+        if link_columns:
+            row = list(row)
+            for i in link_columns:
+                url = row[i]
+                if url and str(url).startswith("http"):
+                    cell = WriteOnlyCell(sheet, value=url)
+                    cell.hyperlink = url
+                    cell.font = link_font
+                    row[i] = cell
+        sheet.append(row)
+        written += 1
+
+    workbook.save(file_path)
+    return written
+
+
+def _write_csv(file_path, headers, rows, int_columns, float_columns, link_columns, sheet_title):
+    # utf-8-sig để Excel nhận đúng tiếng Việt khi mở trực tiếp file CSV
+    written = 0
+    with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        for row in rows:
+            writer.writerow(row)
+            written += 1
+    return written
+
+
+def _write_jsonl(file_path, headers, rows, int_columns, float_columns, link_columns, sheet_title):
+    written = 0
+    with open(file_path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(dict(zip(headers, row)), ensure_ascii=False))
+            f.write('\n')
+            written += 1
+    return written
+
+
+def _write_parquet(file_path, headers, rows, int_columns, float_columns, link_columns, sheet_title):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Xuất Parquet cần thư viện pyarrow (pip install pyarrow).")
+
+    # Kiểu cột cố định (int64 / float64 / chuỗi) để mọi row group có cùng schema
+    def column_type(i):
+        if i in int_columns:
+            return pa.int64()
+        if i in float_columns:
+            return pa.float64()
+        return pa.string()
+
+    schema = pa.schema([(header, column_type(i)) for i, header in enumerate(headers)])
+    written = 0
+    with pq.ParquetWriter(file_path, schema) as writer:
+        while True:
+            batch = list(itertools.islice(rows, EXPORT_PARQUET_BATCH_ROWS))
+            if not batch:
+                break
+            arrays = []
+            for i, field in enumerate(schema):
+                values = [row[i] for row in batch]
+                if i not in int_columns and i not in float_columns:
+                    values = [None if value is None else str(value) for value in values]
+                arrays.append(pa.array(values, type=field.type))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            written += len(batch)
+    return written
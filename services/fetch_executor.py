@@ -0,0 +1,90 @@
+"""
+Bộ thực thi song song cho các lô ID (mỗi lô = một request videos/channels.list).
+Các lô được gửi cùng lúc qua một thread pool dùng chung (giới hạn bởi API_FETCH_MAX_WORKERS),
+kết quả được ghép lại đúng thứ tự ban đầu.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config import API_FETCH_MAX_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkFetchExecutor:
+    """
+    Runs independent chunk requests concurrently. Tasks submitted here must not submit
+    further tasks to the same executor (they would wait on each other's threads).
+    """
+
+    def __init__(self, max_workers=API_FETCH_MAX_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        # Thread được giữ lại giữa các lần gọi để tái sử dụng service và kết nối SQLite của thread đó
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="api-fetch")
+            return self._pool
+
+    def map(self, fn, items, progress_callback=None, is_cancelled=None):
+        """
+        Returns [fn(item) for item in items], computed concurrently and kept in input order.
+        progress_callback(done, total) is called from the calling thread as chunks complete.
+        On cancellation the pending chunks are dropped and their results are None.
+        The first exception raised by a chunk is re-raised after cancelling the others.
+        """
+        items = list(items)
+        results = [None] * len(items)
+        if not items:
+            return results
+
+        if len(items) == 1 or self.max_workers == 1:
+            for index, item in enumerate(items):
+                if is_cancelled and is_cancelled():
+                    break
+                results[index] = fn(item)
+                if progress_callback:
+                    progress_callback(index + 1, len(items))
+            return results
+
+        def run(item):
+            if is_cancelled and is_cancelled():
+                return None
+            return fn(item)
+
+        pool = self._get_pool()
+        futures = {pool.submit(run, item): index for index, item in enumerate(items)}
+        try:
+            for done_count, future in enumerate(as_completed(futures), 1):
+                results[futures[future]] = future.result()
+                if progress_callback:
+                    progress_callback(done_count, len(items))
+                if is_cancelled and is_cancelled():
+                    break
+        finally:
+            for future in futures:
+                future.cancel()
+        return results
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+_default_executor = None
+_default_executor_lock = threading.Lock()
+
+
+def get_fetch_executor():
+    """Process-wide executor shared by every YouTubeService."""
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = ChunkFetchExecutor()
+        return _default_executor
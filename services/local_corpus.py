@@ -0,0 +1,450 @@
+"""
+Kho dữ liệu cục bộ: mọi video/kênh từng được lấy chi tiết từ API được lưu lại (không hết hạn như cache)
+và đánh chỉ mục toàn văn SQLite FTS5 trên tiêu đề, thẻ và mô tả.
+Cho phép tìm lại một ngách (xếp hạng BM25, tìm theo tiền tố, lọc theo số liệu) mà không tốn quota.
+"""
+import logging
+import re
+import sqlite3
+import threading
+import time
+
+from isodate import parse_duration, ISO8601Error
+
+from config import LOCAL_CORPUS_ENABLED, LOCAL_CORPUS_BACKFILL_BATCH_SIZE
+from db_cache import get_connection, close_connection, transaction, decode_payload
+from services.deep_search import parse_rfc3339
+
+logger = logging.getLogger(__name__)
+
+_available = None
+
+# Trọng số BM25 theo cột FTS (tiêu đề quan trọng nhất, sau đó là thẻ, rồi mô tả)
+VIDEO_BM25_WEIGHTS = (10.0, 4.0, 1.0)
+CHANNEL_BM25_WEIGHTS = (10.0, 1.0)
+
+_TOKEN_PATTERN = re.compile(r'\w+\*?', re.UNICODE)
+
+# Thẻ được lưu nối bằng xuống dòng (một thẻ có thể có khoảng trắng, không có xuống dòng);
+# FTS5 vẫn tách từ trên chuỗi nối này như bình thường
+TAG_SEPARATOR = "\n"
+
+
+def init_corpus():
+    """Creates the corpus tables and FTS5 indexes; the corpus stays disabled if FTS5 is missing."""
+    global _available
+    if not LOCAL_CORPUS_ENABLED:
+        _available = False
+        return False
+    try:
+        conn = get_connection()
+        conn.executescript('''
+        CREATE TABLE IF NOT EXISTS corpus_videos (
+            video_id TEXT PRIMARY KEY,
+            channel_id TEXT,
+            title TEXT,
+            tags TEXT,
+            description TEXT,
+            category_id TEXT,
+            published_at INTEGER,
+            duration TEXT,
+            duration_seconds INTEGER,
+            view_count INTEGER,
+            like_count INTEGER,
+            comment_count INTEGER,
+            indexed_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_corpus_videos_channel ON corpus_videos (channel_id);
+        CREATE INDEX IF NOT EXISTS idx_corpus_videos_published ON corpus_videos (published_at);
+
+        CREATE VIRTUAL TABLE IF NOT EXISTS corpus_videos_fts USING fts5(
+            title, tags, description,
+            content='corpus_videos', content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        );
+        CREATE TRIGGER IF NOT EXISTS corpus_videos_ai AFTER INSERT ON corpus_videos BEGIN
+            INSERT INTO corpus_videos_fts (rowid, title, tags, description)
+            VALUES (new.rowid, new.title, new.tags, new.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS corpus_videos_ad AFTER DELETE ON corpus_videos BEGIN
+            INSERT INTO corpus_videos_fts (corpus_videos_fts, rowid, title, tags, description)
+            VALUES ('delete', old.rowid, old.title, old.tags, old.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS corpus_videos_au AFTER UPDATE ON corpus_videos BEGIN
+            INSERT INTO corpus_videos_fts (corpus_videos_fts, rowid, title, tags, description)
+            VALUES ('delete', old.rowid, old.title, old.tags, old.description);
+            INSERT INTO corpus_videos_fts (rowid, title, tags, description)
+            VALUES (new.rowid, new.title, new.tags, new.description);
+        END;
+
+        CREATE TABLE IF NOT EXISTS corpus_channels (
+            channel_id TEXT PRIMARY KEY,
+            title TEXT,
+            description TEXT,
+            country TEXT,
+            published_at INTEGER,
+            subscriber_count INTEGER,
+            video_count INTEGER,
+            view_count INTEGER,
+            indexed_at REAL
+        );
+        CREATE VIRTUAL TABLE IF NOT EXISTS corpus_channels_fts USING fts5(
+            title, description,
+            content='corpus_channels', content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        );
+        CREATE TRIGGER IF NOT EXISTS corpus_channels_ai AFTER INSERT ON corpus_channels BEGIN
+            INSERT INTO corpus_channels_fts (rowid, title, description)
+            VALUES (new.rowid, new.title, new.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS corpus_channels_ad AFTER DELETE ON corpus_channels BEGIN
+            INSERT INTO corpus_channels_fts (corpus_channels_fts, rowid, title, description)
+            VALUES ('delete', old.rowid, old.title, old.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS corpus_channels_au AFTER UPDATE ON corpus_channels BEGIN
+            INSERT INTO corpus_channels_fts (corpus_channels_fts, rowid, title, description)
+            VALUES ('delete', old.rowid, old.title, old.description);
+            INSERT INTO corpus_channels_fts (rowid, title, description)
+            VALUES (new.rowid, new.title, new.description);
+        END;
+        ''')
+        _available = True
+    except sqlite3.OperationalError as e:
+        # Bản SQLite không có FTS5: ứng dụng vẫn chạy bình thường, chỉ tắt kho cục bộ
+        logger.warning(f"Không bật được kho cục bộ (FTS5): {e}")
+        _available = False
+    return _available
+
+
+def is_available():
+    return bool(_available)
+
+
+def _to_int(value):
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _epoch_or_none(value):
+    if not value:
+        return None
+    try:
+        return int(parse_rfc3339(value).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def _duration_seconds(duration):
+    if not duration:
+        return None
+    try:
+        return int(parse_duration(duration).total_seconds())
+    except (ISO8601Error, ValueError, TypeError):
+        return None
+
+
+def _video_row(item, now):
+    snippet = item.get('snippet') or {}
+    statistics = item.get('statistics') or {}
+    content_details = item.get('contentDetails') or {}
+    tags = snippet.get('tags')
+    return (
+        item['id'],
+        snippet.get('channelId'),
+        snippet.get('title'),
+        TAG_SEPARATOR.join(tags) if tags else None,
+        snippet.get('description'),
+        snippet.get('categoryId'),
+        _epoch_or_none(snippet.get('publishedAt')),
+        content_details.get('duration'),
+        _duration_seconds(content_details.get('duration')),
+        _to_int(statistics.get('viewCount')),
+        _to_int(statistics.get('likeCount')),
+        _to_int(statistics.get('commentCount')),
+        now,
+    )
+
+
+def _channel_row(item, now):
+    snippet = item.get('snippet') or {}
+    statistics = item.get('statistics') or {}
+    subscriber_count = None
+    if not statistics.get('hiddenSubscriberCount'):
+        subscriber_count = _to_int(statistics.get('subscriberCount'))
+    return (
+        item['id'],
+        snippet.get('title'),
+        snippet.get('description'),
+        snippet.get('country'),
+        _epoch_or_none(snippet.get('publishedAt')),
+        subscriber_count,
+        _to_int(statistics.get('videoCount')),
+        _to_int(statistics.get('viewCount')),
+        now,
+    )
+
+
+# Upsert giữ lại giá trị cũ khi lần lấy này không có part tương ứng (ví dụ chỉ lấy contentDetails)
+_UPSERT_VIDEO = '''
+INSERT INTO corpus_videos (video_id, channel_id, title, tags, description, category_id, published_at,
+                           duration, duration_seconds, view_count, like_count, comment_count, indexed_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (video_id) DO UPDATE SET
+    channel_id = COALESCE(excluded.channel_id, channel_id),
+    title = COALESCE(excluded.title, title),
+    tags = CASE WHEN excluded.title IS NOT NULL THEN excluded.tags ELSE tags END,
+    description = COALESCE(excluded.description, description),
+    category_id = COALESCE(excluded.category_id, category_id),
+    published_at = COALESCE(excluded.published_at, published_at),
+    duration = COALESCE(excluded.duration, duration),
+    duration_seconds = COALESCE(excluded.duration_seconds, duration_seconds),
+    view_count = COALESCE(excluded.view_count, view_count),
+    like_count = COALESCE(excluded.like_count, like_count),
+    comment_count = COALESCE(excluded.comment_count, comment_count),
+    indexed_at = excluded.indexed_at
+'''
+
+_UPSERT_CHANNEL = '''
+INSERT INTO corpus_channels (channel_id, title, description, country, published_at,
+                             subscriber_count, video_count, view_count, indexed_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (channel_id) DO UPDATE SET
+    title = COALESCE(excluded.title, title),
+    description = COALESCE(excluded.description, description),
+    country = COALESCE(excluded.country, country),
+    published_at = COALESCE(excluded.published_at, published_at),
+    subscriber_count = COALESCE(excluded.subscriber_count, subscriber_count),
+    video_count = COALESCE(excluded.video_count, video_count),
+    view_count = COALESCE(excluded.view_count, view_count),
+    indexed_at = excluded.indexed_at
+'''
+
+
+def index_items(entity_type, items, now=None):
+    """Adds or refreshes videos.list / channels.list items in the corpus (no-op when disabled)."""
+    if not _available or not items:
+        return
+    now = now or time.time()
+    try:
+        if entity_type == 'video':
+            statement, rows = _UPSERT_VIDEO, [_video_row(item, now) for item in items]
+        elif entity_type == 'channel':
+            statement, rows = _UPSERT_CHANNEL, [_channel_row(item, now) for item in items]
+        else:
+            return
+        with transaction() as conn:
+            conn.executemany(statement, rows)
+    except sqlite3.Error as e:
+        logger.error(f"Local corpus write error: {e}")
+
+
+def build_match_query(text, prefix=True):
+    """
+    Turns free text into a safe FTS5 query: every word must match (AND), each word is quoted
+    so FTS5 operators in the input are ignored. With prefix=True (or a trailing '*' on a word)
+    words also match as prefixes.
+    """
+    terms = []
+    for token in _TOKEN_PATTERN.findall(text or ''):
+        word = token.rstrip('*')
+        if not word:
+            continue
+        is_prefix = prefix or token.endswith('*')
+        terms.append(f'"{word}"*' if is_prefix else f'"{word}"')
+    return " ".join(terms)
+
+
+def search_videos(text, limit=500, min_views=0, min_comments=0, min_subscribers=0,
+                  published_after=None, published_before=None, min_duration_seconds=0,
+                  max_duration_seconds=None, category_id=None, excluded_category_ids=(), prefix=True):
+    """
+    BM25-ranked local search over video titles, tags and descriptions.
+    published_after/before are epoch seconds. Returns dicts with the video columns and the
+    channel statistics known locally (None when the channel was never enriched).
+    """
+    match_query = build_match_query(text, prefix)
+    if not _available or not match_query:
+        return []
+
+    conditions = ['corpus_videos_fts MATCH ?']
+    params = [match_query]
+    if min_views > 0:
+        conditions.append('v.view_count >= ?')
+        params.append(min_views)
+    if min_comments > 0:
+        conditions.append('v.comment_count >= ?')
+        params.append(min_comments)
+    if min_subscribers > 0:
+        conditions.append('c.subscriber_count >= ?')
+        params.append(min_subscribers)
+    if published_after is not None:
+        conditions.append('v.published_at >= ?')
+        params.append(published_after)
+    if published_before is not None:
+        conditions.append('v.published_at < ?')
+        params.append(published_before)
+    if min_duration_seconds > 0:
+        conditions.append('v.duration_seconds >= ?')
+        params.append(min_duration_seconds)
+    if max_duration_seconds is not None:
+        conditions.append('v.duration_seconds <= ?')
+        params.append(max_duration_seconds)
+    if category_id:
+        conditions.append('v.category_id = ?')
+        params.append(category_id)
+    excluded_category_ids = [cid for cid in excluded_category_ids if cid]
+    if excluded_category_ids:
+        conditions.append(f"COALESCE(v.category_id, '') NOT IN ({','.join('?' * len(excluded_category_ids))})")
+        params.extend(excluded_category_ids)
+
+    weights = ', '.join(str(weight) for weight in VIDEO_BM25_WEIGHTS)
+    sql = f'''
+    SELECT v.video_id, v.channel_id, v.title, v.tags, v.description, v.category_id, v.published_at,
+           v.duration, v.view_count, v.like_count, v.comment_count,
+           c.title, c.subscriber_count, c.video_count, c.view_count,
+           bm25(corpus_videos_fts, {weights}) AS rank
+    FROM corpus_videos_fts
+    JOIN corpus_videos v ON v.rowid = corpus_videos_fts.rowid
+    LEFT JOIN corpus_channels c ON c.channel_id = v.channel_id
+    WHERE {' AND '.join(conditions)}
+    ORDER BY rank
+    LIMIT ?
+    '''
+    params.append(limit)
+    try:
+        rows = get_connection().execute(sql, params).fetchall()
+    except sqlite3.Error as e:
+        logger.error(f"Local corpus search error: {e}")
+        return []
+
+    results = []
+    for (video_id, channel_id, title, tags, description, category_id, published_at, duration,
+         view_count, like_count, comment_count, channel_title, subscriber_count,
+         channel_video_count, channel_view_count, rank) in rows:
+        results.append({
+            'id': video_id,
+            'channel_id': channel_id,
+            'title': title,
+            'tags': tags.split(TAG_SEPARATOR) if tags else [],
+            'description': description,
+            'category_id': category_id,
+            'published_at': published_at,
+            'duration': duration,
+            'view_count': view_count,
+            'like_count': like_count,
+            'comment_count': comment_count,
+            'channel_title': channel_title,
+            'subscriber_count': subscriber_count,
+            'channel_video_count': channel_video_count,
+            'channel_view_count': channel_view_count,
+            'rank': rank,
+        })
+    return results
+
+
+def search_channels(text, limit=200, max_subscribers=None, max_videos=None, prefix=True):
+    """
+    BM25-ranked local search over channel titles and descriptions, with the same upper limits
+    as the API channel search (channels with a hidden subscriber count are kept).
+    """
+    match_query = build_match_query(text, prefix)
+    if not _available or not match_query:
+        return []
+    conditions = ['corpus_channels_fts MATCH ?']
+    params = [match_query]
+    if max_subscribers is not None:
+        conditions.append('(c.subscriber_count IS NULL OR c.subscriber_count <= ?)')
+        params.append(max_subscribers)
+    if max_videos is not None:
+        conditions.append('(c.video_count IS NULL OR c.video_count <= ?)')
+        params.append(max_videos)
+    weights = ', '.join(str(weight) for weight in CHANNEL_BM25_WEIGHTS)
+    sql = f'''
+    SELECT c.channel_id, c.title, c.description, c.country, c.published_at,
+           c.subscriber_count, c.video_count, c.view_count,
+           bm25(corpus_channels_fts, {weights}) AS rank
+    FROM corpus_channels_fts
+    JOIN corpus_channels c ON c.rowid = corpus_channels_fts.rowid
+    WHERE {' AND '.join(conditions)}
+    ORDER BY rank
+    LIMIT ?
+    '''
+    params.append(limit)
+    try:
+        rows = get_connection().execute(sql, params).fetchall()
+    except sqlite3.Error as e:
+        logger.error(f"Local corpus search error: {e}")
+        return []
+    return [
+        {
+            'id': channel_id, 'title': title, 'description': description, 'country': country,
+            'published_at': published_at, 'subscriber_count': subscriber_count,
+            'video_count': video_count, 'view_count': view_count, 'rank': rank,
+        }
+        for (channel_id, title, description, country, published_at,
+             subscriber_count, video_count, view_count, rank) in rows
+    ]
+
+
+def corpus_counts():
+    """{'videos': n, 'channels': n} currently in the corpus."""
+    if not _available:
+        return {'videos': 0, 'channels': 0}
+    conn = get_connection()
+    return {
+        'videos': conn.execute('SELECT COUNT(*) FROM corpus_videos').fetchone()[0],
+        'channels': conn.execute('SELECT COUNT(*) FROM corpus_channels').fetchone()[0],
+    }
+
+
+def backfill_from_entity_cache(batch_size=LOCAL_CORPUS_BACKFILL_BATCH_SIZE):
+    """
+    Indexes the videos/channels already in entity_cache (fetched before the corpus existed).
+    Runs only while the corpus is empty. Returns the number of items indexed.
+    """
+    if not _available or corpus_counts()['videos'] > 0:
+        return 0
+    indexed = 0
+    last_rowid = 0
+    try:
+        conn = get_connection()
+        while True:
+            rows = conn.execute(
+                'SELECT rowid, entity_type, data_json, payload, codec FROM entity_cache '
+                'WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                (last_rowid, batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            last_rowid = rows[-1][0]
+            items_by_type = {}
+            for _rowid, entity_type, data_json, payload, codec in rows:
+                items_by_type.setdefault(entity_type, []).append(decode_payload(payload, codec, data_json))
+            for entity_type, items in items_by_type.items():
+                index_items(entity_type, items)
+                indexed += len(items)
+    except (sqlite3.Error, ValueError) as e:
+        logger.error(f"Local corpus backfill error: {e}")
+    if indexed:
+        logger.info(f"Đã đưa {indexed} video/kênh từ cache vào kho cục bộ")
+    return indexed
+
+
+def start_corpus_backfill():
+    """Runs backfill_from_entity_cache on a daemon thread (its connection is closed afterwards)."""
+    if not _available:
+        return None
+
+    def run():
+        try:
+            backfill_from_entity_cache()
+        finally:
+            close_connection()
+
+    thread = threading.Thread(target=run, name="CorpusBackfill", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,187 @@
+"""
+Phân tích n-gram (1-3 từ) trên tiêu đề và thẻ của một tập kết quả video.
+Mỗi cụm từ được tính số video chứa nó, tổng lượt xem và lượt xem / người đăng ký trung bình,
+rồi xếp hạng theo điểm cơ hội (video của kênh nhỏ vẫn nhiều lượt xem, có đủ số video làm chứng).
+Mỗi cụm từ được mã hóa thành số nguyên và toàn bộ việc đếm/cộng dồn chạy theo lô bằng NumPy.
+"""
+import logging
+import re
+from collections import defaultdict
+from itertools import chain, count
+
+import numpy as np
+
+from config import NGRAM_MAX_N, NGRAM_MIN_VIDEOS, NGRAM_TOP_TERMS, NGRAM_MIN_SUBSCRIBERS
+
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+# Ký tự không phải chữ và không phải khoảng trắng, dùng để nối các cụm trước khi tách từ hàng loạt
+_PHRASE_SEPARATOR = "\x00"
+
+# Từ phổ biến không mang nghĩa chủ đề (tiếng Việt và tiếng Anh); n-gram không được bắt đầu/kết thúc bằng chúng
+STOPWORDS = frozenset("""
+và của là có cho với các những một được không này đó khi thì mà để trong ngoài trên dưới từ tại về như
+bị đã đang sẽ rất cũng nhưng hay hoặc nếu vì nên lại ra vào lên xuống nào gì ai ở đi làm cái con người
+the a an and or of to in on for with at by from is are was be it this that these those you your my we our
+i me he she they them his her its as vs not no do does did how what why when who all
+""".split())
+
+RANK_FIELDS = ('opportunity', 'total_views', 'video_count', 'avg_views', 'avg_views_per_sub')
+
+
+def tokenize(text):
+    """Lower-cased word tokens without pure numbers or single characters."""
+    if not text:
+        return []
+    return [token for token in _WORD_PATTERN.findall(text.lower()) if len(token) > 1 and not token.isdigit()]
+
+
+def _flatten_phrases(titles, tags, use_title, use_tags):
+    """
+    Token ids of every phrase (a title or one tag) laid end to end.
+    Returns (token_words, token_ids, phrase_of_token, video_of_token). All phrases are joined
+    into one string and split on whitespace in a single pass; each distinct chunk is tokenized
+    once (words repeat across titles and tags) and expanded back to its occurrences with NumPy.
+    """
+    tag_lists = [video_tags or () for video_tags in tags] if use_tags else [()] * len(titles)
+    if use_title:
+        groups = [(title or '', *video_tags) for title, video_tags in zip(titles, tag_lists)]
+    else:
+        groups = tag_lists
+    phrases = list(chain.from_iterable(groups))
+    group_sizes = np.fromiter(map(len, groups), dtype=np.int64, count=len(groups))
+    phrase_videos = np.repeat(np.arange(len(groups), dtype=np.int64), group_sizes)
+
+    # Ký tự phân cách đứng riêng thành một đoạn, đánh dấu ranh giới giữa hai cụm
+    separator = f" {_PHRASE_SEPARATOR} "
+    joined = separator.join(phrases)
+    if joined.count(_PHRASE_SEPARATOR) >= len(phrases):
+        joined = separator.join(text.replace(_PHRASE_SEPARATOR, ' ') for text in phrases)
+    chunks = joined.split()
+    chunk_index = defaultdict(count().__next__)
+    chunk_ids = np.fromiter(map(chunk_index.__getitem__, chunks), dtype=np.int64, count=len(chunks))
+
+    # Id từ theo thứ tự xuất hiện đầu tiên; mỗi đoạn khác nhau chỉ tách từ một lần
+    word_index = defaultdict(count().__next__)
+    chunk_words = [[word_index[word] for word in tokenize(chunk)] for chunk in chunk_index]
+    chunk_lengths = np.fromiter(map(len, chunk_words), dtype=np.int64, count=len(chunk_words))
+    chunk_starts = np.cumsum(chunk_lengths) - chunk_lengths
+    chunk_word_ids = np.fromiter(chain.from_iterable(chunk_words), dtype=np.int64, count=int(chunk_lengths.sum()))
+    separator_id = chunk_index.get(_PHRASE_SEPARATOR, -1)
+
+    # Mở rộng: mỗi lần đoạn xuất hiện lấy lại dãy id từ của đoạn đó
+    lengths = chunk_lengths[chunk_ids]
+    occurrence_starts = np.cumsum(lengths) - lengths
+    positions = np.repeat(chunk_starts[chunk_ids] - occurrence_starts, lengths) + np.arange(lengths.sum())
+    phrase_of_token = np.repeat(np.cumsum(chunk_ids == separator_id), lengths)
+    return list(word_index), chunk_word_ids[positions], phrase_of_token, phrase_videos[phrase_of_token]
+
+
+def analyze_ngrams(titles, tags, view_counts, subscriber_counts, max_n=NGRAM_MAX_N,
+                   min_videos=NGRAM_MIN_VIDEOS, top_k=NGRAM_TOP_TERMS, rank_by='opportunity',
+                   use_title=True, use_tags=True):
+    """
+    Ranks the n-grams of a result set. titles/tags/view_counts/subscriber_counts are parallel
+    per-video sequences (counts may be -1 or None when unknown).
+    Returns up to top_k dicts: term, words, video_count, total_views, avg_views,
+    avg_views_per_sub and opportunity = avg_views_per_sub * log(1 + video_count).
+    """
+    if rank_by not in RANK_FIELDS:
+        raise ValueError(f"rank_by phải là một trong {RANK_FIELDS}")
+    video_count = len(titles)
+    if video_count == 0:
+        return []
+
+    words, token_ids, phrase_of_token, video_of_token = _flatten_phrases(titles, tags, use_title, use_tags)
+    if token_ids.size == 0:
+        return []
+
+    # Bước 1: mã hóa mọi n-gram thành một số nguyên (id từ theo cơ số len(words), kèm n ở 2 bit thấp).
+    # Cửa sổ không được vượt qua ranh giới cụm (tiêu đề / thẻ) và không bắt đầu/kết thúc bằng stopword.
+    base = len(words)
+    max_n = max(1, min(max_n, 3))
+    while max_n > 1 and (base ** max_n) * 4 >= 2 ** 62:
+        max_n -= 1
+    is_stop = np.array([word in STOPWORDS for word in words], dtype=bool)[token_ids]
+    token_count = token_ids.size
+    gram_codes = []
+    gram_videos = []
+    for n in range(1, max_n + 1):
+        if token_count < n:
+            break
+        starts = np.arange(token_count - n + 1)
+        ends = starts + n - 1
+        valid = (phrase_of_token[starts] == phrase_of_token[ends]) & ~is_stop[starts] & ~is_stop[ends]
+        starts = starts[valid]
+        code = np.zeros(starts.size, dtype=np.int64)
+        for offset in range(n):
+            code = code * base + token_ids[starts + offset]
+        gram_codes.append(code * 4 + n)
+        gram_videos.append(video_of_token[starts])
+    gram_codes = np.concatenate(gram_codes)
+    gram_videos = np.concatenate(gram_videos)
+    if gram_codes.size == 0:
+        return []
+
+    # Bước 2: đánh id liên tục cho các cụm từ (theo thứ tự mã), rồi mỗi cụm từ chỉ tính một lần cho mỗi video.
+    # Cặp (id cụm từ, video) vừa một khóa int64 nên chỉ cần một lần sắp xếp thay vì lexsort hai khóa
+    unique_codes, term_of_gram = np.unique(gram_codes, return_inverse=True)
+    pairs = np.sort(term_of_gram.astype(np.int64) * video_count + gram_videos)
+    pairs = pairs[np.diff(pairs, prepend=-1) != 0]
+    term_ids, gram_videos = np.divmod(pairs, video_count)
+    vocabulary_size = unique_codes.size
+
+    # Bước 3: trọng số theo video cộng dồn cho từng cụm từ bằng bincount
+    views = np.array([value if value is not None and value > 0 else 0 for value in view_counts], dtype=np.float64)
+    subscribers = np.array([value if value is not None and value > 0 else 0 for value in subscriber_counts], dtype=np.float64)
+    has_subscribers = subscribers > 0
+    # Kênh rất nhỏ được tính như có NGRAM_MIN_SUBSCRIBERS người đăng ký để một video lẻ không làm lệch tỉ lệ
+    views_per_sub = np.divide(views, np.maximum(subscribers, NGRAM_MIN_SUBSCRIBERS),
+                              out=np.zeros_like(views), where=has_subscribers)
+
+    term_video_counts = np.bincount(term_ids, minlength=vocabulary_size)
+    total_views = np.bincount(term_ids, weights=views[gram_videos], minlength=vocabulary_size)
+    vps_sum = np.bincount(term_ids, weights=views_per_sub[gram_videos], minlength=vocabulary_size)
+    vps_videos = np.bincount(term_ids, weights=has_subscribers[gram_videos], minlength=vocabulary_size)
+
+    avg_views = total_views / np.maximum(term_video_counts, 1)
+    avg_views_per_sub = vps_sum / np.maximum(vps_videos, 1)
+    opportunity = avg_views_per_sub * np.log1p(term_video_counts)
+
+    # Bước 4: lọc theo số video tối thiểu, lấy top_k rồi giải mã cụm từ
+    metrics = {
+        'opportunity': opportunity,
+        'total_views': total_views,
+        'video_count': term_video_counts,
+        'avg_views': avg_views,
+        'avg_views_per_sub': avg_views_per_sub,
+    }
+    candidates = np.flatnonzero(term_video_counts >= max(1, min_videos))
+    if candidates.size == 0:
+        return []
+    scores = metrics[rank_by][candidates]
+    if candidates.size > top_k:
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        candidates, scores = candidates[top], scores[top]
+    ranked = candidates[np.argsort(-scores, kind='stable')]
+
+    results = []
+    for term_id in ranked:
+        code = int(unique_codes[term_id])
+        n, code = code % 4, code // 4
+        term_words = []
+        for _ in range(n):
+            code, word_id = divmod(code, base)
+            term_words.append(words[word_id])
+        results.append({
+            'term': " ".join(reversed(term_words)),
+            'words': n,
+            'video_count': int(term_video_counts[term_id]),
+            'total_views': int(total_views[term_id]),
+            'avg_views': float(avg_views[term_id]),
+            'avg_views_per_sub': float(avg_views_per_sub[term_id]),
+            'opportunity': float(opportunity[term_id]),
+        })
+    logger.debug(f"N-gram: {video_count} video, {vocabulary_size} cụm từ, trả về {len(results)}")
+    return results
@@ -0,0 +1,131 @@
+"""
+Ước tính trước số lệnh gọi API và số quota một tác vụ sẽ dùng (tìm từ khóa, lấy video kênh,
+phân tích kênh) rồi so với quota còn lại của các key hôm nay, để cảnh báo hoặc tự giảm quy mô
+thay vì chạy tới giữa chừng mới hết quota.
+"""
+import logging
+import math
+
+from config import PLANNER_DEFAULT_UPLOADS_PER_CHANNEL, ENTITY_CACHE_TTL_SECONDS, CHANNEL_SYNC_REFRESH_RECENT
+from db_cache import get_cache_stats, get_entities
+from services.api_manager import APIKeyManager
+from services.channel_resolver import lookup_channel_ids
+from services.channel_sync import synced_channel_ids
+from services.entity_cache import MAX_IDS_PER_REQUEST
+from services.quota_scheduler import quota_cost
+
+logger = logging.getLogger(__name__)
+
+class QuotaPlan:
+    """Estimated calls per endpoint for one job, compared with the quota left today."""
+
+    def __init__(self, calls_by_endpoint, remaining_quota, spend_cap=None):
+        self.calls = {endpoint: int(math.ceil(count)) for endpoint, count in calls_by_endpoint.items() if count > 0}
+        self.units = sum(quota_cost(endpoint) * count for endpoint, count in self.calls.items())
+        self.remaining = remaining_quota
+        # Trần quota mà tác vụ tự dừng khi chạm tới (None = không có), chỉ để hiển thị
+        self.spend_cap = spend_cap
+
+    @property
+    def call_count(self):
+        return sum(self.calls.values())
+
+    @property
+    def fits(self):
+        return self.units <= self.remaining
+
+    @property
+    def affordable_fraction(self):
+        """Share of the job that today's remaining quota can pay for (1.0 when it fits)."""
+        if self.units <= 0:
+            return 1.0
+        return max(0.0, min(1.0, self.remaining / self.units))
+
+    def summary(self):
+        details = ", ".join(f"{endpoint}: {count}" for endpoint, count in sorted(self.calls.items()))
+        text = f"Ước tính {self.call_count} lệnh gọi API ≈ {self.units:,} quota ({details}).\n"
+        if self.spend_cap is not None:
+            text += f"Tìm kiếm dừng khi đã dùng {self.spend_cap:,} quota cho search.list.\n"
+        return text + f"Quota còn lại hôm nay (tất cả key): {self.remaining:,}."
+
+
+def remaining_quota_today():
+    return sum(max(0, remaining) for remaining in APIKeyManager.get_remaining_quota().values())
+
+
+def cache_hit_ratio():
+    """Share of cache lookups served from memory or SQLite since the app started (0 if unknown)."""
+    stats = get_cache_stats()
+    lookups = stats['memory_hits'] + stats['memory_misses']
+    if lookups == 0:
+        return 0.0
+    return min(1.0, (stats['memory_hits'] + stats['disk_hits']) / lookups)
+
+
+def channel_ids_from_urls(urls):
+    """Channel ids known without a network call: UC... ids, /channel/ URLs and previously resolved URLs."""
+    return list(lookup_channel_ids([url.strip() for url in urls if url.strip()]).values())
+
+
+def plan_keyword_search(max_results, keyword_count=1, hit_ratio=None, remaining_quota=None, search_budget=None):
+    """
+    search.list pages plus videos/channels.list enrichment for max_results videos per keyword.
+    search_budget is the search.list spend cap the job enforces (the deep-search budget or the
+    batch quota ceiling); pages beyond it are never fetched and are not counted.
+    """
+    hit_ratio = cache_hit_ratio() if hit_ratio is None else hit_ratio
+    pages = math.ceil(max_results / 50) * keyword_count
+    capped = search_budget is not None and pages * quota_cost('search.list') > search_budget
+    if capped:
+        pages = search_budget // quota_cost('search.list')
+    miss_ratio = 1.0 - hit_ratio
+    # search.list tốn 100 unit/lần nên được tính đủ (ước tính thận trọng)
+    calls = {
+        'search.list': pages,
+        'videos.list': pages * miss_ratio,
+        'channels.list': pages * miss_ratio,
+    }
+    return QuotaPlan(calls, remaining_quota_today() if remaining_quota is None else remaining_quota,
+                     spend_cap=search_budget if capped else None)
+
+
+def plan_channel_videos(channel_count, known_channel_ids=(), hit_ratio=None, remaining_quota=None,
+                        full_sync=False, max_videos_per_channel=None):
+    """
+    Uploads playlist pages plus videos.list details for every channel. Upload counts come from
+    cached channel statistics when available, PLANNER_DEFAULT_UPLOADS_PER_CHANNEL otherwise.
+    A channel already synced (and not full_sync) only costs the newest playlist page and the
+    refresh of its CHANNEL_SYNC_REFRESH_RECENT newest videos. max_videos_per_channel caps the
+    uploads counted per channel (a date cutoff cannot be estimated and is ignored).
+    """
+    hit_ratio = cache_hit_ratio() if hit_ratio is None else hit_ratio
+    synced = set() if full_sync else synced_channel_ids(known_channel_ids)
+    cached_channels = get_entities('channel', set(known_channel_ids), ENTITY_CACHE_TTL_SECONDS['channel'])
+    upload_counts = [CHANNEL_SYNC_REFRESH_RECENT] * len(synced)
+    for channel_id, (_parts, item, _fetched_at) in cached_channels.items():
+        if channel_id in synced:
+            continue
+        video_count = item.get('statistics', {}).get('videoCount')
+        if video_count is not None and str(video_count).isdigit():
+            upload_counts.append(int(video_count))
+    unknown_channels = max(0, channel_count - len(upload_counts))
+    upload_counts.extend([PLANNER_DEFAULT_UPLOADS_PER_CHANNEL] * unknown_channels)
+    if max_videos_per_channel:
+        upload_counts = [min(count, max_videos_per_channel) for count in upload_counts]
+
+    playlist_pages = sum(max(1, math.ceil(count / 50)) for count in upload_counts)
+    # Trang playlist của kênh đã đồng bộ luôn được lấy mới (không qua cache)
+    fresh_pages = len(synced)
+    calls = {
+        'channels.list': channel_count - len(cached_channels),
+        'playlistItems.list': fresh_pages + (playlist_pages - fresh_pages) * (1.0 - hit_ratio),
+        'videos.list': sum(math.ceil(count / MAX_IDS_PER_REQUEST) for count in upload_counts) * (1.0 - hit_ratio),
+    }
+    return QuotaPlan(calls, remaining_quota_today() if remaining_quota is None else remaining_quota)
+
+
+def plan_channel_analysis(channel_count, known_channel_ids=(), remaining_quota=None):
+    """One channels.list call per 50 channels that are not cached yet."""
+    cached_channels = get_entities('channel', set(known_channel_ids), ENTITY_CACHE_TTL_SECONDS['channel'])
+    calls = {'channels.list': math.ceil(max(0, channel_count - len(cached_channels)) / MAX_IDS_PER_REQUEST)}
+    return QuotaPlan(calls, remaining_quota_today() if remaining_quota is None else remaining_quota)
@@ -0,0 +1,116 @@
+"""
+Theo dõi hạn ngạch (quota) của từng API key và chọn key còn nhiều quota nhất trước mỗi lần gọi.
+Mỗi lần gọi được tính đúng chi phí của endpoint (search.list = 100, các list khác = 1, ...)
+và lưu vào bảng key_usage để không mất khi khởi động lại ứng dụng.
+"""
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+from config import API_DAILY_QUOTA_PER_KEY, API_QUOTA_COSTS
+from db_cache import load_key_usage, save_key_usage
+
+logger = logging.getLogger(__name__)
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+    try:
+        _PACIFIC_TZ = ZoneInfo('America/Los_Angeles')
+    except ZoneInfoNotFoundError:
+        _PACIFIC_TZ = None
+except ImportError:
+    _PACIFIC_TZ = None
+
+
+def quota_day_start(now=None):
+    """Epoch seconds of the last midnight in Pacific time, when YouTube resets daily quota."""
+    # Windows không có dữ liệu múi giờ nếu thiếu gói tzdata: dùng UTC-8 cố định
+    tz = _PACIFIC_TZ or timezone(timedelta(hours=-8))
+    now_pacific = (now or datetime.now(timezone.utc)).astimezone(tz)
+    return now_pacific.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+
+def quota_cost(endpoint):
+    return API_QUOTA_COSTS.get(endpoint, 1)
+
+
+def key_fingerprint(api_key):
+    """Keys are stored in key_usage by fingerprint so the cache DB never holds raw keys."""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+
+
+class QuotaScheduler:
+    def __init__(self, daily_quota=API_DAILY_QUOTA_PER_KEY):
+        self.daily_quota = daily_quota
+        self._lock = threading.Lock()
+        self._used = {}             # api_key -> units used in the current quota day
+        self._server_exhausted = set()  # keys that got quotaExceeded from the API today
+        self._day_start = quota_day_start()
+
+    def load_keys(self, api_keys):
+        """Load today's usage of the given keys from key_usage (older days count as 0)."""
+        with self._lock:
+            self._day_start = quota_day_start()
+            self._server_exhausted.clear()
+            stored = load_key_usage([key_fingerprint(key) for key in api_keys])
+            self._used = {}
+            for key in api_keys:
+                used_quota, last_reset = stored.get(key_fingerprint(key), (0, 0))
+                self._used[key] = used_quota if last_reset >= self._day_start else 0
+
+    def _roll_over_if_new_day(self):
+        day_start = quota_day_start()
+        if day_start > self._day_start:
+            logger.info("Đã sang ngày quota mới (giờ Thái Bình Dương), đặt lại quota của các key.")
+            self._day_start = day_start
+            self._server_exhausted.clear()
+            self._used = {key: 0 for key in self._used}
+
+    def remaining(self, api_key):
+        with self._lock:
+            self._roll_over_if_new_day()
+            return self.daily_quota - self._used.get(api_key, 0)
+
+    def remaining_by_key(self):
+        with self._lock:
+            self._roll_over_if_new_day()
+            return {key: self.daily_quota - used for key, used in self._used.items()}
+
+    def rank_keys(self, cost, exclude=()):
+        """
+        Return the usable keys ordered by remaining budget (most first).
+        When the local estimate says no key can pay for cost, keys the API has not rejected
+        yet are still returned (the estimate can drift from Google's own count).
+        The list is empty only when every key is excluded or rejected by the API today.
+        """
+        with self._lock:
+            self._roll_over_if_new_day()
+            candidates = [key for key in self._used
+                          if key not in exclude and key not in self._server_exhausted]
+            candidates.sort(key=lambda key: self._used[key])
+            if candidates and self.daily_quota - self._used[candidates[0]] < cost:
+                logger.warning(f"Quota ước tính của mọi key đã hết, vẫn thử key {candidates[0][:10]}...")
+            return candidates
+
+    def charge(self, api_key, cost):
+        with self._lock:
+            self._roll_over_if_new_day()
+            if api_key not in self._used:
+                return
+            self._used[api_key] += cost
+            used_quota = self._used[api_key]
+            day_start = self._day_start
+        save_key_usage(key_fingerprint(api_key), used_quota, day_start)
+
+    def mark_exhausted(self, api_key):
+        """Called when the API answers quotaExceeded: the key is skipped until the next reset."""
+        with self._lock:
+            self._roll_over_if_new_day()
+            if api_key not in self._used:
+                return
+            self._server_exhausted.add(api_key)
+            self._used[api_key] = max(self._used[api_key], self.daily_quota)
+            used_quota = self._used[api_key]
+            day_start = self._day_start
+        save_key_usage(key_fingerprint(api_key), used_quota, day_start)
@@ -0,0 +1,119 @@
+"""
+Bộ lọc kết quả dạng vector: các cột số, ngày đăng và thời lượng được chuẩn hóa MỘT lần
+thành mảng NumPy int64 (ngày = epoch giây, thời lượng = giây; giá trị thiếu = -1),
+sau đó mỗi lần đổi bộ lọc chỉ là vài phép so sánh trên mảng, trả về mảng chỉ số dòng cho view.
+"""
+import logging
+from datetime import datetime, timezone
+
+import numpy as np
+
+from services.result_store import MISSING_INT
+
+logger = logging.getLogger(__name__)
+
+
+def iso_to_epoch(value):
+    """RFC 3339 / ISO 8601 string to epoch seconds, MISSING_INT when absent or unparsable."""
+    if not value or not isinstance(value, str):
+        return MISSING_INT
+    try:
+        dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return MISSING_INT
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def duration_text_to_seconds(duration_str):
+    """Chuyển chuỗi thời lượng (HH:MM:SS, MM:SS, SS) thành giây; 0 nếu không đọc được."""
+    if not duration_str or not isinstance(duration_str, str):
+        return 0
+    parts = duration_str.strip().split(':')
+    seconds = 0
+    try:
+        if len(parts) == 1:
+            seconds = int(parts[0])
+        elif len(parts) == 2:
+            seconds = int(parts[0]) * 60 + int(parts[1])
+        elif len(parts) == 3:
+            seconds = int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
+    except (ValueError, IndexError):
+        return 0
+    return seconds
+
+
+class ResultFilterEngine:
+    """
+    Typed int64 columns mirroring a ResultStore. int_fields are copied as they are,
+    date_fields become epoch seconds and duration_fields ("HH:MM:SS" text) become seconds.
+    sync() converts only the rows appended since the last call, so streamed results are
+    normalized once; select() then filters every row with vectorized masks.
+    """
+
+    def __init__(self, int_fields=(), date_fields=(), duration_fields=()):
+        self.int_fields = tuple(int_fields)
+        self.date_fields = tuple(date_fields)
+        self.duration_fields = tuple(duration_fields)
+        self._columns = {}
+        self._length = 0
+        self._generation = None
+        self.reset()
+
+    def __len__(self):
+        return self._length
+
+    def reset(self):
+        fields = self.int_fields + self.date_fields + self.duration_fields
+        self._columns = {field: np.empty(0, dtype=np.int64) for field in fields}
+        self._length = 0
+
+    def sync(self, store):
+        """Normalizes the rows of store added since the last sync (the store is append-only)."""
+        if store.generation != self._generation or len(store) < self._length:
+            # Kho đã bị xóa và nạp lại từ đầu
+            self.reset()
+            self._generation = store.generation
+        start = self._length
+        end = len(store)
+        if start == end:
+            return
+
+        for field in self.int_fields:
+            # Cột số nguyên của ResultStore đã là array('q'): chỉ cần sao chép sang int64
+            new_values = np.array(store.column(field)[start:end], dtype=np.int64)
+            self._columns[field] = np.concatenate((self._columns[field], new_values))
+        for field in self.date_fields:
+            raw_values = store.column(field)[start:end]
+            new_values = np.fromiter((iso_to_epoch(value) for value in raw_values), dtype=np.int64, count=end - start)
+            self._columns[field] = np.concatenate((self._columns[field], new_values))
+        for field in self.duration_fields:
+            raw_values = store.column(field)[start:end]
+            new_values = np.fromiter((duration_text_to_seconds(value) for value in raw_values), dtype=np.int64, count=end - start)
+            self._columns[field] = np.concatenate((self._columns[field], new_values))
+        self._length = end
+
+    def column(self, field):
+        return self._columns[field]
+
+    def mask(self, minimums=None, since=None, start=0):
+        """
+        Boolean mask of the rows from start on that pass every filter.
+        minimums maps a field to its lower bound (missing values count as 0, a bound <= 0
+        disables the filter); since maps a date field to the earliest epoch second allowed
+        (rows without a date are kept).
+        """
+        row_mask = np.ones(self._length - start, dtype=bool)
+        for field, minimum in (minimums or {}).items():
+            if minimum and minimum > 0:
+                row_mask &= self._columns[field][start:] >= minimum
+        for field, cutoff in (since or {}).items():
+            if cutoff is not None:
+                dates = self._columns[field][start:]
+                row_mask &= (dates >= cutoff) | (dates == MISSING_INT)
+        return row_mask
+
+    def select(self, minimums=None, since=None, start=0):
+        """Store row indices (int64 array, ascending) of the rows from start on that pass every filter."""
+        return start + np.flatnonzero(self.mask(minimums, since, start))
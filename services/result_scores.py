@@ -0,0 +1,160 @@
+"""
+Điểm đột phá (outlier) cho tập kết quả video, tính theo lô bằng NumPy:
+lượt xem / người đăng ký, lượt xem mỗi ngày kể từ khi đăng, bội số so với video trung vị của kênh
+và tỉ lệ tương tác (bình luận / lượt xem). Giá trị không xác định là NaN (None khi ghi vào ResultStore).
+"""
+import logging
+import time
+
+import numpy as np
+
+from config import SCORE_MIN_AGE_DAYS, SCORE_MIN_CHANNEL_VIDEOS
+from services.result_filters import ResultFilterEngine
+
+logger = logging.getLogger(__name__)
+
+SCORE_FIELDS = ('views_per_sub', 'views_per_day', 'channel_multiple', 'engagement')
+
+SECONDS_PER_DAY = 86400
+
+
+def _ratio(numerators, denominators, valid):
+    out = np.full(numerators.shape, np.nan)
+    np.divide(numerators, denominators, out=out, where=valid)
+    return out
+
+
+def group_medians(values, group_codes, group_count):
+    """Median of values per group (NaN for empty groups); values must not contain missing entries."""
+    counts = np.bincount(group_codes, minlength=group_count)
+    medians = np.full(group_count, np.nan)
+    if values.size == 0:
+        return medians, counts
+    order = np.lexsort((values, group_codes))
+    sorted_values = values[order].astype(np.float64)
+    starts = np.cumsum(counts) - counts
+    present = counts > 0
+    lower = starts[present] + (counts[present] - 1) // 2
+    upper = starts[present] + counts[present] // 2
+    medians[present] = (sorted_values[lower] + sorted_values[upper]) / 2
+    return medians, counts
+
+
+def compute_scores(views, subscribers, comments, upload_epochs, channel_codes, channel_count,
+                   channel_views=None, channel_videos=None, now=None):
+    """
+    Score columns for parallel int64 arrays (-1 = missing; upload_epochs in epoch seconds,
+    channel_codes in 0..channel_count-1). The channel baseline is the median views of that
+    channel's videos in the set when it has at least SCORE_MIN_CHANNEL_VIDEOS of them,
+    otherwise channel_views / channel_videos (lifetime average) when those are given.
+    Returns {field: float64 array} for SCORE_FIELDS.
+    """
+    now = time.time() if now is None else now
+    has_views = views >= 0
+
+    views_per_sub = _ratio(views, subscribers, has_views & (subscribers > 0))
+
+    age_days = np.maximum((now - upload_epochs) / SECONDS_PER_DAY, SCORE_MIN_AGE_DAYS)
+    views_per_day = _ratio(views, age_days, has_views & (upload_epochs >= 0))
+
+    engagement = _ratio(comments, views, (views > 0) & (comments >= 0))
+
+    medians, counts = group_medians(views[has_views], channel_codes[has_views], channel_count)
+    baselines = np.where(counts >= SCORE_MIN_CHANNEL_VIDEOS, medians, np.nan)[channel_codes]
+    if channel_views is not None and channel_videos is not None:
+        lifetime_average = _ratio(channel_views, channel_videos, (channel_views >= 0) & (channel_videos > 0))
+        baselines = np.where(np.isnan(baselines), lifetime_average, baselines)
+    channel_multiple = _ratio(views, baselines, has_views & (baselines > 0))
+
+    return {
+        'views_per_sub': views_per_sub,
+        'views_per_day': views_per_day,
+        'channel_multiple': channel_multiple,
+        'engagement': engagement,
+    }
+
+
+class ResultScorer:
+    """
+    Keeps the normalized inputs of a ResultStore (through a ResultFilterEngine, so new rows are
+    converted once) and recomputes every score column in bulk after rows are appended.
+    channel_field groups videos of the same channel (e.g. channel URL or title).
+    """
+
+    def __init__(self, channel_field, view_field='view_count', subscriber_field='subscriber_count',
+                 comment_field='comment_count', date_field='upload_date',
+                 channel_views_field=None, channel_videos_field=None):
+        self.channel_field = channel_field
+        self.view_field = view_field
+        self.subscriber_field = subscriber_field
+        self.comment_field = comment_field
+        self.date_field = date_field
+        self.channel_views_field = channel_views_field
+        self.channel_videos_field = channel_videos_field
+        int_fields = [view_field, subscriber_field, comment_field]
+        if channel_views_field and channel_videos_field:
+            int_fields += [channel_views_field, channel_videos_field]
+        self._inputs = ResultFilterEngine(int_fields=int_fields, date_fields=(date_field,))
+        self._channel_ids = {}
+        self._channel_codes = np.empty(0, dtype=np.int64)
+        # Mã kênh -> các dòng của kênh đó, để chấm lại đúng những kênh vừa có thêm video
+        self._rows_by_channel = []
+        self._generation = None
+
+    def _sync(self, store):
+        """Normalizes the rows appended since the last call; returns the first new row."""
+        if store.generation != self._generation or len(store) < len(self._channel_codes):
+            self._channel_ids = {}
+            self._channel_codes = np.empty(0, dtype=np.int64)
+            self._rows_by_channel = []
+            self._generation = store.generation
+        self._inputs.sync(store)
+
+        start = len(self._channel_codes)
+        new_keys = store.column(self.channel_field)[start:len(store)]
+        new_codes = np.fromiter(
+            (self._channel_ids.setdefault(key, len(self._channel_ids)) for key in new_keys),
+            dtype=np.int64, count=len(new_keys)
+        )
+        self._rows_by_channel.extend([] for _ in range(len(self._channel_ids) - len(self._rows_by_channel)))
+        for row, code in enumerate(new_codes.tolist(), start):
+            self._rows_by_channel[code].append(row)
+        self._channel_codes = np.concatenate((self._channel_codes, new_codes))
+        return start
+
+    def _scores(self, rows, channel_codes, channel_count, now):
+        column = self._inputs.column
+        pick = (lambda values: values) if rows is None else (lambda values: values[rows])
+        has_lifetime = self.channel_views_field and self.channel_videos_field
+        scores = compute_scores(
+            pick(column(self.view_field)), pick(column(self.subscriber_field)), pick(column(self.comment_field)),
+            pick(column(self.date_field)), channel_codes, channel_count,
+            channel_views=pick(column(self.channel_views_field)) if has_lifetime else None,
+            channel_videos=pick(column(self.channel_videos_field)) if has_lifetime else None,
+            now=now
+        )
+        # NaN -> None để bảng hiển thị "N/A" và file xuất để trống
+        return {
+            field: [None if value != value else value for value in values.tolist()]
+            for field, values in scores.items()
+        }
+
+    def update(self, store, now=None):
+        """Returns {field: list of float or None} covering every row of store."""
+        self._sync(store)
+        return self._scores(None, self._channel_codes, len(self._channel_ids), now)
+
+    def update_appended(self, store, now=None):
+        """
+        Scores only what rows appended since the last call can change: the new rows and the
+        earlier rows of their channels (whose baseline moved). Returns (store rows, {field: list})
+        with the values in the order of the rows.
+        """
+        start = self._sync(store)
+        touched = np.unique(self._channel_codes[start:])
+        if touched.size == 0:
+            return [], {field: [] for field in SCORE_FIELDS}
+        rows = np.concatenate([np.array(self._rows_by_channel[code], dtype=np.int64) for code in touched.tolist()])
+        # Mã kênh đánh lại 0..len(touched)-1 cho tập con
+        local_codes = np.searchsorted(touched, self._channel_codes[rows])
+        return rows.tolist(), self._scores(rows, local_codes, touched.size, now)
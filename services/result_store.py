@@ -0,0 +1,80 @@
+"""
+Kho kết quả dạng cột cho các bảng kết quả lớn (hàng chục nghìn video).
+Mỗi trường là một cột riêng: cột số nguyên dùng array('q') (giá trị thiếu = -1, giống quy ước
+"N/A"/"Bị ẩn" cũ của bảng), các cột khác là list. Lấy bản ghi theo chỉ số dòng là O(1).
+"""
+import logging
+from array import array
+
+logger = logging.getLogger(__name__)
+
+MISSING_INT = -1
+
+
+def _to_int(value):
+    if value is None:
+        return MISSING_INT
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return MISSING_INT
+
+
+class ResultStore:
+    def __init__(self, fields, int_fields=()):
+        self.fields = list(dict.fromkeys(fields))
+        self.int_fields = set(int_fields)
+        self._columns = {
+            field: array('q') if field in self.int_fields else []
+            for field in self.fields
+        }
+        self._length = 0
+        # Tăng mỗi lần clear() để các bản sao (ví dụ ResultFilterEngine) biết phải dựng lại
+        self.generation = 0
+
+    def __len__(self):
+        return self._length
+
+    def append(self, records):
+        """Appends dict records; fields missing from a record are stored as None / -1."""
+        for field, column in self._columns.items():
+            if field in self.int_fields:
+                column.extend(_to_int(record.get(field)) for record in records)
+            else:
+                column.extend(record.get(field) for record in records)
+        self._length += len(records)
+
+    def clear(self):
+        for field in self.fields:
+            self._columns[field] = array('q') if field in self.int_fields else []
+        self._length = 0
+        self.generation += 1
+
+    def column(self, field):
+        """The whole column (array('q') for int fields, list otherwise); do not modify it."""
+        return self._columns[field]
+
+    def set_column(self, field, values):
+        """Replaces a whole (non-int) column, e.g. derived scores recomputed in bulk."""
+        if len(values) != self._length:
+            raise ValueError(f"Cột '{field}' cần {self._length} giá trị, nhận {len(values)}")
+        self._columns[field] = list(values)
+
+    def value(self, row, field):
+        return self._columns[field][row]
+
+    def set_value(self, row, field, value):
+        self._columns[field][row] = _to_int(value) if field in self.int_fields else value
+
+    def record(self, row):
+        """Rebuilds the dict of one row (missing ints come back as None)."""
+        record = {}
+        for field, column in self._columns.items():
+            value = column[row]
+            if field in self.int_fields and value == MISSING_INT:
+                value = None
+            record[field] = value
+        return record
+
+    def records(self):
+        return [self.record(row) for row in range(self._length)]
@@ -0,0 +1,96 @@
+import datetime
+
+import pytest
+
+import db_cache
+from services import channel_sync
+
+DAY = 86400
+NOW = 1_800_000_000
+
+
+def _iso(epoch):
+    return datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class FakeChannel:
+    """Uploads playlist of one channel, newest first, one video per day."""
+
+    def __init__(self, count):
+        self.videos = []
+        self.detail_requests = []
+        self.add_uploads(count)
+
+    def add_uploads(self, count):
+        newest = self.videos[0][1] if self.videos else NOW - 1000 * DAY
+        start = len(self.videos)
+        self.videos[:0] = [(f"v{start + i:05d}", newest + i * DAY) for i in range(count, 0, -1)]
+
+    def get_playlist_items(self, part, playlistId, maxResults, pageToken):
+        start = int(pageToken or 0)
+        page = self.videos[start:start + maxResults]
+        response = {'items': [{
+            'snippet': {'resourceId': {'kind': 'youtube#video', 'videoId': video_id}, 'publishedAt': _iso(epoch)},
+            'contentDetails': {'videoPublishedAt': _iso(epoch)},
+        } for video_id, epoch in page]}
+        if start + maxResults < len(self.videos):
+            response['nextPageToken'] = str(start + maxResults)
+        return response
+
+    def get_video_details_batch(self, video_ids, part, progress_callback=None, is_cancelled=None):
+        self.detail_requests.extend(video_ids)
+        published = dict(self.videos)
+        return [{'id': video_id, 'snippet': {'title': video_id, 'publishedAt': _iso(published[video_id])},
+                 'statistics': {'viewCount': '1'}} for video_id in video_ids]
+
+
+@pytest.fixture
+def channel(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_cache, 'DB_PATH', str(tmp_path / 'cache.db'))
+    db_cache.init_db()
+    channel_sync.init_channel_sync()
+    fake = FakeChannel(300)
+    monkeypatch.setattr(channel_sync, 'YouTubeService', lambda refresh_cache=False: fake)
+    yield fake
+    db_cache.close_connection()
+
+
+def _sync(fake, **kwargs):
+    return [video.video_id for video in channel_sync.sync_channel_uploads(fake, 'UC1', 'UU1', **kwargs)]
+
+
+@pytest.mark.parametrize('limit', [
+    {'published_after': NOW - 30 * DAY},
+    {'max_videos': 20},
+])
+def test_limited_sync_then_unlimited_sync_returns_every_upload(channel, limit):
+    assert len(_sync(channel)) == 300
+    channel.add_uploads(100)
+    if 'published_after' in limit:
+        # Mốc thời gian nằm trong khoảng 100 video mới
+        limit = {'published_after': channel.videos[30][1]}
+
+    limited = _sync(channel, **limit)
+    assert limited == [video_id for video_id, _ in channel.videos[:len(limited)]]
+
+    assert _sync(channel) == [video_id for video_id, _ in channel.videos]
+    assert channel_sync.get_cursor('UC1')['last_video_id'] == channel.videos[0][0]
+
+
+def test_incremental_sync_stops_at_cursor(channel):
+    _sync(channel)
+    channel.add_uploads(3)
+    assert _sync(channel)[:3] == [video_id for video_id, _ in channel.videos[:3]]
+    assert channel_sync.get_cursor('UC1')['video_count'] == 303
+
+
+@pytest.mark.parametrize('limit, expected', [
+    ({'max_videos': 10}, 10),
+    ({'published_after': NOW - 1000 * DAY + 295 * DAY}, 6),
+])
+def test_refresh_stays_inside_the_window(channel, limit, expected):
+    _sync(channel)
+    channel.detail_requests.clear()
+
+    assert len(_sync(channel, **limit)) == expected
+    assert channel.detail_requests == [video_id for video_id, _ in channel.videos[:expected]]
@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+import db_cache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_cache, 'DB_PATH', str(tmp_path / 'cache.db'))
+    monkeypatch.setattr(db_cache, 'memory_cache', db_cache.MemoryLRUCache(100, 1024 * 1024))
+    db_cache.init_db()
+    yield
+    db_cache.close_connection()
+
+
+def test_memory_hits_keep_entries_from_size_eviction(cache):
+    db_cache.set_cache('hot', {'value': 'x' * 2000})
+    time.sleep(0.01)
+    db_cache.set_cache('cold', {'value': 'y' * 2000})
+    time.sleep(0.01)
+    # Chỉ trúng L1, không đọc SQLite
+    assert db_cache.get_cache('hot') == {'value': 'x' * 2000}
+
+    size = db_cache.get_cache_size_bytes()
+    db_cache.enforce_max_size(size - 1, batch_size=1)
+
+    keys = {row[0] for row in db_cache.get_connection().execute('SELECT key FROM api_cache')}
+    assert keys == {'hot'}
+
+
+def test_disk_counters_are_thread_safe(cache):
+    def miss_many():
+        for i in range(500):
+            db_cache.get_cache(f'missing-{i}')
+        db_cache.close_connection()
+
+    threads = [threading.Thread(target=miss_many) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert db_cache.get_cache_stats()['disk_misses'] == 2000
+
+
+def test_eviction_removes_only_the_excess_and_forgets_it_in_memory(cache):
+    for i in range(5):
+        db_cache.set_cache(f'key-{i}', {'value': str(i) * 2000})
+        time.sleep(0.01)
+
+    db_cache.enforce_max_size(db_cache.get_cache_size_bytes() - 1)
+
+    keys = {row[0] for row in db_cache.get_connection().execute('SELECT key FROM api_cache')}
+    assert keys == {f'key-{i}' for i in range(1, 5)}
+    assert db_cache.get_cache('key-0') is None
+
+
+def test_purge_expired_forgets_entries_in_memory(cache):
+    db_cache.set_entities('video', [{'id': 'v1', 'snippet': {}}], {'snippet'}, 3600)
+    db_cache.get_connection().execute('UPDATE entity_cache SET fetched_at = fetched_at - 7200')
+
+    assert db_cache.purge_expired(entity_max_age_seconds=3600) == 1
+    assert db_cache.get_entities('video', ['v1'], 10 ** 9) == {}
@@ -0,0 +1,36 @@
+import pytest
+
+import db_cache
+from services import local_corpus
+
+
+def _channel(channel_id, title, subscribers, videos, hidden=False):
+    return {
+        'id': channel_id,
+        'snippet': {'title': title, 'description': '', 'publishedAt': '2020-01-01T00:00:00Z'},
+        'statistics': {'subscriberCount': str(subscribers), 'hiddenSubscriberCount': hidden,
+                       'videoCount': str(videos), 'viewCount': '1000'},
+    }
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_cache, 'DB_PATH', str(tmp_path / 'cache.db'))
+    db_cache.init_db()
+    if not local_corpus.init_corpus():
+        pytest.skip("SQLite không có FTS5")
+    local_corpus.index_items('channel', [
+        _channel('UC1', 'Nấu ăn mỗi ngày', 500, 20),
+        _channel('UC2', 'Nấu ăn chuyên nghiệp', 2_000_000, 900),
+        _channel('UC3', 'Nấu ăn bí mật', 0, 5, hidden=True),
+        _channel('UC4', 'Review điện thoại', 100, 10),
+    ])
+    yield
+    db_cache.close_connection()
+
+
+def test_search_channels_applies_the_upper_limits(corpus):
+    assert {match['id'] for match in local_corpus.search_channels('nau an')} == {'UC1', 'UC2', 'UC3'}
+    small = local_corpus.search_channels('nấu', max_subscribers=1000, max_videos=100)
+    # Kênh ẩn số sub vẫn được giữ, giống tìm kênh bằng API
+    assert {match['id'] for match in small} == {'UC1', 'UC3'}
@@ -0,0 +1,22 @@
+from services.ngram_analytics import _flatten_phrases, analyze_ngrams, tokenize
+
+
+def test_flatten_phrases_matches_per_phrase_tokenize():
+    titles = ['Học tiếng Anh | tập 12', None, 'Review điện thoại, giá rẻ!']
+    tags = [['học tiếng anh', 'a-b c'], None, ['giá\x00rẻ', 'điện   thoại']]
+    words, token_ids, phrase_of_token, video_of_token = _flatten_phrases(titles, tags, True, True)
+
+    phrases = {}
+    for token_id, phrase, video in zip(token_ids, phrase_of_token, video_of_token):
+        phrases.setdefault((int(video), int(phrase)), []).append(words[token_id])
+    expected = [tokenize(text) for text in ['Học tiếng Anh | tập 12', 'học tiếng anh', 'Review điện thoại, giá rẻ!',
+                                            'giá rẻ', 'điện   thoại']]
+    assert list(phrases.values()) == expected
+    assert [video for video, _ in phrases] == [0, 0, 2, 2, 2]
+
+
+def test_ngrams_do_not_cross_phrase_boundaries():
+    results = analyze_ngrams(['nấu ăn'] * 3, [['ngon miệng']] * 3, [10] * 3, [100] * 3, min_videos=3)
+    terms = {result['term'] for result in results}
+    assert {'nấu ăn', 'ngon miệng'} <= terms
+    assert 'ăn ngon' not in terms
@@ -5,5 +5,12 @@ Contains reusable UI components used across different tabs.
 """
 
 from .activity_log_widget import ActivityLogWidget
+from .quota_plan_dialog import confirm_quota_plan, PLAN_RUN, PLAN_THROTTLE
+from .result_table_model import ResultColumn, ResultTableModel, ResultFilterProxyModel, SCORE_RESULT_COLUMNS
+from .ngram_dialog import NgramAnalyticsDialog
 
-__all__ = ['ActivityLogWidget']
+__all__ = [
+    'ActivityLogWidget', 'confirm_quota_plan', 'PLAN_RUN', 'PLAN_THROTTLE',
+    'ResultColumn', 'ResultTableModel', 'ResultFilterProxyModel', 'SCORE_RESULT_COLUMNS',
+    'NgramAnalyticsDialog'
+]
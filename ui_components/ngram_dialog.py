@@ -0,0 +1,134 @@
+# ui_components/ngram_dialog.py
+
+"""
+Hộp thoại hiển thị các cụm từ (1-3 từ) trong tiêu đề/thẻ của tập kết quả, xếp hạng theo điểm cơ hội.
+Dữ liệu được chụp lại một lần khi mở; đổi tùy chọn chỉ chạy lại phần phân tích (services/ngram_analytics.py).
+"""
+
+import logging
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QCheckBox, QSpinBox,
+    QTableWidget, QTableWidgetItem, QAbstractItemView, QPushButton, QApplication
+)
+from PyQt6.QtCore import Qt
+
+from config import NGRAM_MIN_VIDEOS, NGRAM_TOP_TERMS
+from services.ngram_analytics import analyze_ngrams
+
+logger = logging.getLogger(__name__)
+
+RANK_OPTIONS = {
+    "Điểm cơ hội": 'opportunity',
+    "Lượt xem / Sub TB": 'avg_views_per_sub',
+    "Tổng lượt xem": 'total_views',
+    "Lượt xem TB": 'avg_views',
+    "Số video": 'video_count',
+}
+
+NGRAM_COLUMNS = [
+    ("Cụm từ", 'term', 220),
+    ("Số từ", 'words', 60),
+    ("Số video", 'video_count', 80),
+    ("Tổng lượt xem", 'total_views', 120),
+    ("Lượt xem TB", 'avg_views', 110),
+    ("Lượt xem / Sub TB", 'avg_views_per_sub', 120),
+    ("Điểm cơ hội", 'opportunity', 100),
+]
+
+
+class NgramAnalyticsDialog(QDialog):
+    """titles/tags/view_counts/subscriber_counts are parallel per-video lists (see analyze_ngrams)."""
+
+    def __init__(self, titles, tags, view_counts, subscriber_counts, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Phân tích từ khóa ({len(titles)} video)")
+        self.resize(900, 600)
+        self._data = (titles, tags, view_counts, subscriber_counts)
+        self.results = []
+
+        layout = QVBoxLayout(self)
+        options_layout = QHBoxLayout()
+        options_layout.addWidget(QLabel("Xếp hạng theo:"))
+        self.combo_rank = QComboBox()
+        self.combo_rank.addItems(RANK_OPTIONS.keys())
+        options_layout.addWidget(self.combo_rank)
+        self.check_titles = QCheckBox("Tiêu đề")
+        self.check_titles.setChecked(True)
+        options_layout.addWidget(self.check_titles)
+        self.check_tags = QCheckBox("Thẻ (Tags)")
+        self.check_tags.setChecked(True)
+        options_layout.addWidget(self.check_tags)
+        options_layout.addWidget(QLabel("Số video tối thiểu:"))
+        self.spin_min_videos = QSpinBox()
+        self.spin_min_videos.setRange(1, 100000)
+        self.spin_min_videos.setValue(NGRAM_MIN_VIDEOS)
+        options_layout.addWidget(self.spin_min_videos)
+        options_layout.addStretch()
+        layout.addLayout(options_layout)
+
+        self.table = QTableWidget(0, len(NGRAM_COLUMNS))
+        self.table.setHorizontalHeaderLabels([header for header, _, _ in NGRAM_COLUMNS])
+        for i, (_, _, width) in enumerate(NGRAM_COLUMNS):
+            self.table.setColumnWidth(i, width)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        layout.addWidget(self.table)
+
+        bottom_layout = QHBoxLayout()
+        self.lbl_summary = QLabel()
+        bottom_layout.addWidget(self.lbl_summary)
+        bottom_layout.addStretch()
+        btn_copy = QPushButton("Sao chép cụm từ")
+        btn_copy.clicked.connect(self._copy_terms)
+        bottom_layout.addWidget(btn_copy)
+        btn_close = QPushButton("Đóng")
+        btn_close.clicked.connect(self.accept)
+        bottom_layout.addWidget(btn_close)
+        layout.addLayout(bottom_layout)
+
+        self.combo_rank.currentIndexChanged.connect(self.refresh)
+        self.check_titles.toggled.connect(self.refresh)
+        self.check_tags.toggled.connect(self.refresh)
+        self.spin_min_videos.editingFinished.connect(self.refresh)
+        self.refresh()
+
+    def refresh(self):
+        titles, tags, view_counts, subscriber_counts = self._data
+        try:
+            self.results = analyze_ngrams(
+                titles, tags, view_counts, subscriber_counts,
+                min_videos=self.spin_min_videos.value(),
+                top_k=NGRAM_TOP_TERMS,
+                rank_by=RANK_OPTIONS[self.combo_rank.currentText()],
+                use_title=self.check_titles.isChecked(),
+                use_tags=self.check_tags.isChecked()
+            )
+        except Exception as e:
+            logger.exception(f"Lỗi phân tích n-gram: {e}")
+            self.results = []
+            self.lbl_summary.setText(f"Lỗi phân tích: {e}")
+        else:
+            self.lbl_summary.setText(f"{len(self.results)} cụm từ (tối đa {NGRAM_TOP_TERMS})")
+        self._fill_table()
+
+    def _fill_table(self):
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(self.results))
+        for row, result in enumerate(self.results):
+            for col, (_, key, _) in enumerate(NGRAM_COLUMNS):
+                value = result[key]
+                item = QTableWidgetItem()
+                if isinstance(value, float):
+                    value = round(value, 2)
+                # Đặt giá trị số (không phải chuỗi) để cột sắp xếp đúng thứ tự
+                item.setData(Qt.ItemDataRole.DisplayRole, value)
+                if key != 'term':
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(row, col, item)
+        self.table.setSortingEnabled(True)
+
+    def _copy_terms(self):
+        rows = sorted({index.row() for index in self.table.selectedIndexes()}) or range(self.table.rowCount())
+        terms = [self.table.item(row, 0).text() for row in rows]
+        QApplication.clipboard().setText("\n".join(terms))
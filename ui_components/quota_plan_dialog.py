@@ -0,0 +1,44 @@
+# ui_components/quota_plan_dialog.py
+
+"""
+Hộp thoại xác nhận trước khi chạy một tác vụ lớn khi ước tính quota vượt quá quota còn lại hôm nay.
+"""
+
+import logging
+from PyQt6.QtWidgets import QMessageBox
+
+logger = logging.getLogger(__name__)
+
+PLAN_RUN = 'run'
+PLAN_THROTTLE = 'throttle'
+
+
+def confirm_quota_plan(parent, plan, throttle_text=None):
+    """
+    Returns PLAN_RUN when the job fits today's quota or the user runs it anyway,
+    PLAN_THROTTLE when the user accepts the reduced job described by throttle_text,
+    and None when the user cancels.
+    """
+    logger.info(plan.summary().replace('\n', ' '))
+    if plan.fits:
+        return PLAN_RUN
+
+    box = QMessageBox(parent)
+    box.setIcon(QMessageBox.Icon.Warning)
+    box.setWindowTitle("Có thể không đủ quota")
+    box.setText("Tác vụ này có thể dùng hết quota trước khi hoàn tất.")
+    box.setInformativeText(plan.summary())
+    throttle_button = None
+    if throttle_text and plan.affordable_fraction > 0:
+        throttle_button = box.addButton(throttle_text, QMessageBox.ButtonRole.AcceptRole)
+    run_button = box.addButton("Vẫn chạy", QMessageBox.ButtonRole.DestructiveRole)
+    box.addButton("Hủy", QMessageBox.ButtonRole.RejectRole)
+    box.setDefaultButton(throttle_button or run_button)
+    box.exec()
+
+    clicked = box.clickedButton()
+    if throttle_button is not None and clicked is throttle_button:
+        return PLAN_THROTTLE
+    if clicked is run_button:
+        return PLAN_RUN
+    return None
@@ -0,0 +1,257 @@
+# ui_components/result_table_model.py
+
+"""
+Model/view cho các bảng kết quả lớn: ResultTableModel đọc trực tiếp từ ResultStore (dạng cột)
+và chỉ định dạng các ô mà view yêu cầu (các dòng đang hiển thị); bộ lọc được áp dụng bằng một
+mảng chỉ số dòng tính sẵn (xem services/result_filters.py). ResultFilterProxyModel sắp xếp
+theo giá trị thô.
+"""
+
+import logging
+from PyQt6.QtCore import Qt, QAbstractTableModel, QSortFilterProxyModel, QModelIndex
+from PyQt6.QtGui import QColor, QFont
+
+from services.result_store import ResultStore, MISSING_INT
+from utils import format_date_dd_mm_yyyy, format_int_with_separator
+
+logger = logging.getLogger(__name__)
+
+LINK_COLOR = QColor('#4da6ff')
+
+
+class ResultColumn:
+    """
+    One table column. kind is 'text', 'int', 'date' (ISO string), 'list', 'link'
+    (underlined, opens on click), 'score' (float, None when undefined; decimals digits shown)
+    or 'action' (constant text such as "Mở", no field).
+    """
+
+    def __init__(self, header, field=None, kind='text', width=None, tooltip=None,
+                 missing_text='N/A', action_text='', decimals=2):
+        self.header = header
+        self.field = field
+        self.kind = kind
+        self.width = width
+        self.tooltip = tooltip
+        self.missing_text = missing_text
+        self.action_text = action_text
+        self.decimals = decimals
+
+
+# Cột điểm đột phá dùng chung cho các bảng video (tính bởi services.result_scores.ResultScorer)
+SCORE_RESULT_COLUMNS = [
+    ResultColumn("Xem/Sub", 'views_per_sub', kind='score', width=80,
+                 tooltip="Lượt xem chia cho số người đăng ký của kênh"),
+    ResultColumn("Xem/Ngày", 'views_per_day', kind='score', width=90, decimals=0,
+                 tooltip="Lượt xem trung bình mỗi ngày kể từ khi đăng"),
+    ResultColumn("Bội số kênh", 'channel_multiple', kind='score', width=90,
+                 tooltip="Lượt xem so với video trung vị của kênh (hoặc lượt xem trung bình trọn đời của kênh)"),
+    ResultColumn("Tương tác", 'engagement', kind='score', width=80, decimals=4,
+                 tooltip="Số bình luận chia cho lượt xem"),
+]
+
+
+class ResultTableModel(QAbstractTableModel):
+    def __init__(self, columns, parent=None, extra_fields=()):
+        super().__init__(parent)
+        self.columns = list(columns)
+        # extra_fields: trường được lưu trong store nhưng không có cột hiển thị (vd. id kênh để chấm điểm)
+        fields = [column.field for column in self.columns if column.field] + ['id', *extra_fields]
+        int_fields = [column.field for column in self.columns if column.kind == 'int']
+        self.store = ResultStore(fields, int_fields)
+        # Chỉ số dòng trong store đang hiển thị (None = tất cả)
+        self._visible_rows = None
+        self._link_font = QFont()
+        self._link_font.setUnderline(True)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.store) if self._visible_rows is None else len(self._visible_rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.columns[section].header
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        column = self.columns[index.column()]
+        value = self.store.value(self.store_row(index.row()), column.field) if column.field else None
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._display_text(column, value)
+        if role == Qt.ItemDataRole.UserRole:
+            # Giá trị thô dùng để sắp xếp và xuất file
+            if column.kind == 'list':
+                return ", ".join(value or [])
+            if column.kind == 'action':
+                return ''
+            if column.kind == 'score':
+                # Dòng không có điểm xếp dưới mọi dòng có điểm
+                return value if value is not None else float('-inf')
+            return value if value is not None else ''
+        if role == Qt.ItemDataRole.TextAlignmentRole and column.kind in ('int', 'score'):
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        if role == Qt.ItemDataRole.TextAlignmentRole and column.kind == 'action':
+            return int(Qt.AlignmentFlag.AlignCenter)
+        if role == Qt.ItemDataRole.ForegroundRole and column.kind in ('link', 'action'):
+            return LINK_COLOR
+        if role == Qt.ItemDataRole.FontRole and column.kind in ('link', 'action'):
+            return self._link_font
+        if role == Qt.ItemDataRole.ToolTipRole:
+            if column.kind == 'link':
+                return f"{column.header}: {value}\nNhấp để mở hoặc chuột phải để sao chép URL."
+            return column.tooltip
+        return None
+
+    def _display_text(self, column, value):
+        if column.kind == 'action':
+            return column.action_text
+        if column.kind == 'int':
+            return format_int_with_separator(value) if value != MISSING_INT else column.missing_text
+        if column.kind == 'score':
+            return f"{value:,.{column.decimals}f}" if value is not None else column.missing_text
+        if column.kind == 'date':
+            return format_date_dd_mm_yyyy(value) if value else column.missing_text
+        if column.kind == 'list':
+            return ", ".join(value) if value else column.missing_text
+        return str(value) if value is not None else column.missing_text
+
+    def store_row(self, row):
+        return row if self._visible_rows is None else int(self._visible_rows[row])
+
+    def set_records(self, records):
+        self.beginResetModel()
+        self.store.clear()
+        self.store.append(records)
+        self._visible_rows = None
+        self.endResetModel()
+
+    def append_records(self, records, keep_rows=None):
+        """
+        Appends rows. While a row filter is active, keep_rows(first store row, end) returns the
+        new store rows to show; without it they are all shown until the filter is re-applied.
+        """
+        if not records:
+            return
+        first_store_row = len(self.store)
+        if self._visible_rows is None:
+            first_row = self.rowCount()
+            self.beginInsertRows(QModelIndex(), first_row, first_row + len(records) - 1)
+            self.store.append(records)
+            self.endInsertRows()
+            return
+
+        # Dòng mới chưa có trong danh sách hiển thị nên thêm vào store trước không làm đổi rowCount()
+        self.store.append(records)
+        if keep_rows is None:
+            new_rows = list(range(first_store_row, len(self.store)))
+        else:
+            new_rows = [int(row) for row in keep_rows(first_store_row, len(self.store))]
+        if not new_rows:
+            return
+        if not isinstance(self._visible_rows, list):
+            self._visible_rows = [int(row) for row in self._visible_rows]
+        first_row = len(self._visible_rows)
+        self.beginInsertRows(QModelIndex(), first_row, first_row + len(new_rows) - 1)
+        self._visible_rows.extend(new_rows)
+        self.endInsertRows()
+
+    def set_column_values(self, values_by_field):
+        """Replaces whole columns (e.g. recomputed scores) and repaints them."""
+        for field, values in values_by_field.items():
+            self.store.set_column(field, values)
+            column = self.column_index(field)
+            if column >= 0 and self.rowCount():
+                self.dataChanged.emit(self.index(0, column), self.index(self.rowCount() - 1, column))
+
+    def set_row_values(self, store_rows, values_by_field):
+        """Replaces the values of some rows (e.g. rescored rows) and repaints those columns."""
+        if not store_rows:
+            return
+        for field, values in values_by_field.items():
+            for row, value in zip(store_rows, values):
+                self.store.set_value(row, field, value)
+        if self._visible_rows is None:
+            first_row, last_row = min(store_rows), max(store_rows)
+        else:
+            first_row, last_row = 0, self.rowCount() - 1
+        if last_row < first_row:
+            return
+        for field in values_by_field:
+            column = self.column_index(field)
+            if column >= 0:
+                self.dataChanged.emit(self.index(first_row, column), self.index(last_row, column))
+
+    def set_visible_rows(self, rows):
+        """Shows only the given store rows (a sequence of indices, e.g. a NumPy array); None shows all."""
+        self.beginResetModel()
+        self._visible_rows = rows
+        self.endResetModel()
+
+    def record(self, row):
+        return self.store.record(self.store_row(row))
+
+    def column_index(self, field):
+        return next((i for i, column in enumerate(self.columns) if column.field == field), -1)
+
+    def export_layout(self):
+        """
+        (headers, int column indexes, float column indexes, link column indexes) of the exported
+        columns (no action column).
+        """
+        exported = [column for column in self.columns if column.kind != 'action']
+        headers = [column.header for column in exported]
+        int_columns = [i for i, column in enumerate(exported) if column.kind == 'int']
+        float_columns = [i for i, column in enumerate(exported) if column.kind == 'score']
+        link_columns = [i for i, column in enumerate(exported) if column.kind == 'link']
+        return headers, int_columns, float_columns, link_columns
+
+    def export_rows(self, store_rows):
+        """
+        Iterator of export value lists for the given store rows. It reads only the store
+        (columns captured now), so it can be consumed on a worker thread; missing ints are None
+        and scores stay numeric (rounded).
+        """
+        exported = [column for column in self.columns if column.kind != 'action']
+        values_by_column = [self.store.column(column.field) for column in exported]
+        return self._iter_export_rows(exported, values_by_column, store_rows)
+
+    def _iter_export_rows(self, exported, values_by_column, store_rows):
+        for row in store_rows:
+            row_values = []
+            for column, values in zip(exported, values_by_column):
+                value = values[row]
+                if column.kind == 'int':
+                    row_values.append(None if value == MISSING_INT else value)
+                elif column.kind == 'score':
+                    row_values.append(None if value is None else round(value, column.decimals + 2))
+                else:
+                    row_values.append(self._display_text(column, value))
+            yield row_values
+
+
+class ResultFilterProxyModel(QSortFilterProxyModel):
+    """Sorts on the raw values (UserRole); filtering is done by the source model's visible rows."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSortRole(Qt.ItemDataRole.UserRole)
+
+    def store_rows(self):
+        """Store row indexes of the visible rows in their current (sorted) order."""
+        source_model = self.sourceModel()
+        return [
+            source_model.store_row(self.mapToSource(self.index(proxy_row, 0)).row())
+            for proxy_row in range(self.rowCount())
+        ]
+
+    def record(self, proxy_row):
+        """O(1) record lookup for a visible row."""
+        source_row = self.mapToSource(self.index(proxy_row, 0)).row()
+        return self.sourceModel().record(source_row)
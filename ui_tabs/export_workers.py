@@ -0,0 +1,55 @@
+import logging
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from services.exporter import export_rows, ExportCancelled
+
+logger = logging.getLogger(__name__)
+
+
+class ExportThread(QThread):
+    """
+    Writes an export file off the UI thread. rows must be safe to iterate from the worker
+    (plain data such as ResultTableModel.export_rows(), never the table widgets).
+    """
+    progress_updated = pyqtSignal(int, str)
+    export_finished = pyqtSignal(str, int)  # file path, số dòng đã ghi
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, file_path, headers, rows, total_rows, int_columns=(), link_columns=(),
+                 sheet_title="Kết quả", float_columns=(), parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.headers = headers
+        self.rows = rows
+        self.total_rows = total_rows
+        self.int_columns = int_columns
+        self.float_columns = float_columns
+        self.link_columns = link_columns
+        self.sheet_title = sheet_title
+
+    def run(self):
+        try:
+            self.progress_updated.emit(0, f"Đang xuất {self.total_rows} dòng...")
+            written = export_rows(
+                self.file_path, self.headers, self.rows,
+                total_rows=self.total_rows,
+                int_columns=self.int_columns,
+                float_columns=self.float_columns,
+                link_columns=self.link_columns,
+                sheet_title=self.sheet_title,
+                progress_callback=self._report_progress,
+                is_cancelled=self.isInterruptionRequested
+            )
+            self.progress_updated.emit(100, f"Đã xuất {written} dòng.")
+            self.export_finished.emit(self.file_path, written)
+        except ExportCancelled:
+            logger.info(f"Đã hủy xuất file: {self.file_path}")
+        except PermissionError:
+            self.error_occurred.emit("Không thể ghi file. File có thể đang được mở trong chương trình khác, vui lòng đóng trước khi xuất.")
+        except Exception as e:
+            logger.exception(f"ExportThread error: {e}")
+            self.error_occurred.emit(f"Lỗi khi xuất dữ liệu: {str(e)}")
+
+    def _report_progress(self, done, total):
+        percent = int(100 * done / total) if total else 100
+        self.progress_updated.emit(min(99, percent), f"Đang xuất dữ liệu ({done}/{total})...")
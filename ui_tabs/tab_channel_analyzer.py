@@ -6,17 +6,27 @@ from PyQt6.QtCore import Qt, QRunnable, pyqtSignal, QObject, QUrl, QThreadPool
 from PyQt6.QtGui import QDesktopServices, QColor
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-import pandas as pd
 from services.api_manager import APIKeyManager, YouTubeService
+from config import API_BATCH_MAX_PARTS
+from services.quota_planner import plan_channel_analysis, channel_ids_from_urls
+from services.exporter import export_file_filter, export_path_with_extension
+from ui_components import confirm_quota_plan, PLAN_THROTTLE
+from ui_tabs.export_workers import ExportThread
 from datetime import datetime
 import logging
 import re
 import time
-from openpyxl import load_workbook
-from utils import extract_channel_id_yt_dlp, format_number, format_date_dd_mm_yyyy
+from services.channel_resolver import resolve_channel_ids
+from utils import format_number, format_date_dd_mm_yyyy
 
 logger = logging.getLogger(__name__)
 
+# Thứ tự cột khi xuất file (giữ tên cột như các bản xuất trước)
+EXPORT_FIELDS = [
+    'name', 'subscribers', 'video_count', 'view_count', 'created_date',
+    'country', 'category', 'url', 'status'
+]
+
 class ChannelAnalyzerSignals(QObject):
     data_fetched = pyqtSignal(list, bool)  # list of channel data, success flag
     status_updated = pyqtSignal(str, int)  # message, timeout
@@ -52,8 +62,16 @@ class ChannelAnalyzerRunnable(QRunnable):
             channel_ids = []
             url_to_info = {}
 
-            # Step 1: Extract channel IDs
+            # Step 1: Extract channel IDs (cả lô: URL đã phân giải trước đây lấy từ cache, phần còn lại gọi yt-dlp song song)
             self.signals.progress_updated.emit(5, "Đang trích xuất ID kênh...")
+            valid_urls = [url for url in self.channel_urls if self.is_valid_youtube_url(url)]
+            resolved = resolve_channel_ids(
+                valid_urls,
+                progress_callback=lambda done, count: self.signals.status_updated.emit(
+                    f"Đã phân giải {done}/{count} URL kênh...", 3000
+                ),
+                is_cancelled=self.isInterruptionRequested
+            )
             for url in self.channel_urls:
                 if self.isInterruptionRequested():
                     self.signals.status_updated.emit("Hủy phân tích kênh.", 2000)
@@ -75,7 +93,7 @@ class ChannelAnalyzerRunnable(QRunnable):
                     progress = int(5 + (processed / total_urls) * 45)
                     self.signals.progress_updated.emit(progress, f"Đã xử lý {processed}/{total_urls} URL...")
                     continue
-                channel_id, error = extract_channel_id_yt_dlp(url, lambda msg: self.signals.status_updated.emit(msg, 3000))
+                channel_id, error = resolved.get(url.strip(), (None, "Đã hủy"))
                 if channel_id:
                     channel_ids.append(channel_id)
                     url_to_info[channel_id] = {'url': url}
@@ -101,8 +119,8 @@ class ChannelAnalyzerRunnable(QRunnable):
                 self.signals.data_fetched.emit(results, False)
                 return
 
-            # Step 2: Fetch channel data in batches
-            batch_size = 50
+            # Step 2: Fetch channel data in batches (mỗi lô = một HTTP batch gồm nhiều request 50 ID)
+            batch_size = 50 * API_BATCH_MAX_PARTS
             for i in range(0, len(channel_ids), batch_size):
                 if self.isInterruptionRequested():
                     self.signals.status_updated.emit("Hủy phân tích kênh.", 2000)
@@ -113,11 +131,12 @@ class ChannelAnalyzerRunnable(QRunnable):
                 
                 # Wrapper method handles retry and rotation automatically
                 try:
-                    response = youtube_service_wrapper.get_channel_details(
-                        part='snippet,statistics,topicDetails',
-                        id=','.join(batch_ids)
+                    # Kênh đã có trong cache được trả về ngay, chỉ ID còn thiếu mới gọi API
+                    channel_items = youtube_service_wrapper.get_channel_details_batch(
+                        batch_ids,
+                        part='snippet,statistics,topicDetails'
                     )
-                    for item in response.get('items', []):
+                    for item in channel_items:
                         channel_id = item['id']
                         snippet = item.get('snippet', {})
                         stats = item.get('statistics', {})
@@ -203,6 +222,7 @@ class ChannelAnalyzerTab(QWidget):
         self.parent = parent
         self.results = []
         self.runnable = None
+        self.export_thread = None
         self.thread_pool = QThreadPool.globalInstance()
         self.init_ui()
         self.apply_styles()
@@ -298,6 +318,17 @@ class ChannelAnalyzerTab(QWidget):
             self.parent.statusBar().showMessage("Vui lòng nhập ít nhất một URL kênh.", 3000)
             return
 
+        plan = plan_channel_analysis(len(urls), channel_ids_from_urls(urls))
+        affordable_urls = int(len(urls) * plan.affordable_fraction)
+        decision = confirm_quota_plan(
+            self.parent, plan,
+            f"Chỉ phân tích {affordable_urls} kênh đầu tiên" if affordable_urls > 0 else None
+        )
+        if decision is None:
+            return
+        if decision == PLAN_THROTTLE:
+            urls = urls[:affordable_urls]
+
         self.parent.set_operation_running_status(True, "Phân tích kênh")
         self.parent.show_progress_dialog("Đang khởi tạo phân tích kênh...")
         self.table.setRowCount(0)
@@ -364,43 +395,37 @@ class ChannelAnalyzerTab(QWidget):
         if not self.results:
             self.parent.statusBar().showMessage("Không có dữ liệu để xuất.", 3000)
             return
+        if self.parent.is_operation_running:
+            self.parent.statusBar().showMessage("Một tác vụ khác đang chạy. Vui lòng chờ.", 3000)
+            return
 
         current_date = datetime.now().strftime("%d-%m")
         default_filename = f"PT Kenh {current_date}.xlsx"
-        file_path, _ = QFileDialog.getSaveFileName(
-            self, "Lưu file Excel", default_filename, "Excel Files (*.xlsx)"
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Lưu file kết quả", default_filename, export_file_filter('.xlsx')
         )
         if not file_path:
             return
-
-        try:
-            # Check if file is writable
-            with open(file_path, 'a'):
-                pass
-            # Create DataFrame with desired column order
-            df = pd.DataFrame(self.results, columns=[
-                'name', 'subscribers', 'video_count', 'view_count', 'created_date',
-                'country', 'category', 'url', 'status'
-            ])
-            df.to_excel(file_path, index=False, engine='openpyxl')
-
-            # Add hyperlinks to URL column
-            wb = load_workbook(file_path)
-            ws = wb.active
-            for row in range(2, len(self.results) + 2):
-                url = self.results[row - 2]['url']
-                if url != 'N/A':
-                    ws.cell(row=row, column=8, value=url)
-                    ws.cell(row=row, column=8).hyperlink = url
-                    ws.cell(row=row, column=8).style = 'Hyperlink'
-
-            wb.save(file_path)
-            self.parent.statusBar().showMessage(f"Đã xuất file Excel: {file_path}", 5000)
-        except PermissionError:
-            self.parent.statusBar().showMessage("Lỗi: File Excel đang mở, vui lòng đóng trước khi xuất.", 5000)
-        except Exception as e:
-            self.parent.statusBar().showMessage(f"Lỗi khi xuất Excel: {str(e)}", 5000)
-            logger.error(f"Lỗi xuất Excel: {str(e)}", exc_info=True)
+        file_path = export_path_with_extension(file_path, selected_filter)
+
+        # Ghi trực tiếp từ danh sách kết quả (bản sao) trên luồng riêng, không dựng DataFrame
+        results = list(self.results)
+        rows = ([data.get(field, '') for field in EXPORT_FIELDS] for data in results)
+        self.export_thread = ExportThread(
+            file_path, EXPORT_FIELDS, rows, len(results),
+            link_columns=[EXPORT_FIELDS.index('url')], parent=self
+        )
+        self.export_thread.progress_updated.connect(self.parent.update_progress_dialog)
+        self.export_thread.export_finished.connect(
+            lambda path, written: self.parent.statusBar().showMessage(f"Đã xuất file: {path}", 5000)
+        )
+        self.export_thread.error_occurred.connect(
+            lambda message: self.parent.statusBar().showMessage(f"Lỗi khi xuất: {message}", 5000)
+        )
+        self.export_thread.finished.connect(self.parent.on_worker_thread_finished)
+        self.parent.worker_started(self.export_thread, "Xuất dữ liệu")
+        self.parent.show_progress_dialog("Đang xuất kết quả phân tích kênh...", 0)
+        self.export_thread.start()
 
     def set_buttons_enabled(self, enabled):
         self.analyze_button.setEnabled(enabled)
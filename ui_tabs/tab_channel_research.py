@@ -2,200 +2,263 @@
 
 import json
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-import openpyxl
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font
 
 logger = logging.getLogger(__name__)
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTextEdit,
-    QPushButton, QTableWidget, QTableWidgetItem, QMessageBox,
-    QFileDialog, QGroupBox, QHeaderView, QMenu, QApplication,
-    QLineEdit
+    QPushButton, QTableView, QAbstractItemView, QMessageBox,
+    QFileDialog, QGroupBox, QHeaderView, QMenu,
+    QLineEdit, QSpinBox, QCheckBox
 )
 from PyQt6.QtCore import Qt, QThread, pyqtSignal, QUrl
-from PyQt6.QtGui import QDesktopServices, QClipboard, QFont, QColor, QIntValidator
+from PyQt6.QtGui import QDesktopServices, QClipboard, QFont, QIntValidator
 
+from config import CHANNEL_FETCH_MAX_WORKERS, CHANNEL_RESULT_BATCH_ROWS
 from utils import (
-    extract_channel_id_yt_dlp,
     format_datetime_iso,
-    format_int_with_separator,
     convert_iso_duration
 )
 
 from services.api_manager import APIKeyManager, YouTubeService
+from services.quota_planner import plan_channel_videos, channel_ids_from_urls
+from services.result_filters import ResultFilterEngine
+from services.result_scores import ResultScorer
+from services.channel_sync import sync_channel_uploads
+from services.channel_resolver import resolve_channel_ids
+from services.exporter import export_file_filter, export_path_with_extension
+from ui_components import (
+    confirm_quota_plan, PLAN_THROTTLE, ResultColumn, ResultTableModel, ResultFilterProxyModel,
+    SCORE_RESULT_COLUMNS
+)
+from ui_tabs.export_workers import ExportThread
 from googleapiclient.errors import HttpError
 
-def format_date_to_ddmmyyyy(iso_date):
-    if not iso_date:
-        return 'N/A'
-    try:
-        return datetime.fromisoformat(iso_date[:-1]).strftime('%d-%m-%Y')
-    except ValueError:
-        return 'N/A'
-
-def _parse_duration_to_seconds(duration_str):
-    """Hàm phụ trợ để chuyển đổi chuỗi thời lượng (HH:MM:SS, MM:SS, SS) thành giây."""
-    if not duration_str or not isinstance(duration_str, str):
-        return 0
-    parts = duration_str.strip().split(':')
-    seconds = 0
+CHANNEL_VIDEO_COLUMNS = [
+    ResultColumn("Tên Kênh", 'channel_title', width=180),
+    ResultColumn("Tiêu đề", 'title'),
+    ResultColumn("Lượt xem", 'view_count', kind='int', width=120),
+    ResultColumn("Bình luận", 'comment_count', kind='int', width=120, missing_text="0"),
+    ResultColumn("Ngày đăng", 'upload_date', kind='date', width=120),
+    ResultColumn("Thời lượng", 'duration', width=120),
+    ResultColumn("Danh mục", 'category_name', width=150, missing_text="Không xác định"),
+    ResultColumn("Số Sub của Kênh", 'subscriber_count', kind='int', width=110, missing_text="Bị ẩn"),
+    *SCORE_RESULT_COLUMNS,
+    ResultColumn("URL Video", 'url', kind='link', width=180),
+    ResultColumn("Hành động", kind='action', width=80, action_text="Mở"),
+]
+
+def _int_or_none(value):
     try:
-        if len(parts) == 1:
-            seconds = int(parts[0])
-        elif len(parts) == 2:
-            seconds = int(parts[0]) * 60 + int(parts[1])
-        elif len(parts) == 3:
-            seconds = int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
-    except (ValueError, IndexError):
-        return 0
-    return seconds
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class ChannelFetchError(Exception):
+    """A channel that cannot be fetched (bad URL/ID, no uploads playlist); other channels keep going."""
+    pass
 
 
 class FetchChannelVideosThread(QThread):
+    """
+    Resolves the whole list of channels (URL or ID) up front through the persistent URL -> ID map
+    (see services/channel_resolver.py), then fetches their uploads channel_workers channels at a
+    time on a thread pool, so the UI thread never blocks. Uploads are synced incrementally
+    against the local per-channel store (see services/channel_sync.py) unless full_sync is set;
+    published_after_days / max_videos stop each channel's scan early (0 = no limit). Each channel's videos are
+    emitted through channel_videos_fetched in batches as soon as it is done (an empty list for a channel without videos); a failing channel is reported through
+    channel_failed and does not stop the others. Quota exhaustion stops the whole job.
+    """
     channel_videos_fetched = pyqtSignal(list, str)
+    channel_failed = pyqtSignal(str, str)  # URL/ID đã nhập, thông báo lỗi
     error_occurred = pyqtSignal(str)
     progress_updated = pyqtSignal(int, str)
 
-    def __init__(self, channel_id, video_categories_map, parent=None):
+    def __init__(self, channel_inputs, video_categories_map, channel_workers=CHANNEL_FETCH_MAX_WORKERS,
+                 full_sync=False, published_after_days=0, max_videos=0, parent=None):
         super().__init__(parent)
-        self.channel_id = channel_id
+        self.channel_inputs = list(dict.fromkeys(line.strip() for line in channel_inputs if line.strip()))
         self.video_categories_map = video_categories_map or {}
+        # categoryId -> tên danh mục, dựng một lần cho mọi video
+        self._category_names = {cid: name for name, cid in self.video_categories_map.items() if cid}
+        self.channel_workers = max(1, channel_workers)
+        self.full_sync = full_sync
+        # Giới hạn trước khi lấy (0 = không giới hạn): dừng phân trang playlist sớm thay vì lọc sau
+        self.published_after = (
+            int(time.time()) - published_after_days * 86400 if published_after_days > 0 else None
+        )
+        self.max_videos = max_videos if max_videos > 0 else None
         self._is_interruption_requested = False
+        # Đặt khi một kênh gặp lỗi hết quota: các kênh còn lại dừng ở lần kiểm tra kế tiếp
+        self._quota_exhausted = False
+        # Tiến độ (0..1) của từng kênh đang chạy, để tính tiến độ chung
+        self._channel_progress = {}
+        self._progress_lock = threading.Lock()
+        self._done_count = 0
+        self._resolved_channels = {}
 
     def run(self):
-        if not self.channel_id:
-            self.error_occurred.emit("Channel ID không hợp lệ.")
+        if not self.channel_inputs:
+            self.error_occurred.emit("Không có URL hoặc ID kênh hợp lệ.")
             return
 
-        try:
-            self.progress_updated.emit(0, f"Đang kết nối tới YouTube để lấy thông tin kênh {self.channel_id}...")
-            
-            # Sử dụng YouTubeService wrapper từ api_manager
-            youtube_service_wrapper = YouTubeService()
-            # Đảm bảo keys đã được update (dù main app đã set, nhưng check lại cho chắc)
-            # APIKeyManager là Singleton nên không cần pass key list lại nếu đã set
-            
-            if self.isInterruptionRequested(): return
-
-            self.progress_updated.emit(5, f"Đang lấy thông tin chi tiết kênh {self.channel_id}...")
-            channel_response = youtube_service_wrapper.get_channel_details(
-                part='snippet,contentDetails',
-                id=self.channel_id
-            )
-            if self.isInterruptionRequested(): return
-
-            if not channel_response.get("items"):
-                self.error_occurred.emit(f"Không tìm thấy kênh với ID: {self.channel_id}")
-                return
-            
-            channel_item = channel_response["items"][0]
-            channel_title = channel_item.get("snippet", {}).get("title", f"Kênh {self.channel_id}")
-            uploads_playlist_id = channel_item.get("contentDetails", {}).get("relatedPlaylists", {}).get("uploads")
-
-            if not uploads_playlist_id:
-                self.error_occurred.emit(f"Không tìm thấy playlist video tải lên cho kênh: {channel_title} ({self.channel_id})")
-                return
-            
-            self.progress_updated.emit(10, f"Đã tìm thấy playlist tải lên cho kênh '{channel_title}'. Đang lấy danh sách ID video...")
-
-            all_video_item_details_from_playlist = []
-            next_page_token = None
-            item_count_from_playlist = 0
-            while True:
-                if self.isInterruptionRequested(): return
-                playlist_response = youtube_service_wrapper.get_playlist_items(
-                    part='snippet,contentDetails',
-                    playlistId=uploads_playlist_id,
-                    maxResults=50,
-                    pageToken=next_page_token
-                )
-                if self.isInterruptionRequested(): return
-
-                current_items = playlist_response.get("items", [])
-                for item in current_items:
-                    if item.get("snippet", {}).get("resourceId", {}).get("kind") == "youtube#video" and \
-                       item.get("snippet", {}).get("resourceId", {}).get("videoId"):
-                        all_video_item_details_from_playlist.append(item)
-                
-                item_count_from_playlist += len(current_items)
-                current_playlist_progress = 10 + min(30, item_count_from_playlist // 10 if item_count_from_playlist > 0 else 0)
-                self.progress_updated.emit(current_playlist_progress, f"Đang lấy ID video từ kênh ({len(all_video_item_details_from_playlist)} đã tìm thấy)...")
-
-                next_page_token = playlist_response.get("nextPageToken")
-                if not next_page_token or not current_items:
-                    break
-            
-            if not all_video_item_details_from_playlist:
-                self.channel_videos_fetched.emit([], channel_title)
-                self.progress_updated.emit(100, f"Kênh '{channel_title}' không có video nào (hoặc không thể truy cập).")
-                return
-
-            if self.isInterruptionRequested(): return
-            self.progress_updated.emit(40, f"Đã lấy {len(all_video_item_details_from_playlist)} ID video. Đang lấy chi tiết thống kê và danh mục...")
-
-            final_video_data = []
-            video_ids_to_fetch_details = [item["snippet"]["resourceId"]["videoId"] for item in all_video_item_details_from_playlist]
+        total = len(self.channel_inputs)
+        # Phân giải cả danh sách trước: kênh đã gặp lấy từ bảng URL -> ID, chỉ phần còn lại gọi yt-dlp (song song)
+        self.progress_updated.emit(0, f"Đang phân giải {total} URL kênh...")
+        self._resolved_channels = resolve_channel_ids(
+            self.channel_inputs,
+            progress_callback=lambda done, count: self.progress_updated.emit(
+                0, f"Đã phân giải {done}/{count} URL kênh..."
+            ),
+            is_cancelled=self.isInterruptionRequested
+        )
+        if self.isInterruptionRequested(): return
 
-            for i in range(0, len(video_ids_to_fetch_details), 50):
-                if self.isInterruptionRequested(): return
-                chunk_video_ids = video_ids_to_fetch_details[i:i+50]
-                
-                videos_list_response = youtube_service_wrapper.get_video_details(
-                    part='snippet,statistics,contentDetails',
-                    id=','.join(chunk_video_ids)
-                )
+        self.progress_updated.emit(0, f"Đang lấy video cho {total} kênh ({self.channel_workers} kênh song song)...")
+        # Sử dụng YouTubeService wrapper từ api_manager (APIKeyManager là Singleton, dùng chung giữa các luồng)
+        youtube_service_wrapper = YouTubeService()
+        pool = ThreadPoolExecutor(max_workers=self.channel_workers, thread_name_prefix="channel-fetch")
+        try:
+            futures = {
+                pool.submit(self._fetch_channel, youtube_service_wrapper, channel_input): channel_input
+                for channel_input in self.channel_inputs
+            }
+            for future in as_completed(futures):
                 if self.isInterruptionRequested(): return
-
-                for video_stat_item in videos_list_response.get("items", []):
-                    video_id = video_stat_item["id"]
-                    snippet = video_stat_item.get("snippet", {})
-                    statistics = video_stat_item.get("statistics", {})
-                    content_details = video_stat_item.get("contentDetails", {})
-                    
-                    category_id = snippet.get('categoryId', '')
-                    category_name = 'Không xác định'
-                    if self.video_categories_map:
-                        category_name = next((name for name, cid_val in self.video_categories_map.items() if cid_val == category_id), 'Không xác định')
-                    
-                    final_video_data.append({
-                        'id': video_id,
-                        'title': snippet.get('title', 'N/A'),
-                        'url': f"https://www.youtube.com/watch?v={video_id}",
-                        'view_count': int(statistics.get('viewCount', 0)),
-                        'comment_count': statistics.get('commentCount'),
-                        'upload_date': snippet.get('publishedAt', ''),
-                        'duration': convert_iso_duration(content_details.get('duration', 'N/A')),
-                        'category_name': category_name
-                    })
-                
-                details_progress = 40 + int(55 * (len(final_video_data) / len(all_video_item_details_from_playlist)))
-                self.progress_updated.emit(details_progress, f"Đang lấy chi tiết video cho kênh ({len(final_video_data)}/{len(all_video_item_details_from_playlist)})...")
-
-            if self.isInterruptionRequested(): return
-            self.progress_updated.emit(100, f"Hoàn tất lấy video cho kênh '{channel_title}'.")
-            self.channel_videos_fetched.emit(final_video_data, channel_title)
-
-        except HttpError as e:
-            if self.isInterruptionRequested(): return
-            try:
-                error_content = json.loads(e.content.decode('utf-8'))
-                error_message = error_content.get("error", {}).get("message", "Lỗi API không xác định khi lấy video kênh.")
-                status_code = e.resp.status
-                if status_code == 403 and ("quotaExceeded" in error_message or "dailyLimitExceeded" in error_message):
-                    self.error_occurred.emit(f"Lỗi hạn ngạch API khi xử lý kênh {self.channel_id}.")
-                elif status_code == 404:
-                     self.error_occurred.emit(f"Không tìm thấy kênh hoặc playlist với ID cung cấp ({self.channel_id}).")
+                channel_input = futures[future]
+                try:
+                    video_count, channel_title = future.result()
+                except ChannelFetchError as e:
+                    self.channel_failed.emit(channel_input, str(e))
+                except HttpError as e:
+                    message, quota_exceeded = self._http_error_message(e, channel_input)
+                    if quota_exceeded:
+                        # Hết quota thì các kênh còn lại cũng sẽ lỗi: hủy các kênh chưa chạy và báo
+                        # các kênh đang chạy dừng lại trước khi báo lỗi, để không tốn thêm lượt gọi key
+                        self._quota_exhausted = True
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        self.error_occurred.emit(message)
+                        return
+                    self.channel_failed.emit(channel_input, message)
+                except Exception as e:
+                    if self.isInterruptionRequested(): return
+                    logger.exception(f"FetchChannelVideosThread error ({channel_input}): {e}")
+                    self.channel_failed.emit(channel_input, f"Lỗi không mong đợi: {str(e)}")
                 else:
-                    self.error_occurred.emit(f"Lỗi API ({status_code}) khi lấy video kênh: {error_message}")
-            except json.JSONDecodeError:
-                self.error_occurred.emit(f"Lỗi API (không thể phân tích phản hồi) khi lấy video kênh: {e.content.decode('utf-8', errors='ignore')}")
-        except Exception as e:
-            if self.isInterruptionRequested(): return
-            logger.exception(f"FetchChannelVideosThread error: {e}")
-            self.error_occurred.emit(f"Lỗi không mong đợi khi lấy video kênh '{self.channel_id}': {str(e)}")
+                    if video_count is None: return  # bị hủy giữa chừng
+                    if video_count == 0:
+                        self.channel_videos_fetched.emit([], channel_title)
+
+                with self._progress_lock:
+                    self._done_count += 1
+                    self._channel_progress.pop(channel_input, None)
+                self._report_progress(f"Đã xong {self._done_count}/{total} kênh.")
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        if not self.isInterruptionRequested():
+            self.progress_updated.emit(100, f"Hoàn tất lấy video cho {total} kênh.")
+
+    def _report_progress(self, message):
+        with self._progress_lock:
+            done = self._done_count + sum(self._channel_progress.values())
+        self.progress_updated.emit(min(99, int(100 * done / len(self.channel_inputs))), message)
+
+    def _set_channel_progress(self, channel_input, fraction, message):
+        with self._progress_lock:
+            self._channel_progress[channel_input] = fraction
+            running = len(self._channel_progress)
+        self._report_progress(f"[{self._done_count}/{len(self.channel_inputs)} xong, {running} đang chạy] {message}")
+
+    def _fetch_channel(self, youtube_service_wrapper, channel_input):
+        """
+        Runs on a pool thread. The channel's videos are emitted through channel_videos_fetched
+        in batches of CHANNEL_RESULT_BATCH_ROWS as they are read back from the store.
+        Returns (video count, channel title); the count is None when the job was cancelled meanwhile.
+        """
+        channel_id, error_msg = self._resolved_channels.get(channel_input, (None, None))
+        if error_msg or not channel_id:
+            raise ChannelFetchError(f"Lỗi trích xuất ID kênh: {error_msg or 'Không hợp lệ'}")
+        if self._should_stop(): return None, None
+
+        channel_items = youtube_service_wrapper.get_channels_by_ids(
+            [channel_id],
+            part='snippet,contentDetails,statistics'
+        )
+        if self._should_stop(): return None, None
+        if not channel_items:
+            raise ChannelFetchError(f"Không tìm thấy kênh với ID: {channel_id}")
+
+        channel_item = channel_items[0]
+        channel_title = channel_item.get("snippet", {}).get("title", f"Kênh {channel_id}")
+        uploads_playlist_id = channel_item.get("contentDetails", {}).get("relatedPlaylists", {}).get("uploads")
+        channel_statistics = channel_item.get("statistics", {})
+        subscriber_count = None if channel_statistics.get("hiddenSubscriberCount") else channel_statistics.get("subscriberCount")
+        if not uploads_playlist_id:
+            raise ChannelFetchError(f"Không tìm thấy playlist video tải lên cho kênh: {channel_title} ({channel_id})")
+
+        self._set_channel_progress(channel_input, 0.1, f"Đang đồng bộ video của '{channel_title}'...")
+
+        def report_sync_progress(fraction, message):
+            self._set_channel_progress(channel_input, fraction, f"'{channel_title}': {message}")
+
+        # Chỉ phân trang tới video đã có trong kho của kênh (trừ khi lấy lại toàn bộ)
+        stored_videos = sync_channel_uploads(
+            youtube_service_wrapper, channel_id, uploads_playlist_id,
+            full=self.full_sync,
+            published_after=self.published_after,
+            max_videos=self.max_videos,
+            expected_count=_int_or_none(channel_statistics.get("videoCount")),
+            progress_callback=report_sync_progress,
+            is_cancelled=self._should_stop
+        )
+        if stored_videos is None or self._should_stop(): return None, None
+
+        # Đọc kho theo luồng và gửi từng lô lên bảng, không dựng danh sách toàn bộ video của kênh
+        video_count = 0
+        batch = []
+        for video in stored_videos:
+            if self._should_stop(): return None, None
+            batch.append({
+                'id': video.video_id,
+                'channel_id': channel_id,
+                'title': video.title or 'N/A',
+                'url': f"https://www.youtube.com/watch?v={video.video_id}",
+                'view_count': video.view_count if video.view_count is not None else 0,
+                'comment_count': video.comment_count,
+                'upload_date': video.published_iso(),
+                'duration': convert_iso_duration(video.duration or 'N/A'),
+                'category_name': self._category_names.get(video.category_id, 'Không xác định'),
+                'subscriber_count': subscriber_count
+            })
+            if len(batch) >= CHANNEL_RESULT_BATCH_ROWS:
+                self.channel_videos_fetched.emit(batch, channel_title)
+                video_count += len(batch)
+                batch = []
+        if batch:
+            self.channel_videos_fetched.emit(batch, channel_title)
+            video_count += len(batch)
+        return video_count, channel_title
+
+    @staticmethod
+    def _http_error_message(e, channel_input):
+        """(message, quota exceeded?) for an HttpError raised while fetching one channel."""
+        try:
+            error_content = json.loads(e.content.decode('utf-8'))
+        except json.JSONDecodeError:
+            return f"Lỗi API (không thể phân tích phản hồi) khi lấy video kênh: {e.content.decode('utf-8', errors='ignore')}", False
+        error_message = error_content.get("error", {}).get("message", "Lỗi API không xác định khi lấy video kênh.")
+        status_code = e.resp.status
+        if status_code == 403 and ("quotaExceeded" in error_message or "dailyLimitExceeded" in error_message):
+            return f"Lỗi hạn ngạch API khi xử lý kênh {channel_input}.", True
+        if status_code == 404:
+            return f"Không tìm thấy kênh hoặc playlist với ID cung cấp ({channel_input}).", False
+        return f"Lỗi API ({status_code}) khi lấy video kênh: {error_message}", False
 
     def requestInterruption(self):
         self._is_interruption_requested = True
@@ -204,13 +267,31 @@ class FetchChannelVideosThread(QThread):
     def isInterruptionRequested(self):
         return self._is_interruption_requested or super().isInterruptionRequested()
 
+    def _should_stop(self):
+        """Checked by the channel jobs on the pool: the user cancelled or the quota ran out."""
+        return self._quota_exhausted or self.isInterruptionRequested()
+
 class ChannelResearchTab(QWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
         self.fetch_channel_videos_thread = None
-        self.channel_videos_data = {}  # Lưu trữ toàn bộ dữ liệu video chưa lọc
+        self.export_thread = None
+        # Toàn bộ video chưa lọc nằm trong model; bộ lọc chỉ đổi danh sách dòng hiển thị
+        self.result_model = ResultTableModel(CHANNEL_VIDEO_COLUMNS, self, extra_fields=('channel_id',))
+        self.result_filter = ResultFilterEngine(
+            int_fields=('view_count', 'comment_count'),
+            duration_fields=('duration',)
+        )
+        # Mỗi kênh được lấy đủ video tải lên nên bội số luôn so với video trung vị của chính kênh đó;
+        # gom theo id kênh vì hai kênh khác nhau có thể trùng tên
+        self.result_scorer = ResultScorer(channel_field='channel_id')
+        self.proxy_model = ResultFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.result_model)
         self.current_channel_names_for_export = []
+        self.failed_channels = []
+        # Ngưỡng lọc đang áp dụng ({trường: giá trị tối thiểu}), None khi không lọc
+        self.active_filters = None
 
         self._setup_ui()
 
@@ -245,7 +326,34 @@ class ChannelResearchTab(QWidget):
         input_layout.addWidget(self.lbl_channel_count)
 
         analyze_button_layout = QHBoxLayout()
+        # Giới hạn áp dụng khi quét playlist: video ngoài phạm vi không tốn quota lấy chi tiết
+        analyze_button_layout.addWidget(QLabel("Chỉ video trong"))
+        self.spin_recent_days = QSpinBox()
+        self.spin_recent_days.setRange(0, 36500)
+        self.spin_recent_days.setSpecialValueText("Tất cả")
+        self.spin_recent_days.setSuffix(" ngày")
+        self.spin_recent_days.setToolTip("Chỉ lấy video đăng trong N ngày gần đây (dừng quét playlist sớm)")
+        analyze_button_layout.addWidget(self.spin_recent_days)
+        analyze_button_layout.addWidget(QLabel("Tối đa"))
+        self.spin_max_videos_per_channel = QSpinBox()
+        self.spin_max_videos_per_channel.setRange(0, 100000)
+        self.spin_max_videos_per_channel.setSpecialValueText("Tất cả")
+        self.spin_max_videos_per_channel.setSuffix(" video/kênh")
+        self.spin_max_videos_per_channel.setToolTip("Chỉ lấy N video mới nhất của mỗi kênh")
+        analyze_button_layout.addWidget(self.spin_max_videos_per_channel)
         analyze_button_layout.addStretch()
+        analyze_button_layout.addWidget(QLabel("Số kênh chạy song song:"))
+        self.spin_channel_workers = QSpinBox()
+        self.spin_channel_workers.setRange(1, 16)
+        self.spin_channel_workers.setValue(CHANNEL_FETCH_MAX_WORKERS)
+        self.spin_channel_workers.setToolTip("Số kênh được phân giải và lấy video cùng lúc")
+        analyze_button_layout.addWidget(self.spin_channel_workers)
+        self.check_full_sync = QCheckBox("Lấy lại toàn bộ video")
+        self.check_full_sync.setToolTip(
+            "Mặc định chỉ lấy video mới kể từ lần đồng bộ trước và làm mới số liệu các video gần đây.\n"
+            "Chọn mục này để duyệt lại toàn bộ playlist tải lên của kênh."
+        )
+        analyze_button_layout.addWidget(self.check_full_sync)
         self.btn_analyze_channel = QPushButton("Phân tích Kênh")
         self.btn_analyze_channel.setFont(QFont("Arial", 10))
         self.btn_analyze_channel.setToolTip("Phân tích tất cả các kênh được nhập để lấy danh sách video")
@@ -306,26 +414,23 @@ class ChannelResearchTab(QWidget):
         results_layout = QVBoxLayout()
         results_layout.setSpacing(10)
 
-        self.table_channel_videos = QTableWidget()
-        self.table_channel_videos.setColumnCount(9)
-        self.table_channel_videos.setHorizontalHeaderLabels([
-            "Tên Kênh", "Tiêu đề", "Lượt xem", "Bình luận", "Ngày đăng", "Thời lượng", 
-            "Danh mục", "URL Video", "Hành động"
-        ])
+        self.table_channel_videos = QTableView()
+        self.table_channel_videos.setModel(self.proxy_model)
         self.table_channel_videos.setFont(QFont("Arial", 10))
-        self.table_channel_videos.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.table_channel_videos.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table_channel_videos.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table_channel_videos.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.table_channel_videos.setSortingEnabled(True)
+        self.table_channel_videos.setWordWrap(False)
+        self.table_channel_videos.clicked.connect(self._handle_table_cell_click)
         
         header_channel = self.table_channel_videos.horizontalHeader()
         header_channel.setFont(QFont("Arial", 10, QFont.Weight.Bold))
-        col_widths = [180, -1, 120, 120, 120, 120, 150, 180, 80]
-        for i, width in enumerate(col_widths):
-            if width == -1:
+        for i, column in enumerate(CHANNEL_VIDEO_COLUMNS):
+            if column.width is None:
                 header_channel.setSectionResizeMode(i, QHeaderView.ResizeMode.Stretch)
             else:
                 header_channel.setSectionResizeMode(i, QHeaderView.ResizeMode.Interactive)
-                self.table_channel_videos.setColumnWidth(i, width)
+                self.table_channel_videos.setColumnWidth(i, column.width)
         self.table_channel_videos.setMinimumHeight(400)
         self.table_channel_videos.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.table_channel_videos.customContextMenuRequested.connect(self._channel_video_table_context_menu)
@@ -360,64 +465,84 @@ class ChannelResearchTab(QWidget):
             QMessageBox.warning(self.main_window, "Thiếu thông tin", "Vui lòng nhập ít nhất một URL hoặc ID Kênh.")
             return
 
-        self.main_window.statusBar().showMessage("Đang phân tích các URL/ID kênh...", 0)
-        QApplication.processEvents()
+        # Ước tính quota theo số video của từng kênh (lấy từ cache nếu có) trước khi chạy
+        channel_lines = [line.strip() for line in channel_urls_input if line.strip()]
+        plan = plan_channel_videos(
+            len(channel_lines), channel_ids_from_urls(channel_lines),
+            full_sync=self.check_full_sync.isChecked(),
+            max_videos_per_channel=self.spin_max_videos_per_channel.value() or None
+        )
+        affordable_channels = int(len(channel_lines) * plan.affordable_fraction)
+        decision = confirm_quota_plan(
+            self.main_window, plan,
+            f"Chỉ lấy {affordable_channels} kênh đầu tiên" if affordable_channels > 0 else None
+        )
+        if decision is None:
+            return
+        if decision == PLAN_THROTTLE:
+            channel_urls_input = channel_lines[:affordable_channels]
 
-        self.table_channel_videos.setRowCount(0)
-        self.channel_videos_data.clear()
+        self.result_model.set_records([])
+        # Giữ bộ lọc đang nhập cho các video sắp đến
+        self._update_display_with_filters()
         self.current_channel_names_for_export = []
+        self.failed_channels = []
         self.btn_export_channel_videos.setEnabled(False)
 
-        self.main_window.is_operation_running = True
-        self.main_window.update_button_states()
+        # Phân giải và lấy video nhiều kênh song song trên luồng nền; kết quả được gộp dần khi từng kênh xong
+        self.fetch_channel_videos_thread = FetchChannelVideosThread(
+            channel_urls_input,
+            video_categories_map=self.main_window.video_categories,
+            channel_workers=self.spin_channel_workers.value(),
+            full_sync=self.check_full_sync.isChecked(),
+            published_after_days=self.spin_recent_days.value(),
+            max_videos=self.spin_max_videos_per_channel.value(),
+            parent=self
+        )
+        self.fetch_channel_videos_thread.channel_videos_fetched.connect(self._on_channel_videos_fetched)
+        self.fetch_channel_videos_thread.channel_failed.connect(self._on_channel_failed)
+        self.fetch_channel_videos_thread.error_occurred.connect(self.main_window.on_api_error_common_slot)
+        self.fetch_channel_videos_thread.progress_updated.connect(self.main_window.update_progress_dialog)
+        self.fetch_channel_videos_thread.finished.connect(self.main_window.on_worker_thread_finished)
+        self.fetch_channel_videos_thread.finished.connect(self._on_fetch_finished)
+        self.main_window.worker_started(self.fetch_channel_videos_thread, "Phân tích kênh")
         self.main_window.show_progress_dialog("Đang chuẩn bị lấy video cho các kênh...", 0)
+        self.fetch_channel_videos_thread.start()
 
-        total_channels = len([line for line in channel_urls_input if line.strip()])
-        for idx, channel_url in enumerate(channel_urls_input):
-            if self.main_window.current_active_thread and self.main_window.current_active_thread.isInterruptionRequested():
-                break
-
-            channel_url = channel_url.strip()
-            if not channel_url:
-                continue
-
-            channel_id, error_msg = extract_channel_id_yt_dlp(
-                channel_url,
-                status_bar_func=self.main_window.statusBar().showMessage,
-                process_events_func=QApplication.processEvents
-            )
-            
-            if error_msg or not channel_id:
-                self.main_window.statusBar().showMessage(f"Lỗi trích xuất ID kênh cho '{channel_url}': {error_msg or 'Không hợp lệ'}", 7000)
-                continue
+    def _on_channel_failed(self, channel_input, error_message):
+        self.failed_channels.append((channel_input, error_message))
+        logger.warning(f"Không lấy được kênh '{channel_input}': {error_message}")
+        self.main_window.statusBar().showMessage(f"Lỗi kênh '{channel_input}': {error_message}", 7000)
 
-            base_progress = int(100 * idx / total_channels)
-            self.main_window.update_progress_dialog(base_progress, f"Đang lấy video cho kênh {idx+1}/{total_channels}: {channel_id}...")
-
-            self.fetch_channel_videos_thread = FetchChannelVideosThread(
-                channel_id=channel_id,
-                video_categories_map=self.main_window.video_categories,
-                parent=self
+    def _on_fetch_finished(self):
+        if self.sender() is not self.fetch_channel_videos_thread:
+            return
+        if self.failed_channels and not self.fetch_channel_videos_thread.isInterruptionRequested():
+            details = "\n".join(f"- {channel}: {error}" for channel, error in self.failed_channels[:20])
+            if len(self.failed_channels) > 20:
+                details += f"\n... và {len(self.failed_channels) - 20} kênh khác"
+            QMessageBox.warning(
+                self.main_window, "Một số kênh bị lỗi",
+                f"Không lấy được {len(self.failed_channels)} kênh:\n{details}"
             )
-            self.fetch_channel_videos_thread.channel_videos_fetched.connect(self._on_channel_videos_fetched)
-            self.fetch_channel_videos_thread.error_occurred.connect(self.main_window.on_api_error_common_slot)
-            self.fetch_channel_videos_thread.progress_updated.connect(lambda p, m: self.main_window.update_progress_dialog(base_progress + int(p / total_channels), m))
-            self.fetch_channel_videos_thread.finished.connect(lambda: self._on_thread_finished(total_channels, idx + 1))
-            self.fetch_channel_videos_thread.start()
-            self.fetch_channel_videos_thread.wait()
-
-        self.main_window.on_worker_thread_finished()
-
-    def _on_thread_finished(self, total_channels, current_channel_idx):
-        if current_channel_idx == total_channels:
-            self.main_window.hide_progress_dialog()
+        else:
             self.main_window.statusBar().showMessage("Hoàn tất phân tích tất cả kênh.", 5000)
             
     def _on_channel_videos_fetched(self, videos_list, channel_name):
         if videos_list:
-            self.channel_videos_data[channel_name] = videos_list
-            self.current_channel_names_for_export.append(channel_name)
-            self._update_display_with_filters()
+            for video in videos_list:
+                video['channel_title'] = channel_name
+            # Chèn thêm dòng (không reset model) để giữ vị trí cuộn, lựa chọn và thứ tự sắp xếp;
+            # khi đang có bộ lọc thì chỉ lọc các dòng mới
+            self.result_model.append_records(
+                videos_list, keep_rows=self._filter_new_rows if self.active_filters else None
+            )
+            # Chỉ chấm điểm dòng mới và các dòng cùng kênh (trung vị của kênh đã đổi)
+            rows, scores = self.result_scorer.update_appended(self.result_model.store)
+            self.result_model.set_row_values(rows, scores)
+            # Một kênh lớn đến thành nhiều lô
+            if channel_name not in self.current_channel_names_for_export:
+                self.current_channel_names_for_export.append(channel_name)
             self.btn_export_channel_videos.setEnabled(True)
         else:
             self.main_window.statusBar().showMessage(f"Kênh '{channel_name}' không có video.", 3000)
@@ -426,191 +551,92 @@ class ChannelResearchTab(QWidget):
         min_views = int(self.le_min_views.text()) if self.le_min_views.text() else 0
         min_comments = int(self.le_min_comments.text()) if self.le_min_comments.text() else 0
         min_duration_minutes = int(self.le_min_duration_minutes.text()) if self.le_min_duration_minutes.text() else 0
-        min_duration_seconds = min_duration_minutes * 60
-
-        total_videos_to_process = sum(len(v) for v in self.channel_videos_data.values())
-        if total_videos_to_process == 0:
-            self.table_channel_videos.setRowCount(0)
-            return
-
-        self.main_window.show_progress_dialog("Đang áp dụng bộ lọc...", 0)
-        
-        self.table_channel_videos.setSortingEnabled(False)
-        self.table_channel_videos.setRowCount(0)
-        
-        videos_to_display = {}
-        processed_count = 0
-        
-        for channel_name, all_videos in self.channel_videos_data.items():
-            filtered_videos = []
-            for video in all_videos:
-                processed_count += 1
-                view_count = video.get('view_count', 0)
-                comment_count_str = video.get('comment_count')
-                comment_count = int(comment_count_str) if comment_count_str is not None else 0
-                duration_seconds = _parse_duration_to_seconds(video.get('duration', '0'))
-                
-                if (view_count >= min_views and
-                    comment_count >= min_comments and
-                    duration_seconds >= min_duration_seconds):
-                    filtered_videos.append(video)
-
-            if filtered_videos:
-                videos_to_display[channel_name] = filtered_videos
-
-            progress_percent = int(100 * processed_count / total_videos_to_process)
-            progress_message = f"Đang lọc... ({processed_count}/{total_videos_to_process})"
-            self.main_window.update_progress_dialog(progress_percent, progress_message)
-            QApplication.processEvents()
-
-        for channel_name, video_list in videos_to_display.items():
-            self._append_to_table(channel_name, video_list)
-        
-        self.table_channel_videos.setSortingEnabled(True)
-        self.main_window.hide_progress_dialog()
-        self.main_window.statusBar().showMessage(f"Đã lọc và hiển thị {self.table_channel_videos.rowCount()} kết quả.", 5000)
-
-    def _append_to_table(self, channel_name, videos_list):
-        start_row = self.table_channel_videos.rowCount()
-        self.table_channel_videos.setRowCount(start_row + len(videos_list))
-
-        for r_idx, video in enumerate(videos_list):
-            table_row = start_row + r_idx
-
-            channel_item = QTableWidgetItem(channel_name)
-            channel_item.setFlags(channel_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-            self.table_channel_videos.setItem(table_row, 0, channel_item)
-
-            self.table_channel_videos.setItem(table_row, 1, QTableWidgetItem(str(video.get('title', 'N/A'))))
-            
-            vc_val = video.get('view_count', 0)
-            vc_item = QTableWidgetItem()
-            vc_item.setData(Qt.ItemDataRole.DisplayRole, format_int_with_separator(vc_val))
-            vc_item.setData(Qt.ItemDataRole.UserRole, vc_val)
-            vc_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.table_channel_videos.setItem(table_row, 2, vc_item)
-
-            cc_val = video.get('comment_count')
-            cc_item = QTableWidgetItem()
-            display_val_str = format_int_with_separator(cc_val) if cc_val is not None else "0"
-            sort_val_int = int(cc_val) if cc_val is not None else 0
-            
-            cc_item.setData(Qt.ItemDataRole.DisplayRole, display_val_str)
-            cc_item.setData(Qt.ItemDataRole.UserRole, sort_val_int)
-            cc_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.table_channel_videos.setItem(table_row, 3, cc_item)
-            
-            upload_date = format_date_to_ddmmyyyy(video.get('upload_date', ''))
-            self.table_channel_videos.setItem(table_row, 4, QTableWidgetItem(upload_date))
-            
-            self.table_channel_videos.setItem(table_row, 5, QTableWidgetItem(str(video.get('duration', 'N/A'))))
-            self.table_channel_videos.setItem(table_row, 6, QTableWidgetItem(str(video.get('category_name', 'Không xác định'))))
-            
-            url = video.get('url', 'N/A')
-            url_item = QTableWidgetItem(url)
-            url_item.setToolTip(f"Nhấp để mở: {url}\nNhấp chuột phải để sao chép URL.")
-            url_item.setForeground(QColor('#4da6ff'))
-            url_item.setFont(QFont('Arial', 10, QFont.Weight.Normal, True))
-            url_item.setData(Qt.ItemDataRole.UserRole, QUrl(url))
-            self.table_channel_videos.setItem(table_row, 7, url_item)
-
-            btn_open = QPushButton("Mở")
-            btn_open.setFont(QFont("Arial", 9))
-            btn_open.clicked.connect(lambda checked, u=video.get('url'): self.main_window.open_url_externally(u))
-            self.table_channel_videos.setCellWidget(table_row, 8, btn_open)
-
-        self.table_channel_videos.resizeRowsToContents()
-
-    def _handle_table_cell_click(self, row, column):
-        if column == 7:
-            item = self.table_channel_videos.item(row, column)
-            if item:
-                url = item.data(Qt.ItemDataRole.UserRole)
-                if url and url.isValid():
-                    QDesktopServices.openUrl(url)
+        minimums = {
+            'view_count': min_views,
+            'comment_count': min_comments,
+            'duration': min_duration_minutes * 60,
+        }
+        # Bộ lọc chỉ được giữ (và áp cho các lô video đến sau) khi có ít nhất một ngưỡng > 0
+        self.active_filters = minimums if any(value > 0 for value in minimums.values()) else None
+
+        store = self.result_model.store
+        if self.active_filters is None:
+            visible_rows = None
+        else:
+            # Chỉ các dòng mới được chuẩn hóa (số, thời lượng giây); lọc là phép so sánh trên mảng
+            self.result_filter.sync(store)
+            visible_rows = self.result_filter.select(self.active_filters)
+        self.result_model.set_visible_rows(visible_rows)
+        if len(store):
+            self.main_window.statusBar().showMessage(f"Đã lọc và hiển thị {self.proxy_model.rowCount()} kết quả.", 5000)
+
+    def _filter_new_rows(self, start, end):
+        """Store rows in [start, end) that pass the active filter (see ResultTableModel.append_records)."""
+        self.result_filter.sync(self.result_model.store)
+        return self.result_filter.select(self.active_filters, start=start)
+
+    def _handle_table_cell_click(self, index):
+        column = CHANNEL_VIDEO_COLUMNS[index.column()]
+        if column.field == 'url' or column.kind == 'action':
+            url = self.proxy_model.record(index.row()).get('url')
+            if url and url != 'N/A':
+                QDesktopServices.openUrl(QUrl(url))
 
     def _channel_video_table_context_menu(self, pos):
-        selected_item = self.table_channel_videos.itemAt(pos)
-        if not selected_item: return
-        column = selected_item.column()
-        if column == 7:
+        index = self.table_channel_videos.indexAt(pos)
+        if not index.isValid(): return
+        if CHANNEL_VIDEO_COLUMNS[index.column()].field == 'url':
             menu = QMenu()
             copy_url_action = menu.addAction("Sao chép URL Video")
-            action = menu.exec(self.table_channel_videos.mapToGlobal(pos))
+            action = menu.exec(self.table_channel_videos.viewport().mapToGlobal(pos))
             if action == copy_url_action:
-                self.main_window.copy_text_to_clipboard(selected_item.text())
+                self.main_window.copy_text_to_clipboard(self.proxy_model.record(index.row()).get('url'))
 
     def _export_channel_videos_to_excel(self):
-        if self.table_channel_videos.rowCount() == 0:
+        if self.main_window.is_operation_running:
+            QMessageBox.warning(self.main_window, "Đang xử lý", "Một tác vụ khác đang chạy. Vui lòng chờ.")
+            return
+
+        rows = self.proxy_model.rowCount()
+        if rows == 0:
             QMessageBox.information(self.main_window, "Không có dữ liệu", "Không có dữ liệu đã lọc để xuất.")
             return
 
         default_filename = f"Filtered_Channels_Videos_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
         
-        file_path, _ = QFileDialog.getSaveFileName(
-            self.main_window, "Lưu file Excel", default_filename, "Excel Files (*.xlsx)"
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self.main_window, "Lưu file kết quả", default_filename, export_file_filter('.xlsx')
         )
         if not file_path:
             return
+        file_path = export_path_with_extension(file_path, selected_filter)
+
+        # Ghi các dòng đang hiển thị (đúng thứ tự sắp xếp) từ kho dữ liệu trên luồng riêng
+        headers, int_columns, float_columns, link_columns = self.result_model.export_layout()
+        self.export_thread = ExportThread(
+            file_path, headers, self.result_model.export_rows(self.proxy_model.store_rows()), rows,
+            int_columns=int_columns, link_columns=link_columns, float_columns=float_columns,
+            sheet_title="Filtered_Results", parent=self
+        )
+        self.export_thread.progress_updated.connect(self.main_window.update_progress_dialog)
+        self.export_thread.export_finished.connect(self._on_export_finished)
+        self.export_thread.error_occurred.connect(self._on_export_error)
+        self.export_thread.finished.connect(self.main_window.on_worker_thread_finished)
+        self.main_window.worker_started(self.export_thread, "Xuất dữ liệu")
+        self.main_window.show_progress_dialog("Đang xuất kết quả đã lọc...", 0)
+        self.export_thread.start()
 
-        try:
-            self.main_window.statusBar().showMessage("Đang xuất kết quả đã lọc ra Excel...")
-            workbook = openpyxl.Workbook()
-            sheet = workbook.active
-            sheet.title = "Filtered_Results"
-
-            # Lấy headers từ bảng (trừ cột cuối 'Hành động')
-            headers = [self.table_channel_videos.horizontalHeaderItem(i).text() for i in range(self.table_channel_videos.columnCount() - 1)]
-            sheet.append(headers)
-
-            # Lặp qua từng hàng trong bảng và ghi dữ liệu ra file
-            for row in range(self.table_channel_videos.rowCount()):
-                row_data = []
-                for col in range(len(headers)):
-                    item = self.table_channel_videos.item(row, col)
-                    if item:
-                        # Đối với cột số, lấy dữ liệu gốc để tính toán
-                        if col == 2 or col == 3: # Cột Lượt xem, Bình luận
-                            value = item.data(Qt.ItemDataRole.UserRole)
-                        else:
-                            value = item.text()
-                        row_data.append(value)
-                    else:
-                        row_data.append('') # Thêm ô trống nếu item không tồn tại
-                sheet.append(row_data)
-
-                # Xử lý hyperlink cho cột URL (cột thứ 8, index 7)
-                url_cell = sheet.cell(row=row + 2, column=8) # +2 vì Excel row bắt đầu từ 1 và có 1 hàng header
-                url = url_cell.value
-                if url and "https://" in str(url):
-                    url_cell.hyperlink = url
-                    url_cell.font = Font(color="0000FF", underline="single")
-
-            # Tự động điều chỉnh độ rộng cột
-            for i, column_cells in enumerate(sheet.columns):
-                max_length = 0
-                column_letter = get_column_letter(i + 1)
-                for cell in column_cells:
-                    if cell.value:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except Exception:
-                            pass  # Non-critical: ignore errors when calculating column width
-                adjusted_width = min(max_length + 2, 70)
-                sheet.column_dimensions[column_letter].width = adjusted_width
-
-            workbook.save(file_path)
-            self.main_window.statusBar().showMessage(f"Đã xuất thành công: {file_path}", 5000)
-            QMessageBox.information(self.main_window, "Thành công",
-                                   f"Dữ liệu đã lọc đã được xuất ra file:\n{file_path}")
-        except Exception as e:
-            self.main_window.statusBar().showMessage(f"Lỗi khi xuất Excel: {str(e)}")
-            QMessageBox.critical(self.main_window, "Lỗi Xuất Excel", f"Lỗi: {str(e)}")
-            logger.exception(f"Export channel videos Excel error: {e}")
+    def _on_export_finished(self, file_path, written):
+        self.main_window.statusBar().showMessage(f"Đã xuất thành công: {file_path}", 5000)
+        QMessageBox.information(self.main_window, "Thành công",
+                               f"Dữ liệu đã lọc đã được xuất ra file:\n{file_path}")
+
+    def _on_export_error(self, error_message):
+        self.main_window.statusBar().showMessage(f"Lỗi khi xuất dữ liệu: {error_message}")
+        QMessageBox.critical(self.main_window, "Lỗi Xuất dữ liệu", error_message)
 
 
     def set_buttons_enabled(self, enabled):
         self.btn_analyze_channel.setEnabled(enabled)
         self.btn_apply_filters.setEnabled(enabled)
-        self.btn_export_channel_videos.setEnabled(enabled and self.table_channel_videos.rowCount() > 0)
\ No newline at end of file
+        self.btn_export_channel_videos.setEnabled(enabled and self.proxy_model.rowCount() > 0)
\ No newline at end of file
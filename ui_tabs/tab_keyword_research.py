@@ -1,34 +1,52 @@
 import json
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone, timedelta
-import openpyxl
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font, Alignment
 
 logger = logging.getLogger(__name__)
 from isodate import parse_duration
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
-    QPushButton, QTableWidget, QTableWidgetItem, QMessageBox,
+    QPushButton, QTableView, QAbstractItemView, QMessageBox,
     QFileDialog, QGroupBox, QHeaderView, QComboBox, QSpinBox,
-    QAbstractSpinBox, QMenu, QCheckBox, QGridLayout, QWidgetAction
+    QAbstractSpinBox, QMenu, QCheckBox, QGridLayout, QWidgetAction, QInputDialog
 )
 from PyQt6.QtCore import Qt, QThread, pyqtSignal, QUrl, QSettings, QPoint
-from PyQt6.QtGui import QDesktopServices, QCursor, QFont, QColor, QAction
+from PyQt6.QtGui import QDesktopServices, QCursor, QAction
 
 from config import (
     YOUTUBE_REGION_LANGUAGE_MAP,
     VIDEO_DURATION_OPTIONS,
     UPLOAD_DATE_OPTIONS_DESC,
     ORDER_OPTIONS_MAP,
-    VIDEO_DEFINITION_OPTIONS_MAP
+    VIDEO_DEFINITION_OPTIONS_MAP,
+    SEARCH_ENRICH_MAX_WORKERS,
+    DEEP_SEARCH_MAX_RESULTS,
+    DEEP_SEARCH_QUOTA_BUDGET,
+    BATCH_SEARCH_MAX_WORKERS,
+    BATCH_SEARCH_QUOTA_CEILING,
+    BATCH_SEARCH_RESULTS_PER_KEYWORD
 )
-from utils import format_date_dd_mm_yyyy, convert_iso_duration, format_int_with_separator
+from utils import convert_iso_duration
 from services.api_manager import APIKeyManager, YouTubeService
+from services.result_filters import ResultFilterEngine
+from services.result_scores import ResultScorer
+from services.exporter import export_file_filter, export_path_with_extension
+from services import local_corpus
+from services.deep_search import DeepSearch, QuotaBudget, parse_rfc3339, round_search_time, to_rfc3339
+from services.quota_scheduler import quota_cost
+from services.quota_planner import plan_keyword_search
+from ui_components import (
+    confirm_quota_plan, PLAN_THROTTLE, ResultColumn, ResultTableModel, ResultFilterProxyModel,
+    SCORE_RESULT_COLUMNS, NgramAnalyticsDialog
+)
+from ui_tabs.export_workers import ExportThread
 from googleapiclient.errors import HttpError
 
 class SearchVideosThread(QThread):
     videos_fetched = pyqtSignal(list)
+    videos_batch_ready = pyqtSignal(list)
     error_occurred = pyqtSignal(str)
     progress_updated = pyqtSignal(int, str)
 
@@ -36,7 +54,7 @@ class SearchVideosThread(QThread):
                  order='relevance', video_category_id=None,
                  video_categories_map=None, published_after_iso=None,
                  is_shorts_only=False, min_duration_seconds=0,
-                 excluded_category_ids=None, parent=None):
+                 excluded_category_ids=None, refresh_cache=False, deep_search=False, parent=None):
         super().__init__(parent)
         self.api_key = api_key
         self.keyword = keyword
@@ -50,7 +68,15 @@ class SearchVideosThread(QThread):
         self.is_shorts_only = is_shorts_only
         self.min_duration_seconds = min_duration_seconds
         self.excluded_category_ids = excluded_category_ids or []
+        self.refresh_cache = refresh_cache
+        self.deep_search = deep_search
         self._is_interruption_requested = False
+        # Các trang được làm giàu song song nhưng gửi lên bảng theo đúng thứ tự trang (thứ tự xếp hạng
+        # của 'order'): trang xong sớm được giữ lại tới khi các trang trước nó xong
+        self._page_order_lock = threading.Lock()
+        self._submitted_pages = 0
+        self._next_page_to_emit = 0
+        self._enriched_pages = {}
 
     def run(self):
         if not self.api_key:
@@ -64,159 +90,79 @@ class SearchVideosThread(QThread):
             self.progress_updated.emit(0, "Đang kết nối tới YouTube...")
 
             # Initialize Service with Key Manager
-            youtube_service_wrapper = YouTubeService()
+            youtube_service_wrapper = YouTubeService(refresh_cache=self.refresh_cache)
             
             if self.isInterruptionRequested(): return
             if self.isInterruptionRequested(): return
             
             self.progress_updated.emit(10, f"Đang tìm kiếm video với từ khóa: '{self.keyword}'...")
 
-            all_video_ids = []
-            all_channel_ids = []
+            # Mỗi trang kết quả được làm giàu (kênh + chi tiết video) ngay khi về, song song với việc
+            # lấy trang tiếp theo; các dòng hoàn chỉnh được gửi dần qua videos_batch_ready
+            seen_video_ids = set()
+            page_futures = []
             next_page_token = None
             fetched_count = 0
 
-            while fetched_count < self.max_results:
-                if self.isInterruptionRequested(): return
-                num_to_fetch_this_page = min(50, self.max_results - fetched_count)
-                if num_to_fetch_this_page <= 0: break
-
-                search_params = {
-                    'q': self.keyword,
-                    'part': 'snippet',
-                    'type': 'video',
-                    'maxResults': num_to_fetch_this_page,
-                    'pageToken': next_page_token,
-                    'order': self.order
-                }
-                if self.region_code: search_params['regionCode'] = self.region_code
-                if self.language_code: search_params['relevanceLanguage'] = self.language_code
-                if self.video_category_id: search_params['videoCategoryId'] = self.video_category_id
-                if self.published_after_iso: search_params['publishedAfter'] = self.published_after_iso
-                
-                if self.is_shorts_only:
-                    search_params['videoDuration'] = 'short'
-
-                # Use the wrapper's search_videos which expects kwargs that match list() arguments
-                # Note: 'q' is already in search_params, so we pass **search_params
-                search_response = youtube_service_wrapper.search_videos(**search_params)
-                if self.isInterruptionRequested(): return
-
-                current_page_ids = []
-                current_channel_ids = []
-                for item in search_response.get('items', []):
-                    if item.get('id', {}).get('kind') == 'youtube#video':
-                        current_page_ids.append(item['id']['videoId'])
-                        current_channel_ids.append(item['snippet']['channelId'])
-                all_video_ids.extend(current_page_ids)
-                all_channel_ids.extend(current_channel_ids)
-                fetched_count += len(current_page_ids)
-                next_page_token = search_response.get('nextPageToken')
-                
-                search_progress = 10 + int(20 * (fetched_count / self.max_results)) if self.max_results > 0 else 10
-                self.progress_updated.emit(min(30, search_progress), f"Đang tìm ID video ({fetched_count}/{self.max_results})...")
-                
-                if not next_page_token or not current_page_ids: 
-                    break
-            
-            if not all_video_ids:
-                self.videos_fetched.emit([])
-                self.progress_updated.emit(100, "Không tìm thấy video nào khớp với tiêu chí.")
-                return
-
-            self.progress_updated.emit(30, f"Đã tìm thấy {len(all_video_ids)} ID video. Đang lấy chi tiết...")
+            stage_pool = ThreadPoolExecutor(max_workers=SEARCH_ENRICH_MAX_WORKERS, thread_name_prefix="search-enrich")
 
-            channel_details = {}
-            for i in range(0, len(all_channel_ids), 50):
-                if self.isInterruptionRequested(): return
-                chunk_ids = all_channel_ids[i:i+50]
-                channels_response = youtube_service_wrapper.get_channel_details(
-                    part='snippet,statistics',
-                    id=','.join(chunk_ids)
-                )
-                for channel in channels_response.get('items', []):
-                    stats = channel.get('statistics', {})
-                    channel_details[channel['id']] = {
-                        'title': channel['snippet']['title'],
-                        'subscriber_count': stats.get('subscriberCount'),
-                        'video_count': stats.get('videoCount'),
-                        'view_count': stats.get('viewCount')
-                    }
-
-            video_details_list = []
-            for i in range(0, len(all_video_ids), 50):
-                if self.isInterruptionRequested(): return
-                chunk_ids = all_video_ids[i:i+50]
-                # Fallback to key manager for raw call if wrapper doesn't have it, 
-                # OR update wrapper in parallel.
-                # Let's assume we update wrapper.
-                videos_response = youtube_service_wrapper.get_video_details(
-                    part='snippet,statistics,contentDetails',
-                    id=','.join(chunk_ids)
-                )
-                video_details_list.extend(videos_response.get('items', []))
-                details_progress = 30 + int(60 * (len(video_details_list) / len(all_video_ids)))
-                self.progress_updated.emit(details_progress, f"Đang lấy chi tiết video ({len(video_details_list)}/{len(all_video_ids)})...")
-
-            if self.isInterruptionRequested(): return
-            results = []
-            for idx, video_data in enumerate(video_details_list):
-                if self.isInterruptionRequested(): return
-                snippet = video_data.get('snippet', {})
-                statistics = video_data.get('statistics', {})
-                content_details = video_data.get('contentDetails', {})
-                
-                duration_str = content_details.get('duration', 'PT0S')
-                try:
-                    duration_seconds = parse_duration(duration_str).total_seconds()
-                except Exception as e:
-                    logger.debug(f"Could not parse duration '{duration_str}': {e}")
-                    duration_seconds = 0
-
-                if self.is_shorts_only:
-                    if duration_seconds >= 60:
-                        continue
-                elif self.min_duration_seconds > 0:
-                    if duration_seconds < self.min_duration_seconds:
-                        continue
-                
-                category_id = snippet.get('categoryId', '')
-                if category_id in self.excluded_category_ids:
-                    continue
-                category_name = next((name for name, cid_val in self.video_categories_map.items() if cid_val == category_id), 'Không xác định')
+            def submit_page(video_ids, channel_ids):
+                page_futures.append(self._submit_page(stage_pool, youtube_service_wrapper, video_ids, channel_ids))
 
-                raw_comment_count = statistics.get('commentCount')
-                comment_count_val = None
-                if raw_comment_count is not None:
-                    try:
-                        comment_count_val = int(raw_comment_count)
-                    except ValueError:
-                        comment_count_val = None
-
-                channel_id = snippet.get('channelId', '')
-                channel_info = channel_details.get(channel_id, {
-                    'title': 'N/A',
-                    'subscriber_count': None,
-                    'video_count': None,
-                    'view_count': None
-                })
-
-                results.append({
-                    'id': video_data['id'],
-                    'title': snippet.get('title', 'N/A'),
-                    'url': f"https://www.youtube.com/watch?v={video_data['id']}",
-                    'view_count': int(statistics.get('viewCount', 0)),
-                    'comment_count': comment_count_val,
-                    'upload_date': snippet.get('publishedAt', 'N/A'),
-                    'duration': convert_iso_duration(content_details.get('duration', 'N/A')),
-                    'category_name': category_name,
-                    'tags': snippet.get('tags', []),
-                    'channel_title': channel_info['title'],
-                    'channel_url': f"https://www.youtube.com/channel/{channel_id}" if channel_id else 'N/A',
-                    'subscriber_count': channel_info['subscriber_count'],
-                    'video_count': channel_info['video_count'],
-                    'channel_view_count': channel_info['view_count']
-                })
+            try:
+                if self.deep_search:
+                    seen_video_ids.update(self._run_deep_search(youtube_service_wrapper, submit_page))
+                    if self.isInterruptionRequested(): return
+                else:
+                    while fetched_count < self.max_results:
+                        if self.isInterruptionRequested(): return
+                        num_to_fetch_this_page = min(50, self.max_results - fetched_count)
+                        if num_to_fetch_this_page <= 0: break
+
+                        search_params = dict(
+                            self._build_search_params(),
+                            maxResults=num_to_fetch_this_page,
+                            pageToken=next_page_token
+                        )
+                        search_response = youtube_service_wrapper.search_videos(**search_params)
+                        if self.isInterruptionRequested(): return
+
+                        current_page_ids = []
+                        current_channel_ids = []
+                        page_item_count = 0
+                        for item in search_response.get('items', []):
+                            if item.get('id', {}).get('kind') == 'youtube#video':
+                                page_item_count += 1
+                                video_id = item['id']['videoId']
+                                if video_id in seen_video_ids:
+                                    continue
+                                seen_video_ids.add(video_id)
+                                current_page_ids.append(video_id)
+                                current_channel_ids.append(item['snippet']['channelId'])
+                        fetched_count += page_item_count
+                        next_page_token = search_response.get('nextPageToken')
+
+                        if current_page_ids:
+                            submit_page(current_page_ids, current_channel_ids)
+
+                        search_progress = 10 + int(80 * (fetched_count / self.max_results)) if self.max_results > 0 else 10
+                        self.progress_updated.emit(min(90, search_progress), f"Đang tìm và lấy chi tiết video ({fetched_count}/{self.max_results})...")
+
+                        if not next_page_token or not page_item_count:
+                            break
+
+                if not page_futures:
+                    self.videos_fetched.emit([])
+                    self.progress_updated.emit(100, "Không tìm thấy video nào khớp với tiêu chí.")
+                    return
+
+                self.progress_updated.emit(90, f"Đã tìm thấy {len(seen_video_ids)} video. Đang hoàn tất lấy chi tiết...")
+                results = []
+                for future in page_futures:
+                    results.extend(future.result())
+                    if self.isInterruptionRequested(): return
+            finally:
+                stage_pool.shutdown(wait=True, cancel_futures=True)
 
             self.progress_updated.emit(100, "Hoàn tất lấy thông tin video.")
             self.videos_fetched.emit(results)
@@ -237,6 +183,153 @@ class SearchVideosThread(QThread):
             logger.exception(f"SearchVideosThread error: {e}")
             self.error_occurred.emit(f"Lỗi không mong đợi: {str(e)}")
 
+    def _build_search_params(self, keyword=None):
+        search_params = {
+            'q': keyword or self.keyword,
+            'part': 'snippet',
+            'type': 'video',
+            'order': self.order
+        }
+        if self.region_code: search_params['regionCode'] = self.region_code
+        if self.language_code: search_params['relevanceLanguage'] = self.language_code
+        if self.video_category_id: search_params['videoCategoryId'] = self.video_category_id
+        if self.published_after_iso: search_params['publishedAfter'] = self.published_after_iso
+        if self.is_shorts_only:
+            search_params['videoDuration'] = 'short'
+        return search_params
+
+    def _submit_page(self, stage_pool, youtube_service_wrapper, video_ids, channel_ids):
+        """Queues the enrichment of one page of search results; returns the future of its rows."""
+        with self._page_order_lock:
+            page_index = self._submitted_pages
+            self._submitted_pages += 1
+        channel_future = stage_pool.submit(
+            youtube_service_wrapper.get_channels_by_ids,
+            channel_ids,
+            part='snippet,statistics',
+            is_cancelled=self.isInterruptionRequested
+        )
+        page_future = stage_pool.submit(self._enrich_page, youtube_service_wrapper, video_ids, channel_future)
+        page_future.add_done_callback(lambda future: self._on_page_enriched(page_index, future))
+        return page_future
+
+    def _on_page_enriched(self, page_index, future):
+        """Emits the rows of every finished page whose earlier pages are all emitted, in page order."""
+        rows = [] if future.cancelled() or future.exception() is not None else future.result()
+        with self._page_order_lock:
+            self._enriched_pages[page_index] = rows
+            while self._next_page_to_emit in self._enriched_pages:
+                page_rows = self._enriched_pages.pop(self._next_page_to_emit)
+                self._next_page_to_emit += 1
+                # Phát trong khóa để các lô đến slot của UI đúng thứ tự
+                if page_rows and not self.isInterruptionRequested():
+                    self.videos_batch_ready.emit(page_rows)
+
+    def _run_deep_search(self, youtube_service_wrapper, submit_page):
+        """Splits the query into publishedAfter/publishedBefore windows to go past ~500 results."""
+        published_after = parse_rfc3339(self.published_after_iso) if self.published_after_iso else None
+        deep_search = DeepSearch(
+            youtube_service_wrapper,
+            self._build_search_params(),
+            published_after=published_after,
+            max_results=self.max_results
+        )
+
+        def on_page(video_ids, channel_ids):
+            submit_page(video_ids, channel_ids)
+            found = deep_search.found_count
+            progress = 10 + int(80 * (found / self.max_results)) if self.max_results > 0 else 10
+            self.progress_updated.emit(
+                min(90, progress),
+                f"Tìm sâu: {found} video, đã dùng {deep_search.budget.spent}/{deep_search.budget.units} quota..."
+            )
+
+        video_ids = deep_search.run(on_page=on_page, is_cancelled=self.isInterruptionRequested)
+        if deep_search.budget_exhausted:
+            logger.info("Tìm sâu dừng vì đã dùng hết ngân sách quota.")
+        return video_ids
+
+    def _enrich_page(self, youtube_service_wrapper, video_ids, channel_future):
+        """Runs on a stage thread: fetches the details of one search page and returns its rows."""
+        video_items = youtube_service_wrapper.get_videos_by_ids(
+            video_ids,
+            part='snippet,statistics,contentDetails',
+            is_cancelled=self.isInterruptionRequested
+        )
+        channel_details = {}
+        for channel in channel_future.result():
+            stats = channel.get('statistics', {})
+            channel_details[channel['id']] = {
+                'title': channel['snippet']['title'],
+                'subscriber_count': stats.get('subscriberCount'),
+                'video_count': stats.get('videoCount'),
+                'view_count': stats.get('viewCount')
+            }
+
+        return [row for row in (self._build_video_row(video_data, channel_details) for video_data in video_items) if row]
+
+    def _build_video_row(self, video_data, channel_details):
+        """Returns the table row for one videos().list item, or None if it is filtered out."""
+        snippet = video_data.get('snippet', {})
+        statistics = video_data.get('statistics', {})
+        content_details = video_data.get('contentDetails', {})
+        
+        duration_str = content_details.get('duration', 'PT0S')
+        try:
+            duration_seconds = parse_duration(duration_str).total_seconds()
+        except Exception as e:
+            logger.debug(f"Could not parse duration '{duration_str}': {e}")
+            duration_seconds = 0
+
+        if self.is_shorts_only:
+            if duration_seconds >= 60:
+                return None
+        elif self.min_duration_seconds > 0:
+            if duration_seconds < self.min_duration_seconds:
+                return None
+        
+        category_id = snippet.get('categoryId', '')
+        if category_id in self.excluded_category_ids:
+            return None
+        category_name = next((name for name, cid_val in self.video_categories_map.items() if cid_val == category_id), 'Không xác định')
+
+        raw_comment_count = statistics.get('commentCount')
+        comment_count_val = None
+        if raw_comment_count is not None:
+            try:
+                comment_count_val = int(raw_comment_count)
+            except ValueError:
+                comment_count_val = None
+
+        channel_id = snippet.get('channelId', '')
+        channel_info = channel_details.get(channel_id, {
+            'title': 'N/A',
+            'subscriber_count': None,
+            'video_count': None,
+            'view_count': None
+        })
+
+        return {
+            'id': video_data['id'],
+            'title': snippet.get('title', 'N/A'),
+            'url': f"https://www.youtube.com/watch?v={video_data['id']}",
+            'view_count': int(statistics.get('viewCount', 0)),
+            'comment_count': comment_count_val,
+            'upload_date': snippet.get('publishedAt', 'N/A'),
+            'duration': convert_iso_duration(content_details.get('duration', 'N/A')),
+            'category_name': category_name,
+            'tags': snippet.get('tags', []),
+            'channel_title': channel_info['title'],
+            'channel_url': f"https://www.youtube.com/channel/{channel_id}" if channel_id else 'N/A',
+            'subscriber_count': channel_info['subscriber_count'],
+            'video_count': channel_info['video_count'],
+            'channel_view_count': channel_info['view_count'],
+            'matched_keywords': self._matched_keywords(video_data['id'])
+        }
+
+    def _matched_keywords(self, video_id):
+        return [self.keyword]
+
     def requestInterruption(self):
         self._is_interruption_requested = True
         super().requestInterruption()
@@ -244,6 +337,159 @@ class SearchVideosThread(QThread):
     def isInterruptionRequested(self):
         return self._is_interruption_requested or super().isInterruptionRequested()
 
+class BatchKeywordSearchThread(SearchVideosThread):
+    """
+    Searches a list of keywords concurrently (keyword_workers at a time) under one shared
+    quota ceiling for search.list. A video found by several keywords is enriched only once;
+    its row lists every keyword that matched it in 'matched_keywords'.
+    """
+
+    def __init__(self, api_key, keywords, keyword_workers=BATCH_SEARCH_MAX_WORKERS,
+                 quota_ceiling=BATCH_SEARCH_QUOTA_CEILING, max_results=BATCH_SEARCH_RESULTS_PER_KEYWORD, **kwargs):
+        keywords = list(dict.fromkeys(keyword.strip() for keyword in keywords if keyword.strip()))
+        super().__init__(api_key, keywords[0] if keywords else '', max_results=max_results, **kwargs)
+        self.keywords = keywords
+        self.keyword_workers = max(1, keyword_workers)
+        self.quota_ceiling = quota_ceiling
+        self._video_keywords = {}  # video_id -> danh sách từ khóa tìm thấy video đó
+        self._keywords_lock = threading.Lock()
+
+    def run(self):
+        if not self.api_key:
+            self.error_occurred.emit("Vui lòng nhập API Key ở Tab 1 (API Key).")
+            return
+        if not self.keywords:
+            self.error_occurred.emit("Vui lòng nhập danh sách từ khóa.")
+            return
+
+        try:
+            self.progress_updated.emit(0, "Đang kết nối tới YouTube...")
+            youtube_service_wrapper = YouTubeService(refresh_cache=self.refresh_cache)
+            budget = QuotaBudget(self.quota_ceiling)
+            page_futures = []
+
+            stage_pool = ThreadPoolExecutor(max_workers=SEARCH_ENRICH_MAX_WORKERS, thread_name_prefix="search-enrich")
+            keyword_pool = ThreadPoolExecutor(max_workers=self.keyword_workers, thread_name_prefix="batch-keyword")
+
+            def on_keyword_page(keyword, video_ids, channel_ids):
+                new_video_ids = []
+                new_channel_ids = []
+                with self._keywords_lock:
+                    for video_id, channel_id in zip(video_ids, channel_ids):
+                        matched = self._video_keywords.get(video_id)
+                        if matched is None:
+                            self._video_keywords[video_id] = [keyword]
+                            new_video_ids.append(video_id)
+                            new_channel_ids.append(channel_id)
+                        elif keyword not in matched:
+                            matched.append(keyword)
+                # Video đã được từ khóa khác tìm thấy thì không cần lấy chi tiết lại
+                if new_video_ids:
+                    page_futures.append(
+                        self._submit_page(stage_pool, youtube_service_wrapper, new_video_ids, new_channel_ids)
+                    )
+
+            try:
+                keyword_futures = [
+                    keyword_pool.submit(self._search_keyword, youtube_service_wrapper, keyword, budget, on_keyword_page)
+                    for keyword in self.keywords
+                ]
+                for done_count, future in enumerate(as_completed(keyword_futures), 1):
+                    future.result()
+                    if self.isInterruptionRequested(): return
+                    with self._keywords_lock:
+                        found = len(self._video_keywords)
+                    self.progress_updated.emit(
+                        10 + int(80 * done_count / len(self.keywords)),
+                        f"Đã tìm xong {done_count}/{len(self.keywords)} từ khóa: {found} video, "
+                        f"đã dùng {budget.spent}/{budget.units} quota..."
+                    )
+
+                if budget.remaining < quota_cost('search.list'):
+                    logger.info("Tìm nhiều từ khóa dừng sớm vì đã chạm giới hạn quota.")
+
+                if not page_futures:
+                    self.videos_fetched.emit([])
+                    self.progress_updated.emit(100, "Không tìm thấy video nào khớp với tiêu chí.")
+                    return
+
+                self.progress_updated.emit(90, "Đang hoàn tất lấy chi tiết video...")
+                results = []
+                for future in page_futures:
+                    results.extend(future.result())
+                    if self.isInterruptionRequested(): return
+            finally:
+                keyword_pool.shutdown(wait=True, cancel_futures=True)
+                stage_pool.shutdown(wait=True, cancel_futures=True)
+
+            # Danh sách từ khóa có thể đã được bổ sung sau khi dòng được tạo
+            for row in results:
+                row['matched_keywords'] = self._matched_keywords(row['id'])
+            self.progress_updated.emit(100, f"Hoàn tất {len(self.keywords)} từ khóa.")
+            self.videos_fetched.emit(results)
+
+        except HttpError as e:
+            if self.isInterruptionRequested(): return
+            try:
+                error_content = json.loads(e.content.decode('utf-8'))
+                error_message = error_content.get("error", {}).get("message", "Lỗi API không xác định.")
+                if e.resp.status == 403 and ("quotaExceeded" in error_message or "dailyLimitExceeded" in error_message):
+                    self.error_occurred.emit("Lỗi: Hạn ngạch API đã bị vượt quá.")
+                else:
+                    self.error_occurred.emit(f"Lỗi API: {error_message} (Code: {e.resp.status})")
+            except json.JSONDecodeError:
+                self.error_occurred.emit(f"Lỗi API (không thể phân tích phản hồi): {e.content.decode('utf-8', errors='ignore')}")
+        except Exception as e:
+            if self.isInterruptionRequested(): return
+            logger.exception(f"BatchKeywordSearchThread error: {e}")
+            self.error_occurred.emit(f"Lỗi không mong đợi: {str(e)}")
+
+    def _search_keyword(self, youtube_service_wrapper, keyword, budget, on_keyword_page):
+        """Runs on a keyword thread: pages through one keyword while the shared budget allows it."""
+        def on_page(video_ids, channel_ids):
+            on_keyword_page(keyword, video_ids, channel_ids)
+
+        if self.deep_search:
+            published_after = parse_rfc3339(self.published_after_iso) if self.published_after_iso else None
+            DeepSearch(
+                youtube_service_wrapper,
+                self._build_search_params(keyword),
+                published_after=published_after,
+                max_results=self.max_results,
+                quota_budget=budget
+            ).run(on_page=on_page, is_cancelled=self.isInterruptionRequested)
+            return
+
+        next_page_token = None
+        fetched_count = 0
+        while fetched_count < self.max_results:
+            if self.isInterruptionRequested(): return
+            search_params = dict(
+                self._build_search_params(keyword),
+                maxResults=min(50, self.max_results - fetched_count),
+                pageToken=next_page_token
+            )
+            # Trang lấy từ cache không tốn quota nên không bị tính vào trần chi tiêu
+            search_response = youtube_service_wrapper.cached_response('search.list', search_params)
+            if search_response is None:
+                if not budget.try_spend(quota_cost('search.list')): return
+                search_response = youtube_service_wrapper.search_videos(**search_params)
+            video_ids = []
+            channel_ids = []
+            for item in search_response.get('items', []):
+                if item.get('id', {}).get('kind') == 'youtube#video':
+                    video_ids.append(item['id']['videoId'])
+                    channel_ids.append(item['snippet']['channelId'])
+            fetched_count += len(video_ids)
+            on_page(video_ids, channel_ids)
+            next_page_token = search_response.get('nextPageToken')
+            if not next_page_token or not video_ids:
+                return
+
+    def _matched_keywords(self, video_id):
+        with self._keywords_lock:
+            return list(self._video_keywords.get(video_id, []))
+
 class SearchChannelsThread(QThread):
     channels_fetched = pyqtSignal(list)
     error_occurred = pyqtSignal(str)
@@ -381,12 +627,59 @@ class SearchChannelsThread(QThread):
     def isInterruptionRequested(self):
         return self._is_interruption_requested or super().isInterruptionRequested()
 
+VIDEO_RESULT_COLUMNS = [
+    ResultColumn("Tiêu đề", 'title'),
+    ResultColumn("URL Video", 'url', kind='link', width=180),
+    ResultColumn("Lượt xem", 'view_count', kind='int', width=100),
+    ResultColumn("Bình luận", 'comment_count', kind='int', width=100, missing_text="N/A (Tắt)"),
+    ResultColumn("Ngày tải lên", 'upload_date', kind='date', width=150),
+    ResultColumn("Thời lượng", 'duration', width=100),
+    ResultColumn("Tên kênh", 'channel_title', kind='link', width=120),
+    ResultColumn("URL Kênh", 'channel_url', kind='link', width=150),
+    ResultColumn("Số Sub của Kênh", 'subscriber_count', kind='int', width=100, tooltip="Tổng số người đăng ký của kênh"),
+    ResultColumn("Số video của Kênh", 'video_count', kind='int', width=100, tooltip="Tổng số video của kênh"),
+    ResultColumn("Số lượt Xem toàn kênh", 'channel_view_count', kind='int', width=100, tooltip="Tổng số lượt xem của toàn kênh"),
+    *SCORE_RESULT_COLUMNS,
+    ResultColumn("Danh mục", 'category_name', width=100, missing_text="Không xác định"),
+    ResultColumn("Thẻ (Tags)", 'tags', kind='list', width=150, missing_text="Không có"),
+    ResultColumn("Từ khóa khớp", 'matched_keywords', kind='list', width=150, missing_text=""),
+    ResultColumn("Hành động", kind='action', width=80, action_text="Mở"),
+]
+
+# Các cột được chuẩn hóa cho bộ lọc kết quả (xem ResultFilterEngine)
+VIDEO_FILTER_FIELDS = {
+    'int_fields': ('view_count', 'subscriber_count', 'comment_count'),
+    'date_fields': ('upload_date',),
+}
+
+CHANNEL_RESULT_COLUMNS = [
+    ResultColumn("Tên kênh", 'title'),
+    ResultColumn("URL Kênh", 'url', kind='link', width=180),
+    ResultColumn("Số Sub", 'subscriber_count', kind='int', width=100, missing_text="Bị ẩn"),
+    ResultColumn("Số Video", 'video_count', kind='int', width=100),
+    ResultColumn("Tổng lượt xem", 'view_count', kind='int', width=120),
+    ResultColumn("Ngày tạo", 'published_at', kind='date', width=100),
+    ResultColumn("Mô tả", 'description', missing_text=""),
+]
+
+CHANNEL_FILTER_FIELDS = {
+    'int_fields': ('view_count', 'subscriber_count'),
+    'date_fields': ('published_at',),
+}
+
 class KeywordResearchTab(QWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
         self.search_thread = None
-        self.videos_data = [] 
+        self.export_thread = None
+        # Kết quả nằm trong model (kho dạng cột); proxy lo sắp xếp, bộ lọc dạng vector lo lọc
+        self.result_model = ResultTableModel(VIDEO_RESULT_COLUMNS, self)
+        self.result_filter = ResultFilterEngine(**VIDEO_FILTER_FIELDS)
+        self.result_scorer = self._video_scorer()
+        self.proxy_model = ResultFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.result_model)
+        self.batch_keywords = []
         self.excluded_categories = []
         self.exclude_category_checkboxes = [] 
         
@@ -466,6 +759,25 @@ class KeywordResearchTab(QWidget):
         self.btn_exclude_categories = QPushButton("Chọn...")
         self.btn_exclude_categories.clicked.connect(self._show_exclude_category_menu)
         video_filters_layout.addWidget(self.btn_exclude_categories)
+
+        self.check_refresh_cache = QCheckBox("Làm mới (bỏ qua cache)")
+        self.check_refresh_cache.setToolTip("Gọi lại API thay vì dùng kết quả đã lưu trong cache")
+        video_filters_layout.addWidget(self.check_refresh_cache)
+
+        self.check_deep_search = QCheckBox("Tìm sâu")
+        self.check_deep_search.setToolTip(
+            f"Chia truy vấn theo khoảng thời gian đăng để lấy tới {DEEP_SEARCH_MAX_RESULTS} video "
+            "(vượt giới hạn ~500 kết quả, tốn nhiều quota hơn)"
+        )
+        video_filters_layout.addWidget(self.check_deep_search)
+
+        self.check_local_corpus = QCheckBox("Tìm kho cục bộ trước")
+        self.check_local_corpus.setToolTip(
+            "Tìm trước trong các video đã lấy ở những lần trước (không tốn quota); "
+            "chỉ gọi API khi kho cục bộ không có kết quả"
+        )
+        self.check_local_corpus.setEnabled(local_corpus.is_available())
+        video_filters_layout.addWidget(self.check_local_corpus)
         video_filters_layout.addStretch()
         
         self.channel_filters_widget = QWidget()
@@ -483,11 +795,43 @@ class KeywordResearchTab(QWidget):
         self.spin_max_videos_channel.setRange(0, 1000000); self.spin_max_videos_channel.setValue(0)
         self.spin_max_videos_channel.setButtonSymbols(QAbstractSpinBox.ButtonSymbols.NoButtons)
         channel_filters_layout.addWidget(self.spin_max_videos_channel)
+        channel_filters_layout.addSpacing(15)
+        self.check_local_corpus_channels = QCheckBox("Tìm kho cục bộ trước")
+        self.check_local_corpus_channels.setToolTip(
+            "Tìm trước trong các kênh đã lấy ở những lần trước (không tốn quota); "
+            "chỉ gọi API khi kho cục bộ không có kết quả"
+        )
+        self.check_local_corpus_channels.setEnabled(local_corpus.is_available())
+        channel_filters_layout.addWidget(self.check_local_corpus_channels)
         channel_filters_layout.addStretch()
 
         main_input_grid.addWidget(self.video_filters_widget, 2, 0, 1, 7)
         main_input_grid.addWidget(self.channel_filters_widget, 2, 0, 1, 7)
 
+        # Hàng 3: tìm nhiều từ khóa cùng lúc
+        self.batch_widget = QWidget()
+        batch_layout = QHBoxLayout(self.batch_widget)
+        batch_layout.setContentsMargins(0, 0, 0, 0)
+        batch_layout.setSpacing(10)
+        self.btn_batch_keywords = QPushButton("Nhiều từ khóa...")
+        self.btn_batch_keywords.setToolTip("Dán danh sách từ khóa (mỗi dòng một từ khóa) để tìm cùng lúc")
+        self.btn_batch_keywords.clicked.connect(self._edit_batch_keywords)
+        batch_layout.addWidget(self.btn_batch_keywords)
+        batch_layout.addWidget(QLabel("Số từ khóa chạy song song:"))
+        self.spin_batch_workers = QSpinBox()
+        self.spin_batch_workers.setRange(1, 10)
+        self.spin_batch_workers.setValue(BATCH_SEARCH_MAX_WORKERS)
+        batch_layout.addWidget(self.spin_batch_workers)
+        batch_layout.addWidget(QLabel("Giới hạn quota tìm kiếm:"))
+        self.spin_batch_quota = QSpinBox()
+        self.spin_batch_quota.setRange(100, 10000000)
+        self.spin_batch_quota.setSingleStep(1000)
+        self.spin_batch_quota.setValue(BATCH_SEARCH_QUOTA_CEILING)
+        self.spin_batch_quota.setButtonSymbols(QAbstractSpinBox.ButtonSymbols.NoButtons)
+        batch_layout.addWidget(self.spin_batch_quota)
+        batch_layout.addStretch()
+        main_input_grid.addWidget(self.batch_widget, 3, 0, 1, 7)
+
         main_input_grid.setColumnStretch(1, 1)
         main_input_grid.setColumnStretch(3, 1)
         main_input_grid.setColumnStretch(5, 1)
@@ -534,18 +878,28 @@ class KeywordResearchTab(QWidget):
 
         results_group = QGroupBox("Kết quả Tìm kiếm")
         results_layout = QVBoxLayout()
-        self.table_videos = QTableWidget()
-        self.table_videos.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.table_videos.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table_videos = QTableView()
+        self.table_videos.setModel(self.proxy_model)
+        self.table_videos.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table_videos.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.table_videos.setSortingEnabled(True)
-        self.table_videos.cellClicked.connect(self._handle_cell_clicked)
+        self.table_videos.setWordWrap(False)
+        self.table_videos.verticalHeader().setDefaultSectionSize(24)
+        self.table_videos.clicked.connect(self._handle_cell_clicked)
         self.table_videos.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.table_videos.customContextMenuRequested.connect(self._video_table_context_menu)
         results_layout.addWidget(self.table_videos)
         self.btn_export_videos = QPushButton("Xuất kết quả ra Excel")
         self.btn_export_videos.clicked.connect(self._export_videos_to_excel)
-        self.btn_export_videos.setEnabled(False)
-        results_layout.addWidget(self.btn_export_videos, alignment=Qt.AlignmentFlag.AlignRight)
+        self.btn_analyze_terms = QPushButton("Phân tích từ khóa")
+        self.btn_analyze_terms.setToolTip("Xếp hạng cụm từ 1-3 từ trong tiêu đề và thẻ của các video đang hiển thị")
+        self.btn_analyze_terms.clicked.connect(self._show_ngram_analytics)
+        result_buttons_layout = QHBoxLayout()
+        result_buttons_layout.addStretch()
+        result_buttons_layout.addWidget(self.btn_analyze_terms)
+        result_buttons_layout.addWidget(self.btn_export_videos)
+        results_layout.addLayout(result_buttons_layout)
+        self._set_result_actions_enabled(False)
         results_group.setLayout(results_layout)
         layout.addWidget(results_group)
 
@@ -620,54 +974,65 @@ class KeywordResearchTab(QWidget):
 
     def _toggle_filter_widgets(self):
         search_type = self.combo_search_type.currentText()
-        has_data = bool(self.videos_data)
-        
-        self.filter_group.setVisible(has_data)
         
         if search_type == "Video":
             self.video_filters_widget.setVisible(True)
             self.channel_filters_widget.setVisible(False)
+            self.batch_widget.setVisible(True)
             self.min_comments_label.setVisible(True)
             self.spin_min_comments.setVisible(True)
             self._setup_video_table_headers()
         else:
             self.video_filters_widget.setVisible(False)
             self.channel_filters_widget.setVisible(True)
+            self.batch_widget.setVisible(False)
             self.min_comments_label.setVisible(False)
             self.spin_min_comments.setVisible(False)
             self._setup_channel_table_headers()
-            
+
+        # Đổi loại tìm kiếm sẽ dựng lại model nên kết quả cũ không còn
+        has_data = self.result_model.rowCount() > 0
+        self.filter_group.setVisible(has_data)
         if not has_data:
-            self.table_videos.setRowCount(0)
-            self.btn_export_videos.setEnabled(False)
+            self._set_result_actions_enabled(False)
             self.filter_group.setVisible(False)
 
     def _setup_video_table_headers(self):
-        self.table_videos.setColumnCount(14)
-        self.table_videos.setHorizontalHeaderLabels([
-            "Tiêu đề", "URL Video", "Lượt xem", "Bình luận", "Ngày tải lên",
-            "Thời lượng", "Tên kênh", "URL Kênh", "Số Sub của Kênh", "Số video của Kênh",
-            "Số lượt Xem toàn kênh", "Danh mục", "Thẻ (Tags)", "Hành động"
-        ])
-        header = self.table_videos.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
-        col_widths = [180, 100, 100, 150, 100, 120, 150, 100, 100, 100, 100, 150, 80]
-        for i, width in enumerate(col_widths, 1):
-            header.setSectionResizeMode(i, QHeaderView.ResizeMode.Interactive)
-            self.table_videos.setColumnWidth(i, width)
-        header.setSectionResizeMode(13, QHeaderView.ResizeMode.Fixed)
-        self.table_videos.setColumnWidth(13, 80)
+        self._set_result_columns(VIDEO_RESULT_COLUMNS, VIDEO_FILTER_FIELDS)
+        self.result_scorer = self._video_scorer()
     
     def _setup_channel_table_headers(self):
-        headers = ["Tên kênh", "URL Kênh", "Số Sub", "Số Video", "Tổng lượt xem", "Ngày tạo", "Mô tả"]
-        self.table_videos.setColumnCount(len(headers))
-        self.table_videos.setHorizontalHeaderLabels(headers)
+        self._set_result_columns(CHANNEL_RESULT_COLUMNS, CHANNEL_FILTER_FIELDS)
+        self.result_scorer = None
+
+    @staticmethod
+    def _video_scorer():
+        # Kênh có ít video trong kết quả thì so với lượt xem trung bình trọn đời của kênh
+        return ResultScorer(
+            channel_field='channel_url',
+            channel_views_field='channel_view_count',
+            channel_videos_field='video_count'
+        )
+
+    def _update_scores(self):
+        """Recomputes the score columns over every result row (vectorized, see ResultScorer)."""
+        if self.result_scorer is not None and len(self.result_model.store):
+            self.result_model.set_column_values(self.result_scorer.update(self.result_model.store))
+
+    def _set_result_columns(self, columns, filter_fields):
+        """Installs an empty model with the given columns (results of the previous search are dropped)."""
+        self.result_model = ResultTableModel(columns, self)
+        self.result_filter = ResultFilterEngine(**filter_fields)
+        self.proxy_model.setSourceModel(self.result_model)
         header = self.table_videos.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
-        header.setSectionResizeMode(6, QHeaderView.ResizeMode.Stretch)
-        for i in range(1, 6):
-            header.setSectionResizeMode(i, QHeaderView.ResizeMode.Interactive)
-        self.table_videos.resizeColumnsToContents()
+        for i, column in enumerate(columns):
+            if column.width is None:
+                header.setSectionResizeMode(i, QHeaderView.ResizeMode.Stretch)
+            else:
+                header.setSectionResizeMode(
+                    i, QHeaderView.ResizeMode.Fixed if column.kind == 'action' else QHeaderView.ResizeMode.Interactive
+                )
+                self.table_videos.setColumnWidth(i, column.width)
     
     def _start_search(self):
         if self.main_window.is_operation_running:
@@ -675,27 +1040,71 @@ class KeywordResearchTab(QWidget):
             return
 
         keyword = self.txt_keyword.text().strip()
+        search_type = self.combo_search_type.currentText()
+        use_batch = search_type == "Video" and bool(self.batch_keywords)
         if not self.main_window.api_key:
             QMessageBox.warning(self.main_window, "Lỗi API Key", "Vui lòng cấu hình API Key ở Tab 1 (API Key).")
             self.main_window.tabs.setCurrentIndex(0)
             return
-        if not keyword:
+        if not keyword and not use_batch:
             QMessageBox.warning(self.main_window, "Thiếu thông tin", "Vui lòng nhập từ khóa tìm kiếm.")
             return
 
-        search_type = self.combo_search_type.currentText()
         if search_type == "Video":
             self._start_search_videos()
         else:
             self._start_search_channels()
 
+    def _edit_batch_keywords(self):
+        text, ok = QInputDialog.getMultiLineText(
+            self, "Tìm nhiều từ khóa",
+            "Mỗi dòng một từ khóa (để trống để quay lại tìm một từ khóa):",
+            "\n".join(self.batch_keywords)
+        )
+        if not ok:
+            return
+        self.batch_keywords = list(dict.fromkeys(line.strip() for line in text.splitlines() if line.strip()))
+        if self.batch_keywords:
+            self.btn_batch_keywords.setText(f"{len(self.batch_keywords)} từ khóa")
+            self.txt_keyword.setEnabled(False)
+            self.txt_keyword.setPlaceholderText("Đang dùng danh sách nhiều từ khóa")
+        else:
+            self.btn_batch_keywords.setText("Nhiều từ khóa...")
+            self.txt_keyword.setEnabled(True)
+            self.txt_keyword.setPlaceholderText("Nhập từ khóa tìm kiếm...")
+
     def _start_search_videos(self):
+        if self.check_local_corpus.isChecked() and not self.batch_keywords and self._search_local_corpus():
+            return
+
         region_name = self.combo_region.currentText()
         region_data = YOUTUBE_REGION_LANGUAGE_MAP.get(region_name, {})
         region_code = region_data.get("code")
         language_code = region_data.get("lang")
 
-        max_results = 500
+        deep_search = self.check_deep_search.isChecked()
+        if deep_search:
+            max_results = DEEP_SEARCH_MAX_RESULTS
+        else:
+            max_results = BATCH_SEARCH_RESULTS_PER_KEYWORD if self.batch_keywords else 500
+
+        # Ước tính quota trước khi chạy (không vượt trần chi tiêu mà luồng tìm kiếm tự áp);
+        # nếu không đủ thì cho phép giảm số video mỗi từ khóa
+        if self.batch_keywords:
+            search_budget = self.spin_batch_quota.value()
+        else:
+            search_budget = DEEP_SEARCH_QUOTA_BUDGET if deep_search else None
+        plan = plan_keyword_search(max_results, keyword_count=len(self.batch_keywords) or 1,
+                                   search_budget=search_budget)
+        throttled_max_results = int(max_results * plan.affordable_fraction) // 50 * 50
+        decision = confirm_quota_plan(
+            self.main_window, plan,
+            f"Giảm còn {throttled_max_results} video/từ khóa" if throttled_max_results >= 50 else None
+        )
+        if decision is None:
+            return
+        if decision == PLAN_THROTTLE:
+            max_results = throttled_max_results
         order = ORDER_OPTIONS_MAP[self.combo_order.currentText()]
         category_text = self.combo_category.currentText()
         video_category_id = self.main_window.video_categories.get(category_text)
@@ -705,8 +1114,8 @@ class KeywordResearchTab(QWidget):
         upload_days = self.upload_days_map.get(selected_upload_range, 0)
         published_after_iso_str = None
         if upload_days > 0:
-            published_after_dt = datetime.now(timezone.utc) - timedelta(days=upload_days)
-            published_after_iso_str = published_after_dt.isoformat(timespec='seconds').replace('+00:00', 'Z')
+            # Làm tròn xuống để chạy lại cùng tìm kiếm vẫn dùng được cache search.list
+            published_after_iso_str = to_rfc3339(round_search_time(datetime.now(timezone.utc) - timedelta(days=upload_days)))
         # ===================================
         
         is_shorts = self.check_shorts.isChecked()
@@ -715,22 +1124,22 @@ class KeywordResearchTab(QWidget):
 
         excluded_category_ids = [self.main_window.video_categories.get(cat) for cat in self.excluded_categories if cat in self.main_window.video_categories]
 
-        self.table_videos.setRowCount(0)
-        self.videos_data = []
-        self.btn_export_videos.setEnabled(False)
+        self._setup_video_table_headers()
+        self._set_result_actions_enabled(False)
         self.filter_group.setVisible(False)
 
         self.main_window.is_operation_running = True
         self.main_window.update_button_states()
-        self.main_window.show_progress_dialog(f"Đang tìm video: {self.txt_keyword.text().strip()}...", 0)
+        if self.batch_keywords:
+            self.main_window.show_progress_dialog(f"Đang tìm video cho {len(self.batch_keywords)} từ khóa...", 0)
+        else:
+            self.main_window.show_progress_dialog(f"Đang tìm video: {self.txt_keyword.text().strip()}...", 0)
 
         if self.search_thread and self.search_thread.isRunning():
             self.search_thread.requestInterruption()
             self.search_thread.wait()
 
-        self.search_thread = SearchVideosThread(
-            api_key=self.main_window.api_key,
-            keyword=self.txt_keyword.text().strip(),
+        thread_kwargs = dict(
             max_results=max_results,
             region_code=region_code,
             language_code=language_code,
@@ -741,14 +1150,122 @@ class KeywordResearchTab(QWidget):
             is_shorts_only=is_shorts,
             min_duration_seconds=min_duration_seconds,
             excluded_category_ids=excluded_category_ids,
+            refresh_cache=self.check_refresh_cache.isChecked(),
+            deep_search=deep_search,
             parent=self
         )
+        if self.batch_keywords:
+            self.search_thread = BatchKeywordSearchThread(
+                self.main_window.api_key,
+                self.batch_keywords,
+                keyword_workers=self.spin_batch_workers.value(),
+                quota_ceiling=self.spin_batch_quota.value(),
+                **thread_kwargs
+            )
+        else:
+            self.search_thread = SearchVideosThread(
+                self.main_window.api_key,
+                self.txt_keyword.text().strip(),
+                **thread_kwargs
+            )
+        self.search_thread.videos_batch_ready.connect(self._on_videos_batch_ready)
         self.search_thread.videos_fetched.connect(self._on_videos_fetched)
         self.search_thread.error_occurred.connect(self.main_window.on_api_error_common_slot)
         self.search_thread.progress_updated.connect(self.main_window.update_progress_dialog)
         self.search_thread.finished.connect(self.main_window.on_worker_thread_finished)
         self.search_thread.start()
 
+    def _search_local_corpus(self):
+        """Shows the local corpus matches for the keyword; returns False when there are none."""
+        max_results = DEEP_SEARCH_MAX_RESULTS if self.check_deep_search.isChecked() else 500
+        upload_days = self.upload_days_map.get(self.combo_upload_days.currentText(), 0)
+        published_after = None
+        if upload_days > 0:
+            published_after = int((datetime.now(timezone.utc) - timedelta(days=upload_days)).timestamp())
+        categories = self.main_window.video_categories
+        excluded_category_ids = [categories.get(cat) for cat in self.excluded_categories if cat in categories]
+
+        matches = local_corpus.search_videos(
+            self.txt_keyword.text().strip(),
+            limit=max_results,
+            published_after=published_after,
+            min_duration_seconds=0 if self.check_shorts.isChecked() else self.spin_min_duration.value() * 60,
+            max_duration_seconds=59 if self.check_shorts.isChecked() else None,
+            category_id=categories.get(self.combo_category.currentText()),
+            excluded_category_ids=excluded_category_ids
+        )
+        if not matches:
+            self.main_window.statusBar().showMessage("Kho cục bộ không có kết quả, chuyển sang tìm bằng API...", 3000)
+            return False
+
+        category_names = {cid: name for name, cid in categories.items() if cid}
+        videos_list = []
+        for match in matches:
+            channel_id = match['channel_id']
+            published_at = match['published_at']
+            videos_list.append({
+                'id': match['id'],
+                'title': match['title'] or 'N/A',
+                'url': f"https://www.youtube.com/watch?v={match['id']}",
+                'view_count': match['view_count'],
+                'comment_count': match['comment_count'],
+                'upload_date': datetime.fromtimestamp(published_at, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ') if published_at is not None else 'N/A',
+                'duration': convert_iso_duration(match['duration']) if match['duration'] else 'N/A',
+                'category_name': category_names.get(match['category_id'], 'Không xác định'),
+                'tags': match['tags'],
+                'channel_title': match['channel_title'] or 'N/A',
+                'channel_url': f"https://www.youtube.com/channel/{channel_id}" if channel_id else 'N/A',
+                'subscriber_count': match['subscriber_count'],
+                'video_count': match['channel_video_count'],
+                'channel_view_count': match['channel_view_count'],
+                'matched_keywords': [],
+            })
+
+        self._setup_video_table_headers()
+        self._populate_video_table(videos_list)
+        self._set_result_actions_enabled(True)
+        self.filter_group.setVisible(True)
+        self.main_window.statusBar().showMessage(
+            f"Đã tìm thấy {len(videos_list)} video trong kho cục bộ (không tốn quota). "
+            "Bỏ chọn \"Tìm kho cục bộ trước\" để tìm mới bằng API.", 8000
+        )
+        return True
+
+    def _search_local_corpus_channels(self, max_subscribers, max_videos):
+        """Shows the local corpus channel matches for the keyword; returns False when there are none."""
+        matches = local_corpus.search_channels(
+            self.txt_keyword.text().strip(),
+            limit=500,
+            max_subscribers=max_subscribers,
+            max_videos=max_videos
+        )
+        if not matches:
+            self.main_window.statusBar().showMessage("Kho cục bộ không có kết quả, chuyển sang tìm bằng API...", 3000)
+            return False
+
+        channels_list = []
+        for match in matches:
+            published_at = match['published_at']
+            channels_list.append({
+                'id': match['id'],
+                'title': match['title'] or 'N/A',
+                'description': match['description'] or '',
+                'url': f"https://www.youtube.com/channel/{match['id']}",
+                'subscriber_count': match['subscriber_count'],
+                'video_count': match['video_count'],
+                'view_count': match['view_count'],
+                'published_at': datetime.fromtimestamp(published_at, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ') if published_at is not None else 'N/A',
+            })
+
+        self._populate_channel_table(channels_list)
+        self._set_result_actions_enabled(True)
+        self.filter_group.setVisible(True)
+        self.main_window.statusBar().showMessage(
+            f"Đã tìm thấy {len(channels_list)} kênh trong kho cục bộ (không tốn quota). "
+            "Bỏ chọn \"Tìm kho cục bộ trước\" để tìm mới bằng API.", 8000
+        )
+        return True
+
     def _start_search_channels(self):
         region_name = self.combo_region.currentText()
         region_data = YOUTUBE_REGION_LANGUAGE_MAP.get(region_name, {})
@@ -763,9 +1280,11 @@ class KeywordResearchTab(QWidget):
         max_vids = self.spin_max_videos_channel.value()
         if max_vids == 0: max_vids = None
 
-        self.table_videos.setRowCount(0)
-        self.videos_data = []
-        self.btn_export_videos.setEnabled(False)
+        if self.check_local_corpus_channels.isChecked() and self._search_local_corpus_channels(max_subs, max_vids):
+            return
+
+        self._setup_channel_table_headers()
+        self._set_result_actions_enabled(False)
         self.filter_group.setVisible(False) 
 
         self.main_window.is_operation_running = True
@@ -792,31 +1311,44 @@ class KeywordResearchTab(QWidget):
         self.search_thread.finished.connect(self.main_window.on_worker_thread_finished)
         self.search_thread.start()
 
+    def _on_videos_batch_ready(self, videos_batch):
+        # Hiển thị dần từng trang kết quả trong khi luồng tìm kiếm vẫn đang chạy
+        if self.sender() is not self.search_thread:
+            return
+        self.result_model.append_records(videos_batch)
+        # Chỉ chấm điểm dòng mới và các dòng cùng kênh (trung vị của kênh đã đổi)
+        if self.result_scorer is not None:
+            rows, scores = self.result_scorer.update_appended(self.result_model.store)
+            self.result_model.set_row_values(rows, scores)
+
     def _on_videos_fetched(self, videos_list):
-        self.videos_data = videos_list
         self.main_window.hide_progress_dialog()
         
         if not videos_list:
+            self.result_model.set_records([])
             QMessageBox.information(self.main_window, "Kết quả", "Không tìm thấy video nào khớp với tiêu chí tìm kiếm.")
             self.main_window.statusBar().showMessage("Không tìm thấy video.", 3000)
-            self.btn_export_videos.setEnabled(False)
+            self._set_result_actions_enabled(False)
             self.filter_group.setVisible(False)
             return
 
-        self._populate_video_table(videos_list)
+        # Các dòng đã được thêm dần qua videos_batch_ready; chỉ nạp lại nếu model bị lệch
+        # hoặc khi tìm nhiều từ khóa (cột "Từ khóa khớp" có thể đã được bổ sung)
+        if self.result_model.rowCount() != len(videos_list) or isinstance(self.sender(), BatchKeywordSearchThread):
+            self._populate_video_table(videos_list)
         
         self.main_window.statusBar().showMessage(f"Đã tải {len(videos_list)} video.", 5000)
         QMessageBox.information(self.main_window, "Hoàn tất", f"Đã tìm thấy và hiển thị {len(videos_list)} video.")
-        self.btn_export_videos.setEnabled(True)
+        self._set_result_actions_enabled(True)
         self.filter_group.setVisible(True)
 
     def _on_channels_fetched(self, channels_list):
-        self.videos_data = channels_list
         self.main_window.hide_progress_dialog()
 
         if not channels_list:
+            self.result_model.set_records([])
             QMessageBox.information(self.main_window, "Kết quả", "Không tìm thấy kênh nào khớp với tiêu chí tìm kiếm.")
-            self.btn_export_videos.setEnabled(False)
+            self._set_result_actions_enabled(False)
             self.filter_group.setVisible(False)
             return
         
@@ -824,154 +1356,20 @@ class KeywordResearchTab(QWidget):
 
         self.main_window.statusBar().showMessage(f"Đã tải {len(channels_list)} kênh.", 5000)
         QMessageBox.information(self.main_window, "Hoàn tất", f"Đã tìm thấy và hiển thị {len(channels_list)} kênh.")
-        self.btn_export_videos.setEnabled(True)
+        self._set_result_actions_enabled(True)
         self.filter_group.setVisible(True)
 
     def _populate_video_table(self, videos_list):
-        self._setup_video_table_headers()
-        self.table_videos.setSortingEnabled(False)
-        self.table_videos.setRowCount(len(videos_list))
-
-        for r_idx, video in enumerate(videos_list):
-            self.table_videos.setItem(r_idx, 0, QTableWidgetItem(str(video.get('title', 'N/A'))))
-            
-            url_item = QTableWidgetItem(video.get('url', 'N/A'))
-            url_item.setToolTip(f"URL: {video.get('url', 'N/A')}\nNhấp để mở hoặc chuột phải để sao chép URL.")
-            url_item.setForeground(QColor('#4da6ff'))
-            font = QFont(); font.setUnderline(True); url_item.setFont(font)
-            self.table_videos.setItem(r_idx, 1, url_item)
-
-            vc_val = video.get('view_count', 0)
-            vc_item = QTableWidgetItem()
-            vc_item.setData(Qt.ItemDataRole.DisplayRole, format_int_with_separator(vc_val))
-            vc_item.setData(Qt.ItemDataRole.UserRole, vc_val)
-            vc_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.table_videos.setItem(r_idx, 2, vc_item)
-
-            cc_val = video.get('comment_count')
-            cc_item = QTableWidgetItem()
-            cc_display_val = format_int_with_separator(cc_val) if cc_val is not None else "N/A (Tắt)"
-            cc_sort_val = cc_val if cc_val is not None else -1
-            cc_item.setData(Qt.ItemDataRole.DisplayRole, cc_display_val)
-            cc_item.setData(Qt.ItemDataRole.UserRole, cc_sort_val)
-            cc_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.table_videos.setItem(r_idx, 3, cc_item)
-
-            upload_date = video.get('upload_date', 'N/A')
-            upload_item = QTableWidgetItem(format_date_dd_mm_yyyy(upload_date))
-            if upload_date != 'N/A':
-                try:
-                    dt = datetime.fromisoformat(upload_date.replace('Z', '+00:00'))
-                    upload_item.setData(Qt.ItemDataRole.UserRole, dt)
-                except ValueError: pass
-            self.table_videos.setItem(r_idx, 4, upload_item)
-
-            self.table_videos.setItem(r_idx, 5, QTableWidgetItem(str(video.get('duration', 'N/A'))))
-
-            channel_item = QTableWidgetItem(video.get('channel_title', 'N/A'))
-            channel_item.setToolTip(f"Kênh: {video.get('channel_title', 'N/A')}\nNhấp để mở hoặc chuột phải để sao chép URL.")
-            channel_item.setForeground(QColor('#4da6ff'))
-            font = QFont(); font.setUnderline(True); channel_item.setFont(font)
-            self.table_videos.setItem(r_idx, 6, channel_item)
-
-            # === SỬA LỖI 3 TẠI ĐÂY ===
-            channel_url_item = QTableWidgetItem(video.get('channel_url', 'N/A'))
-            channel_url_item.setToolTip(f"URL Kênh: {video.get('channel_url', 'N/A')}\nNhấp để mở hoặc chuột phải để sao chép URL.")
-            channel_url_item.setForeground(QColor('#4da6ff'))
-            font_url = QFont(); font_url.setUnderline(True); channel_url_item.setFont(font_url)
-            # Dòng bị lỗi (đã xóa): self.table_videos.setItem(r_idx, 7, channel_item)
-            # Dòng chính xác:
-            self.table_videos.setItem(r_idx, 7, channel_url_item)
-            # ========================
-
-            sub_val_str = video.get('subscriber_count')
-            sub_val = int(sub_val_str) if sub_val_str is not None else -1
-            sub_item = QTableWidgetItem()
-            sub_display = format_int_with_separator(sub_val) if sub_val != -1 else "N/A"
-            sub_item.setData(Qt.ItemDataRole.DisplayRole, sub_display)
-            sub_item.setData(Qt.ItemDataRole.UserRole, sub_val)
-            sub_item.setToolTip("Tổng số người đăng ký của kênh")
-            sub_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.table_videos.setItem(r_idx, 8, sub_item)
-
-            vid_val_str = video.get('video_count')
-            vid_val = int(vid_val_str) if vid_val_str is not None else -1
-            vid_item = QTableWidgetItem()
-            vid_display = format_int_with_separator(vid_val) if vid_val != -1 else "N/A"
-            vid_item.setData(Qt.ItemDataRole.DisplayRole, vid_display)
-            vid_item.setData(Qt.ItemDataRole.UserRole, vid_val)
-            vid_item.setToolTip("Tổng số video của kênh")
-            vid_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.table_videos.setItem(r_idx, 9, vid_item)
-
-            chan_view_val_str = video.get('channel_view_count')
-            chan_view_val = int(chan_view_val_str) if chan_view_val_str is not None else -1
-            chan_view_item = QTableWidgetItem()
-            chan_view_display = format_int_with_separator(chan_view_val) if chan_view_val != -1 else "N/A"
-            chan_view_item.setData(Qt.ItemDataRole.DisplayRole, chan_view_display)
-            chan_view_item.setData(Qt.ItemDataRole.UserRole, chan_view_val)
-            chan_view_item.setToolTip("Tổng số lượt xem của toàn kênh")
-            chan_view_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.table_videos.setItem(r_idx, 10, chan_view_item)
-
-            self.table_videos.setItem(r_idx, 11, QTableWidgetItem(str(video.get('category_name', 'Không xác định'))))
-            
-            tags_list = video.get('tags', [])
-            tags_str = ", ".join(tags_list) if tags_list else "Không có"
-            self.table_videos.setItem(r_idx, 12, QTableWidgetItem(tags_str))
-
-            btn_open = QPushButton("Mở")
-            btn_open.clicked.connect(lambda checked, u=video.get('url'): self.main_window.open_url_externally(u))
-            self.table_videos.setCellWidget(r_idx, 13, btn_open)
-
-        self.table_videos.resizeRowsToContents()
-        self.table_videos.setSortingEnabled(True)
+        self.result_model.set_records(videos_list)
+        self._update_scores()
 
     def _populate_channel_table(self, channels_list):
         self._setup_channel_table_headers()
-        self.table_videos.setSortingEnabled(False)
-        self.table_videos.setRowCount(len(channels_list))
-
-        for r_idx, channel in enumerate(channels_list):
-            title_item = QTableWidgetItem(str(channel.get('title', 'N/A')))
-            self.table_videos.setItem(r_idx, 0, title_item)
-
-            url_item = QTableWidgetItem(channel.get('url', 'N/A'))
-            url_item.setForeground(QColor('#4da6ff')); font = QFont(); font.setUnderline(True); url_item.setFont(font)
-            self.table_videos.setItem(r_idx, 1, url_item)
-
-            sub_val = channel.get('subscriber_count', -1)
-            sub_item = QTableWidgetItem()
-            sub_display = format_int_with_separator(sub_val) if sub_val != -1 else "Bị ẩn"
-            sub_item.setData(Qt.ItemDataRole.DisplayRole, sub_display)
-            sub_item.setData(Qt.ItemDataRole.UserRole, sub_val)
-            sub_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.table_videos.setItem(r_idx, 2, sub_item)
-
-            vid_val = channel.get('video_count', 0)
-            vid_item = QTableWidgetItem()
-            vid_item.setData(Qt.ItemDataRole.DisplayRole, format_int_with_separator(vid_val))
-            vid_item.setData(Qt.ItemDataRole.UserRole, vid_val)
-            vid_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.table_videos.setItem(r_idx, 3, vid_item)
-
-            view_val = channel.get('view_count', 0)
-            view_item = QTableWidgetItem()
-            view_item.setData(Qt.ItemDataRole.DisplayRole, format_int_with_separator(view_val))
-            view_item.setData(Qt.ItemDataRole.UserRole, view_val)
-            view_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.table_videos.setItem(r_idx, 4, view_item)
-            
-            upload_date = channel.get('published_at', 'N/A')
-            self.table_videos.setItem(r_idx, 5, QTableWidgetItem(format_date_dd_mm_yyyy(upload_date)))
-
-            self.table_videos.setItem(r_idx, 6, QTableWidgetItem(str(channel.get('description', ''))))
-
-        self.table_videos.resizeRowsToContents()
-        self.table_videos.setSortingEnabled(True)
+        self.result_model.set_records(channels_list)
 
     def _apply_results_filter(self):
-        if not self.videos_data:
+        store = self.result_model.store
+        if not len(store):
             return
 
         min_views = self.spin_min_views.value()
@@ -979,54 +1377,22 @@ class KeywordResearchTab(QWidget):
         min_comments = self.spin_min_comments.value()
         days_range = self.spin_days_range.value()
 
-        cutoff_date = None
+        cutoff_epoch = None
         if days_range > 0:
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_range)
-
-        filtered_data = []
-        search_type = self.combo_search_type.currentText()
-
-        for item in self.videos_data:
-            passes = True
-            
-            if search_type == "Video":
-                views = int(item.get('view_count', 0))
-                subs_str = item.get('subscriber_count')
-                subs = int(subs_str) if subs_str is not None else 0
-                comments = item.get('comment_count') or 0
-                date_str = item.get('upload_date')
-
-                if comments < min_comments:
-                    passes = False
-
-            else: 
-                views = int(item.get('view_count', 0))
-                subs = int(item.get('subscriber_count', 0))
-                if subs == -1: subs = 0 
-                date_str = item.get('published_at') 
-            
-            if passes and views < min_views:
-                passes = False
-            if passes and subs < min_subs:
-                passes = False
-
-            if passes and cutoff_date and date_str:
-                try:
-                    item_date = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                    if item_date < cutoff_date:
-                        passes = False
-                except (ValueError, TypeError):
-                    pass 
-
-            if passes:
-                filtered_data.append(item)
-        
-        if search_type == "Video":
-            self._populate_video_table(filtered_data)
+            cutoff_epoch = int((datetime.now(timezone.utc) - timedelta(days=days_range)).timestamp())
+
+        # Chỉ chuẩn hóa các dòng mới; phần lọc là phép so sánh trên mảng (giá trị thiếu coi như 0)
+        self.result_filter.sync(store)
+        minimums = {'view_count': min_views, 'subscriber_count': min_subs}
+        if self.combo_search_type.currentText() == "Video":
+            minimums['comment_count'] = min_comments
+            date_field = 'upload_date'
         else:
-            self._populate_channel_table(filtered_data)
-            
-        self.main_window.statusBar().showMessage(f"Đã áp dụng bộ lọc. Hiển thị {len(filtered_data)} kết quả.", 5000)
+            date_field = 'published_at'
+        visible_rows = self.result_filter.select(minimums, {date_field: cutoff_epoch})
+
+        self.result_model.set_visible_rows(visible_rows)
+        self.main_window.statusBar().showMessage(f"Đã áp dụng bộ lọc. Hiển thị {self.proxy_model.rowCount()} kết quả.", 5000)
 
     def _clear_results_filter(self):
         self.spin_min_views.setValue(0)
@@ -1034,77 +1400,51 @@ class KeywordResearchTab(QWidget):
         self.spin_min_comments.setValue(0)
         self.spin_days_range.setValue(0)
         
-        search_type = self.combo_search_type.currentText()
-        if search_type == "Video":
-            self._populate_video_table(self.videos_data)
-        else:
-            self._populate_channel_table(self.videos_data)
+        self.result_model.set_visible_rows(None)
         self.main_window.statusBar().showMessage("Đã xóa bộ lọc.", 3000)
 
-    def _video_table_context_menu(self, pos):
-        selected_item = self.table_videos.itemAt(pos)
-        if not selected_item: return
-        
-        search_type = self.combo_search_type.currentText()
-        column = selected_item.column()
-        row_visual = selected_item.row()
-        
-        url_to_copy = None
-
-        title_item = self.table_videos.item(row_visual, 0)
-        if not title_item: return
-        
-        clicked_title = title_item.text()
-        url_item = self.table_videos.item(row_visual, 1)
-        if not url_item: return
-        clicked_url = url_item.text()
+    def _clicked_record_url(self, index, clickable_fields):
+        """URL behind a clicked cell if its column is one of clickable_fields (record lookup is O(1))."""
+        if not index.isValid():
+            return None
+        column = self.result_model.columns[index.column()]
+        column_key = column.field if column.field else column.kind
+        if column_key not in clickable_fields:
+            return None
+        record = self.proxy_model.record(index.row())
+        url = record.get(clickable_fields[column_key])
+        return url if url and url != 'N/A' else None
 
-        original_item = next((item for item in self.videos_data if item.get('url') == clicked_url and item.get('title') == clicked_title), None)
-        if not original_item: return
-
-        if search_type == "Video":
-            if column in (1, 6, 7):
-                url_to_copy = original_item['url'] if column == 1 else original_item['channel_url']
-        else: 
-            if column == 1:
-                url_to_copy = original_item['url']
+    def _video_table_context_menu(self, pos):
+        index = self.table_videos.indexAt(pos)
+        if self.combo_search_type.currentText() == "Video":
+            clickable_fields = {'url': 'url', 'channel_title': 'channel_url', 'channel_url': 'channel_url'}
+        else:
+            clickable_fields = {'url': 'url'}
+        url_to_copy = self._clicked_record_url(index, clickable_fields)
 
         if url_to_copy:
             menu = QMenu()
             copy_url_action = menu.addAction("Sao chép URL")
-            action = menu.exec(self.table_videos.mapToGlobal(pos))
+            action = menu.exec(self.table_videos.viewport().mapToGlobal(pos))
             if action == copy_url_action:
                 self.main_window.copy_text_to_clipboard(url_to_copy)
 
-    def _handle_cell_clicked(self, row, column):
-        search_type = self.combo_search_type.currentText()
-        url_to_open = None
-
-        title_item = self.table_videos.item(row, 0)
-        if not title_item: return
-        
-        clicked_title = title_item.text()
-        url_item = self.table_videos.item(row, 1) 
-        if not url_item: return
-        clicked_url = url_item.text()
-
-        original_item = next((item for item in self.videos_data if item.get('url') == clicked_url and item.get('title') == clicked_title), None)
-        if not original_item: return
-
-        if search_type == "Video":
-             if column in (1, 6, 7):
-                url_to_open = original_item['url'] if column == 1 else original_item['channel_url']
+    def _handle_cell_clicked(self, index):
+        if self.combo_search_type.currentText() == "Video":
+            clickable_fields = {'url': 'url', 'channel_title': 'channel_url', 'channel_url': 'channel_url', 'action': 'url'}
         else:
-            if column in (0, 1):
-                url_to_open = original_item['url']
-
-        if url_to_open and url_to_open != 'N/A':
+            clickable_fields = {'title': 'url', 'url': 'url'}
+        url_to_open = self._clicked_record_url(index, clickable_fields)
+        if url_to_open:
             self.main_window.open_url_externally(url_to_open)
 
     def _export_videos_to_excel(self):
-        rows = self.table_videos.rowCount()
-        cols = self.table_videos.columnCount()
-        
+        if self.main_window.is_operation_running:
+            QMessageBox.warning(self.main_window, "Đang xử lý", "Một tác vụ khác đang chạy. Vui lòng chờ.")
+            return
+
+        rows = self.proxy_model.rowCount()
         if rows == 0:
             QMessageBox.information(self.main_window, "Không có dữ liệu", "Không có dữ liệu để xuất.")
             return
@@ -1114,92 +1454,57 @@ class KeywordResearchTab(QWidget):
             keyword_part = f"export_{datetime.now().strftime('%Y%m%d')}"
         default_filename = f"{keyword_part}.xlsx"
         
-        file_path, _ = QFileDialog.getSaveFileName(
-            self.main_window, "Lưu file Excel", default_filename, "Excel Files (*.xlsx)"
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self.main_window, "Lưu file kết quả", default_filename, export_file_filter('.xlsx')
         )
         if not file_path:
             return
-
-        try:
-            self.main_window.statusBar().showMessage("Đang xuất ra Excel...")
-            workbook = openpyxl.Workbook()
-            sheet = workbook.active
-            sheet.title = "Kết quả"
-
-            headers = [self.table_videos.horizontalHeaderItem(i).text() for i in range(cols)]
-            if "Hành động" in headers:
-                action_col_index = headers.index("Hành động")
-                headers.pop(action_col_index)
-            else:
-                action_col_index = -1
-            sheet.append(headers)
-            
-            # === SỬA LỖI 1: XUẤT SỐ RA EXCEL ===
-            search_type = self.combo_search_type.currentText()
-            # Chỉ số cột TRỰC QUAN (visual index) chứa dữ liệu số
-            video_numeric_cols = [2, 3, 8, 9, 10]  # Lượt xem, Bình luận, Sub, Video, View kênh
-            channel_numeric_cols = [2, 3, 4]       # Sub, Video, Tổng view
-
-            for row in range(rows):
-                row_data = []
-                current_visual_col = 0  # Theo dõi chỉ số cột trực quan
-                
-                for col in range(cols):
-                    if col == action_col_index:
-                        continue
-                        
-                    item = self.table_videos.item(row, col)
-                    if not item:
-                        row_data.append("")
-                        current_visual_col += 1
-                        continue
-
-                    is_numeric_col = False
-                    if search_type == "Video" and current_visual_col in video_numeric_cols:
-                        is_numeric_col = True
-                    elif search_type == "Kênh" and current_visual_col in channel_numeric_cols:
-                        is_numeric_col = True
-
-                    if is_numeric_col:
-                        # Lấy giá trị số thô từ UserRole
-                        numeric_val = item.data(Qt.ItemDataRole.UserRole)
-                        # Giá trị -1 được dùng cho "N/A" hoặc "Bị ẩn"
-                        if numeric_val is not None and numeric_val != -1:
-                            row_data.append(numeric_val)
-                        else:
-                            # Giữ nguyên văn bản "N/A", "Bị ẩn" v.v.
-                            row_data.append(item.text())
-                    else:
-                        # Lấy giá trị văn bản như bình thường
-                        row_data.append(item.text())
-                        
-                    current_visual_col += 1
-                sheet.append(row_data)
-            # =================================
-
-            for i, column_cells in enumerate(sheet.columns):
-                max_length = 0
-                column_letter = get_column_letter(i + 1)
-                for cell in column_cells:
-                    if cell.value:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except Exception:
-                            pass  # Non-critical: ignore errors when calculating column width
-                adjusted_width = min(max_length + 2, 70)
-                sheet.column_dimensions[column_letter].width = adjusted_width
-
-            workbook.save(file_path)
-            self.main_window.statusBar().showMessage(f"Đã xuất thành công ra: {file_path}", 5000)
-            QMessageBox.information(self.main_window, "Thành công", f"Dữ liệu đã được xuất ra file:\n{file_path}")
-
-        except Exception as e:
-            self.main_window.statusBar().showMessage(f"Lỗi khi xuất Excel: {str(e)}")
-            QMessageBox.critical(self.main_window, "Lỗi Xuất Excel", f"Lỗi: {str(e)}")
-            logger.exception(f"Export videos to Excel error: {e}")
+        file_path = export_path_with_extension(file_path, selected_filter)
+
+        # Xuất theo thứ tự và bộ lọc đang hiển thị, đọc thẳng từ kho dữ liệu (không qua widget)
+        headers, int_columns, float_columns, link_columns = self.result_model.export_layout()
+        export_rows = self.result_model.export_rows(self.proxy_model.store_rows())
+        self.export_thread = ExportThread(
+            file_path, headers, export_rows, rows,
+            int_columns=int_columns, link_columns=link_columns, float_columns=float_columns, parent=self
+        )
+        self.export_thread.progress_updated.connect(self.main_window.update_progress_dialog)
+        self.export_thread.export_finished.connect(self._on_export_finished)
+        self.export_thread.error_occurred.connect(self._on_export_error)
+        self.export_thread.finished.connect(self.main_window.on_worker_thread_finished)
+        self.main_window.worker_started(self.export_thread, "Xuất dữ liệu")
+        self.main_window.show_progress_dialog(f"Đang xuất {rows} dòng...", 0)
+        self.export_thread.start()
+
+    def _on_export_finished(self, file_path, written):
+        self.main_window.statusBar().showMessage(f"Đã xuất thành công {written} dòng ra: {file_path}", 5000)
+        QMessageBox.information(self.main_window, "Thành công", f"Dữ liệu đã được xuất ra file:\n{file_path}")
+
+    def _on_export_error(self, error_message):
+        self.main_window.statusBar().showMessage(f"Lỗi khi xuất dữ liệu: {error_message}")
+        QMessageBox.critical(self.main_window, "Lỗi Xuất dữ liệu", error_message)
 
     def set_buttons_enabled(self, enabled):
         self.btn_search.setEnabled(enabled)
-        has_data = self.table_videos.rowCount() > 0
-        self.btn_export_videos.setEnabled(enabled and has_data)
\ No newline at end of file
+        has_data = self.result_model.rowCount() > 0
+        self._set_result_actions_enabled(enabled and has_data)
+
+    def _set_result_actions_enabled(self, enabled):
+        self.btn_export_videos.setEnabled(enabled)
+        # Phân tích n-gram chỉ áp dụng cho kết quả video (cần tiêu đề và thẻ)
+        self.btn_analyze_terms.setEnabled(enabled and 'tags' in self.result_model.store.fields)
+
+    def _show_ngram_analytics(self):
+        store_rows = self.proxy_model.store_rows()
+        if not store_rows:
+            QMessageBox.information(self.main_window, "Không có dữ liệu", "Không có video nào để phân tích.")
+            return
+        # Chụp dữ liệu các dòng đang hiển thị (theo bộ lọc hiện tại) để hộp thoại không phụ thuộc vào bảng
+        store = self.result_model.store
+        titles, tags, views, subscribers = (
+            [column[row] for row in store_rows]
+            for column in (store.column('title'), store.column('tags'),
+                           store.column('view_count'), store.column('subscriber_count'))
+        )
+        dialog = NgramAnalyticsDialog(titles, tags, views, subscribers, parent=self.main_window)
+        dialog.exec()
\ No newline at end of file